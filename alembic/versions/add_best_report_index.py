@@ -0,0 +1,30 @@
+"""add partial index for the best-report-per-user leaderboard
+
+Revision ID: add_best_report_index
+Revises: add_idempotency_keys
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "add_best_report_index"
+down_revision: Union[str, Sequence[str], None] = "add_idempotency_keys"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_session_reports_published_user_score",
+        "session_reports",
+        ["user_id", "zone_in_score", "created_at"],
+        postgresql_where=sa.text("published"),
+        sqlite_where=sa.text("published"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_session_reports_published_user_score", table_name="session_reports")
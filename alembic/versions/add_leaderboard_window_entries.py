@@ -0,0 +1,38 @@
+"""add leaderboard_window_entries table
+
+Revision ID: add_leaderboard_window_entries
+Revises: add_user_stats
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "add_leaderboard_window_entries"
+down_revision: Union[str, Sequence[str], None] = "add_user_stats"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "leaderboard_window_entries",
+        sa.Column("report_id", sa.UUID(), nullable=False),
+        sa.Column("user_id", sa.UUID(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("zone_in_score", sa.Float(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["report_id"], ["session_reports.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("report_id"),
+    )
+    op.create_index("ix_leaderboard_window_entries_day_score", "leaderboard_window_entries", ["day", "zone_in_score"], unique=False)
+    # Existing published reports are filled in with: python maintenance.py leaderboard-windows
+
+
+def downgrade() -> None:
+    op.drop_index("ix_leaderboard_window_entries_day_score", table_name="leaderboard_window_entries")
+    op.drop_table("leaderboard_window_entries")
@@ -0,0 +1,28 @@
+"""add retry backoff and dead-letter columns to outbox_tasks
+
+Revision ID: add_outbox_retry
+Revises: add_best_report_index
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "add_outbox_retry"
+down_revision: Union[str, Sequence[str], None] = "add_best_report_index"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("outbox_tasks", sa.Column("next_attempt_at", sa.DateTime(timezone=True), nullable=True))
+    op.add_column("outbox_tasks", sa.Column("dead_at", sa.DateTime(timezone=True), nullable=True))
+    # Rows that already used up their attempts start out dead-lettered
+    op.execute("UPDATE outbox_tasks SET dead_at = COALESCE(created_at, CURRENT_TIMESTAMP) WHERE attempts >= 5")
+
+
+def downgrade() -> None:
+    op.drop_column("outbox_tasks", "dead_at")
+    op.drop_column("outbox_tasks", "next_attempt_at")
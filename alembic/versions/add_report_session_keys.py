@@ -0,0 +1,44 @@
+"""add report_session_keys (per-user session_id uniqueness for partitioned session_reports)
+
+Revision ID: add_report_session_keys
+Revises: add_outbox_retry
+Create Date: 2026-10-19 16:00:00.000000
+
+The table exists everywhere but is only written with PARTITION_REPORTS=true. On a
+partitioned table it is backfilled from session_reports; if a session was already
+stored twice (different started_at), the most recently updated row owns the key.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+from app.core import partitions
+
+revision: str = "add_report_session_keys"
+down_revision: Union[str, Sequence[str], None] = "add_outbox_retry"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "report_session_keys",
+        sa.Column("user_id", sa.UUID(), nullable=False),
+        sa.Column("session_id", sa.String(64), nullable=False),
+        sa.Column("report_id", sa.UUID(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "session_id"),
+    )
+    op.create_index("ix_report_session_keys_report_id", "report_session_keys", ["report_id"])
+    if partitions.is_partitioned(op.get_bind()):
+        op.execute(
+            "INSERT INTO report_session_keys (user_id, session_id, report_id)"
+            " SELECT DISTINCT ON (user_id, session_id) user_id, session_id, id FROM session_reports"
+            " ORDER BY user_id, session_id, updated_at DESC NULLS LAST, created_at DESC"
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_report_session_keys_report_id", table_name="report_session_keys")
+    op.drop_table("report_session_keys")
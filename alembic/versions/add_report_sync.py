@@ -0,0 +1,54 @@
+"""add change sequences and report_tombstones for incremental sync
+
+Revision ID: add_report_sync
+Revises: partition_session_reports
+Create Date: 2026-10-19 12:00:00.000000
+
+Existing reports are numbered 1..n per user (oldest first) and users.change_seq set
+to n, keeping sequence values unique per user so a token is an exact cursor.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "add_report_sync"
+down_revision: Union[str, Sequence[str], None] = "partition_session_reports"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("users", sa.Column("change_seq", sa.BigInteger(), nullable=False, server_default="0"))
+    op.add_column("users", sa.Column("tombstones_pruned_seq", sa.BigInteger(), nullable=False, server_default="0"))
+    op.add_column("session_reports", sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True))
+    op.add_column("session_reports", sa.Column("change_seq", sa.BigInteger(), nullable=False, server_default="0"))
+    op.execute("UPDATE session_reports SET updated_at = created_at")
+    op.execute(
+        "UPDATE session_reports SET change_seq = (SELECT s.seq FROM ("
+        " SELECT id, ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY created_at, id) AS seq FROM session_reports"
+        ") s WHERE s.id = session_reports.id)"
+    )
+    op.execute("UPDATE users SET change_seq = (SELECT COUNT(*) FROM session_reports r WHERE r.user_id = users.id)")
+    op.create_index("ix_session_reports_user_change_seq", "session_reports", ["user_id", "change_seq"])
+    op.create_table(
+        "report_tombstones",
+        sa.Column("report_id", sa.UUID(), nullable=False),
+        sa.Column("user_id", sa.UUID(), nullable=False),
+        sa.Column("session_id", sa.String(64), nullable=False),
+        sa.Column("change_seq", sa.BigInteger(), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("report_id"),
+    )
+    op.create_index("ix_report_tombstones_user_change_seq", "report_tombstones", ["user_id", "change_seq"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_report_tombstones_user_change_seq", table_name="report_tombstones")
+    op.drop_table("report_tombstones")
+    op.drop_index("ix_session_reports_user_change_seq", table_name="session_reports")
+    op.drop_column("session_reports", "change_seq")
+    op.drop_column("session_reports", "updated_at")
+    op.drop_column("users", "tombstones_pruned_seq")
+    op.drop_column("users", "change_seq")
@@ -0,0 +1,39 @@
+"""add timeline_archive table and session_reports.timeline_archived
+
+Revision ID: add_timeline_archive
+Revises: add_outbox_tasks
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "add_timeline_archive"
+down_revision: Union[str, Sequence[str], None] = "add_outbox_tasks"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "session_reports",
+        sa.Column("timeline_archived", sa.Boolean(), nullable=False, server_default="false"),
+    )
+    op.create_table(
+        "timeline_archive",
+        sa.Column("report_id", sa.UUID(), nullable=False),
+        sa.Column("codec", sa.String(16), nullable=False),
+        sa.Column("data", sa.LargeBinary(), nullable=False),
+        sa.Column("raw_bytes", sa.Integer(), nullable=False),
+        sa.Column("archived_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["report_id"], ["session_reports.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("report_id"),
+    )
+
+
+def downgrade() -> None:
+    # Rehydrate before dropping the archive: run `python maintenance.py restore-timelines` first.
+    op.drop_table("timeline_archive")
+    op.drop_column("session_reports", "timeline_archived")
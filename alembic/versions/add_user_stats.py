@@ -0,0 +1,41 @@
+"""add user_stats table
+
+Revision ID: add_user_stats
+Revises: add_max_zone_in_score_to_users
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "add_user_stats"
+down_revision: Union[str, Sequence[str], None] = "add_max_zone_in_score_to_users"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_stats",
+        sa.Column("user_id", sa.UUID(), nullable=False),
+        sa.Column("report_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("total_duration_sec", sa.Float(), nullable=False, server_default="0.0"),
+        sa.Column("total_focused_sec", sa.Float(), nullable=False, server_default="0.0"),
+        sa.Column("total_distracted_sec", sa.Float(), nullable=False, server_default="0.0"),
+        sa.Column("total_neutral_sec", sa.Float(), nullable=False, server_default="0.0"),
+        sa.Column("total_snoozed_sec", sa.Float(), nullable=False, server_default="0.0"),
+        sa.Column("zone_in_score_sum", sa.Float(), nullable=False, server_default="0.0"),
+        sa.Column("last_session_date", sa.Date(), nullable=True),
+        sa.Column("current_streak_days", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("longest_streak_days", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+    # Existing users are filled in with: python maintenance.py user-stats
+
+
+def downgrade() -> None:
+    op.drop_table("user_stats")
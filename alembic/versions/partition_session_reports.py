@@ -0,0 +1,94 @@
+"""partition session_reports by started_at month (Postgres, PARTITION_REPORTS=true only)
+
+Revision ID: partition_session_reports
+Revises: add_timeline_archive
+Create Date: 2026-10-19 12:00:00.000000
+
+A no-op on SQLite or when PARTITION_REPORTS is off, so every deployment shares one
+revision history. On Postgres it copies the table into a partitioned one in a single
+transaction (take a maintenance window on large tables). See app/core/partitions.py.
+
+Foreign keys can't reference a partitioned table's id alone, so the upgrade drops the
+ones from reactions, leaderboard_window_entries and timeline_archive (_REFERENCING):
+those rows are no longer removed by the database, only by report deletion
+(app/services/report_deletion.py), and nothing stops a row pointing at a missing report.
+The downgrade restores them, and the unique (user_id, session_id); it refuses to run
+while a session is stored more than once (report_session_keys prevents that for rows
+written after add_report_session_keys).
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+from sqlalchemy import text
+
+from app.core import partitions
+from app.core.config import settings
+
+revision: str = "partition_session_reports"
+down_revision: Union[str, Sequence[str], None] = "add_timeline_archive"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Foreign keys to session_reports.id, restored on downgrade
+_REFERENCING = (
+    ("reactions", "reactions_report_id_fkey"),
+    ("leaderboard_window_entries", "leaderboard_window_entries_report_id_fkey"),
+    ("timeline_archive", "timeline_archive_report_id_fkey"),
+)
+
+
+def _create_indexes() -> None:
+    op.create_index("ix_session_reports_user_id", "session_reports", ["user_id"])
+    op.create_index("ix_session_reports_session_id", "session_reports", ["session_id"])
+    op.create_index("ix_session_reports_published", "session_reports", ["published"])
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if not partitions.wanted(bind.dialect.name) or partitions.is_partitioned(bind):
+        return
+    op.execute("CREATE TABLE session_reports_new (LIKE session_reports INCLUDING DEFAULTS) PARTITION BY RANGE (started_at)")
+    op.execute("ALTER TABLE session_reports_new ADD PRIMARY KEY (id, started_at)")
+
+    oldest = bind.execute(text("SELECT min(started_at) FROM session_reports")).scalar()
+    today = date.today()
+    first = oldest.date() if oldest is not None else today
+    partitions.create_month_partitions(
+        bind, first, partitions.add_months(today, settings.partition_months_ahead), parent="session_reports_new"
+    )
+    op.execute(f"CREATE TABLE {partitions.DEFAULT_PARTITION} PARTITION OF session_reports_new DEFAULT")
+
+    op.execute("INSERT INTO session_reports_new SELECT * FROM session_reports")
+    op.execute("DROP TABLE session_reports CASCADE")  # also drops the foreign keys referencing it
+    op.execute("ALTER TABLE session_reports_new RENAME TO session_reports")
+    op.execute("ALTER TABLE session_reports RENAME CONSTRAINT session_reports_new_pkey TO session_reports_pkey")
+    op.create_unique_constraint("uq_session_reports_user_session", "session_reports", ["user_id", "session_id", "started_at"])
+    op.create_foreign_key(None, "session_reports", "users", ["user_id"], ["id"], ondelete="CASCADE")
+    _create_indexes()
+    # Range reads per user (GET /reports?from=&to=) prune partitions and then use this
+    op.create_index("ix_session_reports_user_started", "session_reports", ["user_id", "started_at"])
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if not partitions.is_partitioned(bind):
+        return
+    duplicated = bind.execute(text(
+        "SELECT count(*) FROM (SELECT 1 FROM session_reports GROUP BY user_id, session_id HAVING count(*) > 1) d"
+    )).scalar()
+    if duplicated:
+        raise RuntimeError(
+            f"{duplicated} sessions are stored more than once (different started_at); "
+            "delete the extra rows before unique (user_id, session_id) can be restored"
+        )
+    op.execute("CREATE TABLE session_reports_old (LIKE session_reports INCLUDING DEFAULTS)")
+    op.execute("INSERT INTO session_reports_old SELECT * FROM session_reports")
+    op.execute("DROP TABLE session_reports CASCADE")  # drops every partition
+    op.execute("ALTER TABLE session_reports_old RENAME TO session_reports")
+    op.create_primary_key("session_reports_pkey", "session_reports", ["id"])
+    op.create_unique_constraint("uq_session_reports_user_session", "session_reports", ["user_id", "session_id"])
+    op.create_foreign_key(None, "session_reports", "users", ["user_id"], ["id"], ondelete="CASCADE")
+    _create_indexes()
+    for table, name in _REFERENCING:
+        op.create_foreign_key(name, table, "session_reports", ["report_id"], ["id"], ondelete="CASCADE")
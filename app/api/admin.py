@@ -0,0 +1,48 @@
+"""Admin-only diagnostics: request profiles and allocation snapshots (needs ADMIN_TOKEN)."""
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app.core import profiling
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(profiling.require_admin)])
+
+
+@router.get("/profiles")
+def list_profiles():
+    """Recent request profiles, newest first (profile a request with `X-Profile: 1` or PROFILE_SAMPLE_RATE)."""
+    return [p.summary() for p in profiling.profiles.list()]
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+def get_profile(profile_id: str):
+    """Collapsed stacks (`frame;frame;frame count` per line) for flamegraph.pl, speedscope or inferno."""
+    profile = profiling.profiles.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(
+        profile.collapsed(),
+        headers={"X-Profile-Samples": str(profile.samples), "X-Profile-Duration-Ms": f"{profile.duration_ms:.1f}"},
+    )
+
+
+@router.post("/tracemalloc/start")
+def tracemalloc_start(frames: int = Query(25, ge=1, le=100, description="Stack frames kept per allocation")):
+    """Start tracing allocations (slows the process down noticeably) and take the baseline snapshot."""
+    return profiling.start_tracemalloc(frames)
+
+
+@router.get("/tracemalloc/snapshot")
+def tracemalloc_snapshot(
+    limit: int = Query(25, ge=1, le=500),
+    group_by: Literal["lineno", "filename", "traceback"] = "lineno",
+    diff: bool = Query(False, description="Growth since /tracemalloc/start instead of current totals"),
+):
+    """Top allocation sites by size."""
+    return profiling.top_allocations(limit, group_by, diff)
+
+
+@router.post("/tracemalloc/stop")
+def tracemalloc_stop():
+    return profiling.stop_tracemalloc()
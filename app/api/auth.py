@@ -7,9 +7,10 @@ from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.core.auth import create_access_token
-from app.core.database import get_db
+from app.core.database import get_db, note_write
 from app.models.user import User
 from app.services.google_oauth import build_authorization_url, fetch_token_and_user, generate_state
+from app.services import user_profiles
 from app.services.oauth_state import check_state, set_state
 from app.services.username import generate_unique_username
 
@@ -51,6 +52,7 @@ async def google_callback(
         # Generate username if user doesn't have one (for existing users)
         if not user.username and name:
             user.username = generate_unique_username(db, name)
+        user_profiles.invalidate_on_commit(db, [user.id])
         db.commit()
         db.refresh(user)
     else:
@@ -61,6 +63,8 @@ async def google_callback(
         db.commit()
         db.refresh(user)
 
+    # The callback is a GET, so track_writes doesn't see it; keep /me on the primary.
+    note_write(user.id)
     token = create_access_token(user.id)
     ui_base = redirect_ui_stored or request.query_params.get("redirect_ui", "http://localhost:5000")
     return RedirectResponse(url=f"{ui_base.rstrip('/')}/signin?token={token}")
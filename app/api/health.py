@@ -1,5 +1,13 @@
-"""Health check."""
-from fastapi import APIRouter
+"""Health check, background task and timeline archive metrics."""
+from typing import Annotated
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.core import profiling
+from app.core.database import get_db
+from app.core.tasks import queue_metrics
+from app.services import timeline_archive
 
 router = APIRouter(tags=["health"])
 
@@ -7,3 +15,15 @@ router = APIRouter(tags=["health"])
 @router.get("/health")
 def health():
     return {"status": "ok"}
+
+
+@router.get("/health/tasks", dependencies=[Depends(profiling.require_admin)])
+def health_tasks(db: Annotated[Session, Depends(get_db)]):
+    """Background task queue depth, lag and outbox backlog (admin: it queries the database)."""
+    return queue_metrics(db)
+
+
+@router.get("/health/archive", dependencies=[Depends(profiling.require_admin)])
+def health_archive(db: Annotated[Session, Depends(get_db)]):
+    """Archived timeline count and bytes reclaimed from session_reports (admin: it scans the archive)."""
+    return timeline_archive.stats(db)
@@ -1,20 +1,27 @@
-"""Leaderboard API (publish, list, react)."""
+"""Leaderboard API (publish, list, react, live stream)."""
 import logging
 from datetime import datetime, timezone
-from typing import Annotated
+from typing import Annotated, Literal
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from sqlalchemy import select, func
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
+from app.core import statements, tasks
 from app.core.auth import get_current_user_id, get_optional_user_id
-from app.core.database import get_db
+from app.core.broadcast import broadcaster
+from app.core.database import get_db, get_read_db
+from app.core.idempotency import IdempotentCall, idempotency
+from app.core.ratelimit import rate_limit
+from app.core.singleflight import coalesce
+from app.models.leaderboard_window_entry import LeaderboardWindowEntry
 from app.models.session_report import SessionReport
-from app.models.reaction import Reaction
 from app.models.user import User
 from app.api.reports import _to_out
+from app.services import leaderboard_events, leaderboard_windows, reactions, report_sync, timeline_archive, user_profiles
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/leaderboard", tags=["leaderboard"])
@@ -49,13 +56,46 @@ class LeaderboardEntry(BaseModel):
     user_reaction: str | None  # emoji that current user reacted with, if any
 
 
+class CompactUser(BaseModel):
+    user_name: str | None
+    user_email: str | None
+    username: str | None
+
+
+class CompactLeaderboardEntry(BaseModel):
+    id: str
+    user_id: str  # key into CompactLeaderboard.users
+    session_id: str
+    started_at: datetime
+    ended_at: datetime
+    duration_sec: float
+    focused_sec: float
+    distracted_sec: float
+    neutral_sec: float
+    snoozed_sec: float
+    zone_in_score: float
+    timeline_buckets_json: str | None = None  # only with include_timeline=true
+    cloud_ai_enabled: bool
+    created_at: datetime
+    is_own_report: bool
+    reactions: dict[str, int]
+    user_reaction: str | None
+
+
+class CompactLeaderboard(BaseModel):
+    """format=compact: each owner's fields once, entries refer to them by user_id."""
+    users: dict[str, CompactUser]
+    entries: list[CompactLeaderboardEntry]
+
+
 class ReactRequest(BaseModel):
     emoji: str = Field(..., min_length=1, max_length=10, description="Emoji string (e.g., '👏', '🔥')")
 
 
 class ReactResponse(BaseModel):
     emoji: str
-    count: int
+    count: int  # reactions with this emoji
+    reactions: dict[str, int]  # emoji -> count, after this change
 
 
 # Allowed emojis
@@ -69,19 +109,20 @@ def publish_report(
     db: Annotated[Session, Depends(get_db)],
 ):
     """Publish a report to the leaderboard."""
-    report = db.execute(
-        select(SessionReport).where(
-            SessionReport.id == report_id,
-            SessionReport.user_id == user_id,
-        )
-    ).scalar_one_or_none()
+    report = db.execute(statements.USER_REPORT, {"report_id": report_id, "user_id": user_id}).scalar_one_or_none()
     
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
     
+    was_published = report.published
     report.published = True
+    if not was_published:
+        report_sync.stamp(db, report)
+    tasks.enqueue(db, "sync_leaderboard_entry", {"report_id": str(report.id)})
     db.commit()
     db.refresh(report)
+    if not was_published:
+        leaderboard_events.report_added(db, report)
     
     logger.info("Report published: report_id=%s user_id=%s", report_id, user_id)
     return {"published": True}
@@ -94,96 +135,180 @@ def unpublish_report(
     db: Annotated[Session, Depends(get_db)],
 ):
     """Unpublish a report from the leaderboard."""
-    report = db.execute(
-        select(SessionReport).where(
-            SessionReport.id == report_id,
-            SessionReport.user_id == user_id,
-        )
-    ).scalar_one_or_none()
+    report = db.execute(statements.USER_REPORT, {"report_id": report_id, "user_id": user_id}).scalar_one_or_none()
     
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
     
+    was_published = report.published
     report.published = False
+    if was_published:
+        report_sync.stamp(db, report)
+    tasks.enqueue(db, "sync_leaderboard_entry", {"report_id": str(report.id)})
     db.commit()
     db.refresh(report)
+    if was_published:
+        leaderboard_events.report_removed(report.id)
     
     logger.info("Report unpublished: report_id=%s user_id=%s", report_id, user_id)
     return {"published": False}
 
 
-@router.get("", response_model=list[LeaderboardEntry])
+@coalesce()
+def _load_leaderboard(
+    db: Session,
+    tz: str | None,
+    window: str | None,
+    distinct_users: bool = False,
+    limit: int | None = None,
+    offset: int = 0,
+) -> list[tuple[dict, UUID, dict]]:
+    """Shared part of the board: (entry fields, owner id, reaction counts) per report, best first.
+
+    With ``distinct_users`` only each user's best report is kept (ROW_NUMBER per user in
+    SQL). ``limit``/``offset`` page the board in SQL. Identical concurrent requests share
+    one computation; per-user fields are added by the caller.
+    """
+    if window:
+        # Windowed boards read only the precomputed entries for the window's day buckets
+        score, created = LeaderboardWindowEntry.zone_in_score, LeaderboardWindowEntry.created_at
+        query = (
+            select(*statements.REPORT_COLUMNS)
+            .join(LeaderboardWindowEntry, LeaderboardWindowEntry.report_id == SessionReport.id)
+            .where(SessionReport.published.is_(True), *leaderboard_windows.window_conditions(window, tz))
+        )
+        if distinct_users:
+            rank = func.row_number().over(partition_by=LeaderboardWindowEntry.user_id, order_by=(score.desc(), created.desc()))
+            ranked = query.add_columns(rank.label("user_rank")).subquery("ranked")
+            query = (
+                select(*(ranked.c[c.name] for c in statements.REPORT_COLUMNS))
+                .where(ranked.c.user_rank == 1)
+                .order_by(ranked.c.zone_in_score.desc(), ranked.c.created_at.desc())
+            )
+        else:
+            query = query.order_by(score.desc(), created.desc())
+    elif distinct_users:
+        query = statements.BEST_PUBLISHED_PER_USER
+    else:
+        # All published reports, ordered by zone_in_score descending
+        query = statements.PUBLISHED_REPORTS
+    if limit is not None or offset:
+        query = query.limit(limit).offset(offset)
+    
+    results = db.execute(query).all()  # Core rows, not ORM instances
+    # Owners' names from the profile cache rather than a join per report
+    profiles = user_profiles.get_many(db, {report.user_id for report in results})
+    
+    # Reaction counts per report and emoji for these reports
+    report_ids = [r.id for r in results]
+    reaction_counts: dict[UUID, dict[str, int]] = {}
+    for report_id, emoji, count in db.execute(statements.REACTION_COUNTS, {"report_ids": report_ids}):
+        reaction_counts.setdefault(report_id, {})[emoji] = count
+    
+    out, pairs = [], []
+    for report in results:
+        profile = profiles.get(report.user_id)
+        if profile is None:  # owner no longer exists
+            continue
+        fields = {**_to_out(report, tz), "user_name": profile.name, "user_email": profile.email, "username": profile.username}
+        out.append((fields, report.user_id, reaction_counts.get(report.id, {})))
+        pairs.append((report, fields))
+    timeline_archive.fill(db, pairs)
+    return out
+
+
+_USER_FIELDS = ("user_name", "user_email", "username")
+DISTINCT_PAGE_SIZE = 100  # default page for distinct_users=true, which is always paginated
+
+
+@router.get(
+    "",
+    response_model=list[LeaderboardEntry] | CompactLeaderboard,
+    response_model_exclude_unset=True,
+    dependencies=[Depends(rate_limit("leaderboard:read"))],
+)
 def get_leaderboard(
     user_id: Annotated[UUID | None, Depends(get_optional_user_id)],
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[Session, Depends(get_read_db)],
     tz: str | None = Query(None, alias="timezone", description="IANA timezone e.g. America/New_York"),
+    window: Literal["day", "week", "month"] | None = Query(None, description="Only sessions started in the current local day/week (Monday-based)/month; all-time if omitted"),
+    format: Literal["full", "compact"] = Query("full", description="compact: {users, entries} with each owner listed once and no timelines"),
+    include_timeline: bool = Query(False, description="With format=compact, include timeline_buckets_json"),
+    distinct_users: bool = Query(False, description="Only each user's best report"),
+    limit: int | None = Query(None, ge=1, le=1000, description=f"Page size; all reports if omitted ({DISTINCT_PAGE_SIZE} with distinct_users)"),
+    offset: int = Query(0, ge=0),
 ):
     """Get leaderboard of published reports, sorted by zone_in_score descending. Works without authentication."""
-    # Get all published reports with user info, ordered by zone_in_score descending
-    query = (
-        select(SessionReport, User.name, User.email, User.username)
-        .join(User, SessionReport.user_id == User.id)
-        .where(SessionReport.published == True)
-        .order_by(SessionReport.zone_in_score.desc(), SessionReport.created_at.desc())
-    )
+    if distinct_users and limit is None:
+        limit = DISTINCT_PAGE_SIZE
+    rows = _load_leaderboard(db, tz, window, distinct_users, limit, offset)
     
-    results = db.execute(query).all()
+    # Current user's reactions (only if authenticated)
+    user_reactions: dict[UUID, str] = {}
+    if user_id is not None and rows:
+        report_ids = [UUID(fields["id"]) for fields, _, _ in rows]
+        user_reactions = dict(db.execute(statements.USER_REACTIONS, {"user_id": user_id, "report_ids": report_ids}).all())
     
-    # Get all reactions for these reports
-    report_ids = [r[0].id for r in results]
-    reactions_query = select(Reaction).where(Reaction.report_id.in_(report_ids))
-    all_reactions = db.execute(reactions_query).scalars().all()
-    
-    # Group reactions by report_id and emoji
-    reactions_by_report: dict[UUID, dict[str, list[UUID]]] = {}
-    for reaction in all_reactions:
-        if reaction.report_id not in reactions_by_report:
-            reactions_by_report[reaction.report_id] = {}
-        if reaction.emoji not in reactions_by_report[reaction.report_id]:
-            reactions_by_report[reaction.report_id][reaction.emoji] = []
-        reactions_by_report[reaction.report_id][reaction.emoji].append(reaction.user_id)
+    if format == "compact":
+        return _compact(rows, user_id, user_reactions, include_timeline)
     
     # Build response
     entries = []
-    for report, user_name, user_email, username in results:
-        # Check if this is the current user's report (only if authenticated)
-        is_own_report = user_id is not None and report.user_id == user_id
-        
-        # Get reaction counts for this report
-        report_reactions = reactions_by_report.get(report.id, {})
-        reaction_counts = {emoji: len(user_ids) for emoji, user_ids in report_reactions.items()}
-        
-        # Get current user's reaction (only if authenticated)
-        user_reaction = None
-        if user_id is not None:
-            for emoji, user_ids in report_reactions.items():
-                if user_id in user_ids:
-                    user_reaction = emoji
-                    break
-        
-        report_dict = _to_out(report, tz)
+    for fields, owner_id, reaction_counts in rows:
         entries.append(LeaderboardEntry(
-            **report_dict,
-            user_name=user_name,
-            user_email=user_email,
-            username=username,
-            is_own_report=is_own_report,
+            **fields,
+            is_own_report=user_id is not None and owner_id == user_id,
             reactions=reaction_counts,
-            user_reaction=user_reaction,
+            user_reaction=user_reactions.get(UUID(fields["id"])),
         ))
     
-    logger.info("GET /leaderboard -> %d entries", len(entries))
+    logger.info("GET /leaderboard window=%s distinct_users=%s offset=%d -> %d entries", window, distinct_users, offset, len(entries))
     return entries
 
 
-@router.post("/reports/{report_id}/react", response_model=ReactResponse)
+def _compact(rows: list[tuple[dict, UUID, dict]], user_id: UUID | None, user_reactions: dict[UUID, str], include_timeline: bool) -> CompactLeaderboard:
+    users: dict[str, CompactUser] = {}
+    entries = []
+    for fields, owner_id, reaction_counts in rows:
+        owner = str(owner_id)
+        if owner not in users:
+            users[owner] = CompactUser(**{k: fields[k] for k in _USER_FIELDS})
+        entry = {k: v for k, v in fields.items() if k not in _USER_FIELDS and k != "published"}
+        if not include_timeline:
+            del entry["timeline_buckets_json"]  # left unset, so omitted from the response
+        entries.append(CompactLeaderboardEntry(
+            **entry,
+            user_id=owner,
+            is_own_report=user_id is not None and owner_id == user_id,
+            reactions=reaction_counts,
+            user_reaction=user_reactions.get(UUID(fields["id"])),
+        ))
+    logger.info("GET /leaderboard format=compact -> %d entries, %d users", len(entries), len(users))
+    return CompactLeaderboard(users=users, entries=entries)
+
+
+@router.get("/stream")
+async def stream_leaderboard(request: Request):
+    """Server-Sent Events with leaderboard deltas (added, removed, rank, reactions); see
+    app/services/leaderboard_events.py. On a `dropped` event, refetch GET /leaderboard and reconnect."""
+    if broadcaster.full:
+        raise HTTPException(status_code=503, detail="Too many stream subscribers", headers={"Retry-After": "5"})
+    return StreamingResponse(
+        broadcaster.stream(request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/reports/{report_id}/react", response_model=ReactResponse, dependencies=[Depends(rate_limit("leaderboard:react", require_user=True))])
 def react_to_report(
     report_id: UUID,
     body: ReactRequest,
     user_id: Annotated[UUID, Depends(get_current_user_id)],
     db: Annotated[Session, Depends(get_db)],
+    idem: Annotated[IdempotentCall | None, Depends(idempotency)],
 ):
-    """Add or update a reaction to a published report. Users can only react once per report."""
+    """Add or update a reaction to a published report (one per user); returns the report's live counts."""
     # Validate emoji
     if body.emoji not in ALLOWED_EMOJIS:
         raise HTTPException(
@@ -191,74 +316,37 @@ def react_to_report(
             detail=f"Emoji must be one of: {', '.join(ALLOWED_EMOJIS)}"
         )
     
-    # Check if report exists and is published
-    report = db.execute(
-        select(SessionReport).where(SessionReport.id == report_id)
-    ).scalar_one_or_none()
-    
-    if not report:
-        raise HTTPException(status_code=404, detail="Report not found")
-    
-    if not report.published:
+    counts = reactions.set_reaction(db, user_id, report_id, body.emoji)
+    if counts is None:
+        # Not written: tell a missing report from an unpublished one
+        exists = db.execute(select(SessionReport.id).where(SessionReport.id == report_id)).first()
+        if not exists:
+            raise HTTPException(status_code=404, detail="Report not found")
         raise HTTPException(status_code=400, detail="Report is not published")
     
-    # Check if user already reacted
-    existing_reaction = db.execute(
-        select(Reaction).where(
-            Reaction.user_id == user_id,
-            Reaction.report_id == report_id,
-        )
-    ).scalar_one_or_none()
-    
-    if existing_reaction:
-        # Update existing reaction
-        existing_reaction.emoji = body.emoji
-        db.commit()
-        db.refresh(existing_reaction)
-    else:
-        # Create new reaction
-        reaction = Reaction(
-            user_id=user_id,
-            report_id=report_id,
-            emoji=body.emoji,
-        )
-        db.add(reaction)
-        db.commit()
-        db.refresh(reaction)
-    
-    # Get count of reactions with this emoji for this report
-    count = db.execute(
-        select(func.count(Reaction.id))
-        .where(Reaction.report_id == report_id, Reaction.emoji == body.emoji)
-    ).scalar_one()
-    
+    leaderboard_events.reactions_changed(report_id, counts)
     logger.info("Reaction added/updated: report_id=%s user_id=%s emoji=%s count=%d", 
-                report_id, user_id, body.emoji, count)
-    return ReactResponse(emoji=body.emoji, count=count)
+                report_id, user_id, body.emoji, counts[body.emoji])
+    out = ReactResponse(emoji=body.emoji, count=counts[body.emoji], reactions=counts)
+    return idem.complete(out) if idem else out
 
 
-@router.delete("/reports/{report_id}/react")
+@router.delete("/reports/{report_id}/react", dependencies=[Depends(rate_limit("leaderboard:react", require_user=True))])
 def remove_reaction(
     report_id: UUID,
     user_id: Annotated[UUID, Depends(get_current_user_id)],
     db: Annotated[Session, Depends(get_db)],
+    idem: Annotated[IdempotentCall | None, Depends(idempotency)],
 ):
-    """Remove user's reaction from a report."""
-    reaction = db.execute(
-        select(Reaction).where(
-            Reaction.user_id == user_id,
-            Reaction.report_id == report_id,
-        )
-    ).scalar_one_or_none()
-    
-    if not reaction:
+    """Remove user's reaction from a report; returns the remaining counts."""
+    counts = reactions.clear_reaction(db, user_id, report_id)
+    if counts is None:
         raise HTTPException(status_code=404, detail="Reaction not found")
     
-    db.delete(reaction)
-    db.commit()
-    
+    leaderboard_events.reactions_changed(report_id, counts)
     logger.info("Reaction removed: report_id=%s user_id=%s", report_id, user_id)
-    return {"removed": True}
+    out = {"removed": True, "reactions": counts}
+    return idem.complete(out) if idem else out
 
 
 class LifetimeLeaderboardEntry(BaseModel):
@@ -272,34 +360,37 @@ class LifetimeLeaderboardEntry(BaseModel):
     is_own_profile: bool  # Whether this is the current user's profile
 
 
-@router.get("/lifetime", response_model=list[LifetimeLeaderboardEntry])
-def get_lifetime_leaderboard(
-    user_id: Annotated[UUID | None, Depends(get_optional_user_id)],
-    db: Annotated[Session, Depends(get_db)],
-):
-    """Get leaderboard of users sorted by their lifetime maximum ZoneIn score. Works without authentication."""
-    # Get all users with max_zone_in_score, ordered by max_zone_in_score descending
+@coalesce()
+def _load_lifetime_leaderboard(db: Session) -> list[dict]:
+    """Users by lifetime max score; shared between identical concurrent requests."""
     query = (
-        select(User)
+        select(User.id, User.name, User.email, User.username, User.max_zone_in_score)
         .where(User.max_zone_in_score.isnot(None))
         .order_by(User.max_zone_in_score.desc(), User.created_at.asc())
     )
-    
-    users = db.execute(query).scalars().all()
-    
-    # Build response
-    entries = []
-    for user in users:
-        is_own_profile = user_id is not None and user.id == user_id
-        
-        entries.append(LifetimeLeaderboardEntry(
-            user_id=str(user.id),
-            user_name=user.name,
-            user_email=user.email,
-            username=user.username,
-            max_zone_in_score=user.max_zone_in_score,
-            is_own_profile=is_own_profile,
-        ))
+    return [
+        {
+            "user_id": str(uid),
+            "user_name": name,
+            "user_email": email,
+            "username": username,
+            "max_zone_in_score": max_score,
+        }
+        for uid, name, email, username, max_score in db.execute(query)
+    ]
+
+
+@router.get("/lifetime", response_model=list[LifetimeLeaderboardEntry], dependencies=[Depends(rate_limit("leaderboard:read"))])
+def get_lifetime_leaderboard(
+    user_id: Annotated[UUID | None, Depends(get_optional_user_id)],
+    db: Annotated[Session, Depends(get_read_db)],
+):
+    """Get leaderboard of users sorted by their lifetime maximum ZoneIn score. Works without authentication."""
+    own_id = str(user_id) if user_id is not None else None
+    entries = [
+        LifetimeLeaderboardEntry(**fields, is_own_profile=fields["user_id"] == own_id)
+        for fields in _load_lifetime_leaderboard(db)
+    ]
     
     logger.info("GET /leaderboard/lifetime -> %d entries", len(entries))
     return entries
@@ -1,24 +1,41 @@
-"""Authenticated /me."""
+"""Authenticated /me and /me/stats."""
+from datetime import date
 from typing import Annotated
 from uuid import UUID
 
 from fastapi import APIRouter, Depends
-from sqlalchemy import select
+from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
 from app.core.auth import get_current_user_id
-from app.core.database import get_db
-from app.models.user import User
+from app.core.database import get_read_db
+from app.models.user_stats import UserStats
+from app.services import user_profiles
+from app.services.user_stats import current_streak
 
 router = APIRouter(tags=["me"])
 
 
+class UserStatsOut(BaseModel):
+    report_count: int
+    total_duration_sec: float
+    total_focused_sec: float
+    total_distracted_sec: float
+    total_neutral_sec: float
+    total_snoozed_sec: float
+    average_zone_in_score: float | None
+    average_duration_sec: float | None
+    last_session_date: date | None  # UTC
+    current_streak_days: int  # 0 if the last session was before yesterday (UTC)
+    longest_streak_days: int
+
+
 @router.get("/me")
 def me(
     user_id: Annotated[UUID, Depends(get_current_user_id)],
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[Session, Depends(get_read_db)],
 ):
-    user = db.execute(select(User).where(User.id == user_id)).scalar_one_or_none()
+    user = user_profiles.get(db, user_id)
     if not user:
         return {"id": str(user_id), "email": None, "name": None, "username": None}
     return {
@@ -27,3 +44,39 @@ def me(
         "name": user.name,
         "username": user.username,
     }
+
+
+@router.get("/me/stats", response_model=UserStatsOut)
+def my_stats(
+    user_id: Annotated[UUID, Depends(get_current_user_id)],
+    db: Annotated[Session, Depends(get_read_db)],
+):
+    """Dashboard totals, averages and streaks, read from the incrementally maintained user_stats row."""
+    stats = db.get(UserStats, user_id)
+    if not stats or not stats.report_count:
+        return UserStatsOut(
+            report_count=0,
+            total_duration_sec=0.0,
+            total_focused_sec=0.0,
+            total_distracted_sec=0.0,
+            total_neutral_sec=0.0,
+            total_snoozed_sec=0.0,
+            average_zone_in_score=None,
+            average_duration_sec=None,
+            last_session_date=None,
+            current_streak_days=0,
+            longest_streak_days=0,
+        )
+    return UserStatsOut(
+        report_count=stats.report_count,
+        total_duration_sec=stats.total_duration_sec,
+        total_focused_sec=stats.total_focused_sec,
+        total_distracted_sec=stats.total_distracted_sec,
+        total_neutral_sec=stats.total_neutral_sec,
+        total_snoozed_sec=stats.total_snoozed_sec,
+        average_zone_in_score=stats.zone_in_score_sum / stats.report_count,
+        average_duration_sec=stats.total_duration_sec / stats.report_count,
+        last_session_date=stats.last_session_date,
+        current_streak_days=current_streak(stats),
+        longest_streak_days=stats.longest_streak_days,
+    )
@@ -1,20 +1,30 @@
-"""Session reports API (create, list, get, delete)."""
+"""Session reports API (create, list, sync, import, export, get, timeline, heatmap, delete)."""
 import json
 import logging
+import uuid
 from datetime import date, datetime, timedelta, timezone
-from typing import Annotated
+from typing import Annotated, Iterator, Literal
 from uuid import UUID
 from zoneinfo import ZoneInfo
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from sqlalchemy import delete, select
-from sqlalchemy.orm import Session
+from sqlalchemy import null, select
+from sqlalchemy.orm import Session, sessionmaker
 
+from app.core import partitions, statements, tasks
 from app.core.auth import get_current_user_id
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_db, get_read_db
+from app.core.idempotency import IdempotentCall, idempotency
+from app.core.ratelimit import rate_limit
+from app.core.singleflight import coalesce
 from app.models.session_report import SessionReport
-from app.models.user import User
+from app.services import heatmap, leaderboard_events, report_deletion, report_export, report_import, report_sync, session_keys, timeline, timeline_archive
+from app.services.report_tasks import snapshot_payload
+from app.services.user_stats import ReportSnapshot
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/reports", tags=["reports"])
@@ -59,15 +69,79 @@ class ReportOut(BaseModel):
     created_at: datetime
 
 
-def _update_user_max_score(db: Session, user_id: UUID, new_score: float) -> None:
-    """Update user's max_zone_in_score if the new score is higher."""
-    user = db.execute(select(User).where(User.id == user_id)).scalar_one_or_none()
-    if user:
-        old_score = user.max_zone_in_score
-        if user.max_zone_in_score is None or new_score > user.max_zone_in_score:
-            user.max_zone_in_score = new_score
-            db.commit()
-            logger.info("Updated max_zone_in_score for user_id=%s: %s -> %s", user_id, old_score, new_score)
+class TimelineSegment(BaseModel):
+    start_ts: float
+    state: str | None  # majority state; None if nothing was recorded in the segment
+    focused: float  # fraction of the segment
+    distracted: float
+    neutral: float
+    snoozed: float
+
+
+class TimelineOut(BaseModel):
+    report_id: str
+    points: int
+    start_ts: float | None
+    segment_duration_sec: float
+    segments: list[TimelineSegment]
+
+
+class ImportErrorOut(BaseModel):
+    line: int
+    error: str
+
+
+class ImportResultOut(BaseModel):
+    received: int
+    imported: int
+    failed: int
+    errors: list[ImportErrorOut]  # first report_import.MAX_ERRORS failures
+
+
+class HeatmapOut(BaseModel):
+    """Seconds per state; each matrix is 7 rows (weekdays, Monday first) x 24 local hours."""
+    weekdays: list[str]
+    focused: list[list[float]]
+    distracted: list[list[float]]
+    neutral: list[list[float]]
+    snoozed: list[list[float]]
+
+
+class DeletedReportOut(BaseModel):
+    id: str
+    session_id: str
+
+
+class ReportChangesOut(BaseModel):
+    changes: list[ReportOut]  # created or updated since the token, oldest change first
+    deleted: list[DeletedReportOut]
+    token: str  # pass as since= next time
+    has_more: bool  # call again with the new token right away
+    reset: bool  # the token is too old: drop local state and sync again without since=
+
+
+class DeletionJobOut(BaseModel):
+    job_id: str
+    status: str
+    deleted: int
+    error: str | None = None
+
+
+def _enqueue_derived_updates(db: Session, report: SessionReport, old: ReportSnapshot | None) -> None:
+    """Queue max-score, stats and leaderboard maintenance in the report's transaction."""
+    tasks.enqueue(db, "update_max_score", {"user_id": str(report.user_id), "score": report.zone_in_score})
+    tasks.enqueue(db, "apply_user_stats", {
+        "user_id": str(report.user_id),
+        "report_id": str(report.id),
+        "old": snapshot_payload(old),
+        "new": snapshot_payload(ReportSnapshot.of(report)),
+    })
+    if report.published:
+        tasks.enqueue(db, "sync_leaderboard_entry", {"report_id": str(report.id)})
+
+
+def _log_struct(label: str, out: dict) -> None:
+    logger.info("POST /reports %s struct: %s", label, json.dumps(out, default=str))
 
 
 def _to_out(r: SessionReport, tz_str: str | None = None) -> dict:
@@ -113,13 +187,15 @@ def _to_out(r: SessionReport, tz_str: str | None = None) -> dict:
     }
 
 
-@router.post("", response_model=ReportOut)
+@router.post("", response_model=ReportOut, dependencies=[Depends(rate_limit("reports:create", require_user=True))])
 def create_report(
     body: ReportCreate,
     user_id: Annotated[UUID, Depends(get_current_user_id)],
     db: Annotated[Session, Depends(get_db)],
+    idem: Annotated[IdempotentCall | None, Depends(idempotency)],
     tz: str | None = Query(None, alias="timezone", description="IANA timezone e.g. America/New_York; convert response datetimes to this timezone"),
 ):
+    """Create or update (by session_id) a report. With an Idempotency-Key header, retries replay the first response."""
     # Ensure datetimes are timezone-aware and convert to UTC for storage
     started_at = body.started_at
     ended_at = body.ended_at
@@ -136,14 +212,17 @@ def create_report(
     else:
         ended_at = ended_at.astimezone(timezone.utc)
     
-    existing = db.execute(
-        select(SessionReport).where(
-            SessionReport.user_id == user_id,
-            SessionReport.session_id == body.session_id,
-        )
-    ).scalar_one_or_none()
+    new_id = uuid.uuid4()
+    if settings.partition_reports:
+        # The partitioned table only enforces (user_id, session_id, started_at): the session
+        # key row decides which report is this session's (app/services/session_keys.py)
+        owner = session_keys.claim(db, user_id, {body.session_id: new_id})[body.session_id]
+        existing = db.get(SessionReport, owner) if owner != new_id else None
+    else:
+        existing = db.execute(statements.REPORT_BY_SESSION, {"user_id": user_id, "session_id": body.session_id}).scalar_one_or_none()
 
     if existing:
+        old_snapshot = ReportSnapshot.of(existing)
         existing.started_at = started_at
         existing.ended_at = ended_at
         existing.duration_sec = body.duration_sec
@@ -153,17 +232,24 @@ def create_report(
         existing.snoozed_sec = body.snoozed_sec
         existing.zone_in_score = body.zone_in_score
         existing.timeline_buckets_json = body.timeline_buckets_json
+        if existing.timeline_archived:
+            existing.timeline_archived = False
+            timeline_archive.discard(db, [existing.id])
         existing.cloud_ai_enabled = body.cloud_ai_enabled
+        report_sync.stamp(db, existing)
+        _enqueue_derived_updates(db, existing, old_snapshot)
         db.commit()
+        heatmap.invalidate(user_id)
         db.refresh(existing)
-        # Update user's max_zone_in_score
-        _update_user_max_score(db, user_id, body.zone_in_score)
+        if existing.published and existing.zone_in_score != old_snapshot.zone_in_score:
+            leaderboard_events.rank_changed(db, existing)
         out = _to_out(existing, tz)
         logger.info("Report updated: session_id=%s user_id=%s", body.session_id, user_id)
-        logger.info("POST /reports upsert struct: %s", json.dumps(out, default=str))
-        return out
+        tasks.defer(_log_struct, "upsert", out)
+        return idem.complete(out) if idem else out
 
     r = SessionReport(
+        id=new_id,
         user_id=user_id,
         session_id=body.session_id,
         started_at=started_at,
@@ -177,15 +263,17 @@ def create_report(
         timeline_buckets_json=body.timeline_buckets_json,
         cloud_ai_enabled=body.cloud_ai_enabled,
     )
+    report_sync.stamp(db, r)
     db.add(r)
+    db.flush()
+    _enqueue_derived_updates(db, r, None)
     db.commit()
+    heatmap.invalidate(user_id)
     db.refresh(r)
-    # Update user's max_zone_in_score
-    _update_user_max_score(db, user_id, body.zone_in_score)
     out = _to_out(r, tz)
     logger.info("Report created: session_id=%s user_id=%s id=%s", body.session_id, user_id, r.id)
-    logger.info("POST /reports create struct: %s", json.dumps(out, default=str))
-    return out
+    tasks.defer(_log_struct, "create", out)
+    return idem.complete(out) if idem else out
 
 
 def _parse_date_range(
@@ -207,23 +295,34 @@ def _parse_date_range(
     return from_dt, to_dt
 
 
+@coalesce()
+def _load_reports(
+    db: Session,
+    user_id: UUID,
+    from_date: date | None,
+    to_date: date | None,
+    tz: str | None,
+) -> list[dict]:
+    """A user's reports in a date range; identical concurrent requests (client retries) share one query."""
+    q = select(*statements.REPORT_COLUMNS).where(SessionReport.user_id == user_id)
+    from_dt, to_dt = _parse_date_range(from_date, to_date, tz)
+    q = q.where(*partitions.report_range_conditions(from_dt, to_dt))
+    q = q.order_by(SessionReport.started_at.desc())
+    rows = db.execute(q).all()  # Core rows: no ORM instances for a read-only list
+    out = [_to_out(r, tz) for r in rows]
+    timeline_archive.fill(db, zip(rows, out))
+    return out
+
+
 @router.get("", response_model=list[ReportOut])
 def list_reports(
     user_id: Annotated[UUID, Depends(get_current_user_id)],
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[Session, Depends(get_read_db)],
     from_date: date | None = Query(None, alias="from"),
     to_date: date | None = Query(None, alias="to"),
     tz: str | None = Query(None, alias="timezone", description="IANA timezone e.g. America/New_York; from/to are local dates, response datetimes converted to this timezone"),
 ):
-    q = select(SessionReport).where(SessionReport.user_id == user_id)
-    from_dt, to_dt = _parse_date_range(from_date, to_date, tz)
-    if from_dt is not None:
-        q = q.where(SessionReport.ended_at >= from_dt)
-    if to_dt is not None:
-        q = q.where(SessionReport.started_at < to_dt)
-    q = q.order_by(SessionReport.started_at.desc())
-    rows = db.execute(q).scalars().all()
-    out = [_to_out(r, tz) for r in rows]
+    out = _load_reports(db, user_id, from_date, to_date, tz)
     logger.info(
         "GET /reports from=%s to=%s timezone=%s -> %d reports",
         from_date,
@@ -234,32 +333,219 @@ def list_reports(
     return out
 
 
-@router.delete("", response_model=dict)
+@router.get("/changes", response_model=ReportChangesOut)
+def list_report_changes(
+    user_id: Annotated[UUID, Depends(get_current_user_id)],
+    db: Annotated[Session, Depends(get_read_db)],
+    since: str | None = Query(None, description="Change token from the previous call; omit for a full sync"),
+    limit: int = Query(500, ge=1, le=1000),
+    tz: str | None = Query(None, alias="timezone", description="IANA timezone e.g. America/New_York; convert response datetimes to this timezone"),
+):
+    """Reports created, updated (including publish/unpublish) or deleted since a change token."""
+    try:
+        since_seq = report_sync.parse_token(since)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    result = report_sync.changes_since(db, user_id, since_seq, limit)
+    out = [_to_out(r, tz) for r in result.reports]
+    timeline_archive.fill(db, zip(result.reports, out))
+    logger.info(
+        "GET /reports/changes since=%s -> %d changed, %d deleted, token=%s%s",
+        since, len(out), len(result.deleted), result.token, " (reset)" if result.reset else "",
+    )
+    return {
+        "changes": out,
+        "deleted": [{"id": str(t.report_id), "session_id": t.session_id} for t in result.deleted],
+        "token": str(result.token),
+        "has_more": result.has_more,
+        "reset": result.reset,
+    }
+
+
+async def _iter_lines(request: Request, max_bytes: int):
+    """Decoded lines of the request body, read as it streams in. A line longer than max_bytes
+    comes out as None; its bytes are dropped as they arrive rather than buffered."""
+    tail = b""
+    skipping = False  # inside an overlong line
+    async for chunk in request.stream():
+        tail += chunk
+        *lines, tail = tail.split(b"\n")
+        for line in lines:
+            if skipping or len(line) > max_bytes:
+                skipping = False
+                yield None
+            else:
+                yield line.decode("utf-8-sig").rstrip("\r")
+        if len(tail) > max_bytes:
+            tail, skipping = b"", True
+    if skipping:
+        yield None
+    elif tail:
+        yield tail.decode("utf-8-sig").rstrip("\r")
+
+
+@router.post("/import", response_model=ImportResultOut)
+async def import_reports(
+    request: Request,
+    user_id: Annotated[UUID, Depends(get_current_user_id)],
+    db: Annotated[Session, Depends(get_db)],
+    import_format: Literal["ndjson", "csv"] | None = Query(None, alias="format", description="Defaults from Content-Type (text/csv -> csv, else ndjson)"),
+):
+    """Upsert reports from a streamed NDJSON or CSV body (e.g. a GET /reports/export file), one record per line."""
+    fmt = import_format or ("csv" if request.headers.get("content-type", "").startswith("text/csv") else "ndjson")
+    importer = report_import.ReportImporter(db, user_id, ReportCreate)
+    csv_rows = report_import.CsvRows()
+    line_no = 0
+    async for line in _iter_lines(request, settings.import_max_line_bytes):
+        line_no += 1
+        if line is None:
+            importer.result.received += 1
+            importer.result.fail(line_no, f"line longer than {settings.import_max_line_bytes} bytes")
+            continue
+        try:
+            row = report_import.parse_row(fmt, csv_rows, line)
+        except ValueError as e:
+            importer.result.received += 1
+            importer.result.fail(line_no, f"unparseable {fmt}: {e}")
+            continue
+        if row is None:
+            continue
+        importer.add(line_no, row)
+        if importer.pending >= settings.import_batch_size:
+            await run_in_threadpool(importer.flush)
+    result = await run_in_threadpool(importer.finish)
+    logger.info("POST /reports/import format=%s user_id=%s -> %d imported, %d failed", fmt, user_id, result.imported, result.failed)
+    return result.__dict__
+
+
+def _iter_export_rows(
+    session_factory: sessionmaker,
+    user_id: UUID,
+    from_dt: datetime | None,
+    to_dt: datetime | None,
+    tz: str | None,
+    include_timeline: bool,
+) -> Iterator[dict]:
+    """Stream the user's reports oldest first, yield_per rows at a time (a server-side cursor on Postgres)."""
+    cols = [
+        c if include_timeline or c.name != "timeline_buckets_json" else null().label(c.name)
+        for c in SessionReport.__table__.c
+    ]
+    q = select(*cols).where(SessionReport.user_id == user_id)
+    q = q.where(*partitions.report_range_conditions(from_dt, to_dt))
+    q = q.order_by(SessionReport.started_at, SessionReport.id).execution_options(yield_per=500)
+    with session_factory() as db:
+        for rows in db.execute(q).partitions():
+            out = [_to_out(row, tz) for row in rows]
+            if include_timeline:
+                timeline_archive.fill(db, zip(rows, out))
+            yield from out
+
+
+@router.get("/export")
+def export_reports(
+    user_id: Annotated[UUID, Depends(get_current_user_id)],
+    db: Annotated[Session, Depends(get_read_db)],
+    export_format: Literal["ndjson", "csv", "parquet"] = Query("ndjson", alias="format"),
+    include_timeline: bool = Query(False, description="Include timeline buckets (decoded in NDJSON, a JSON string column in CSV/Parquet)"),
+    from_date: date | None = Query(None, alias="from"),
+    to_date: date | None = Query(None, alias="to"),
+    tz: str | None = Query(None, alias="timezone", description="IANA timezone e.g. America/New_York; from/to are local dates, datetimes converted to this timezone"),
+):
+    """Download all of the user's reports as a stream (constant memory regardless of count)."""
+    if export_format == "parquet" and not report_export.parquet_available():
+        raise HTTPException(status_code=501, detail="Parquet export requires pyarrow on the server")
+    from_dt, to_dt = _parse_date_range(from_date, to_date, tz)
+    # The request session is closed before the body is streamed, so the stream opens its own.
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=db.get_bind())
+    rows = _iter_export_rows(session_factory, user_id, from_dt, to_dt, tz, include_timeline)
+    logger.info("GET /reports/export format=%s include_timeline=%s user_id=%s", export_format, include_timeline, user_id)
+    return StreamingResponse(
+        report_export.SERIALIZERS[export_format](rows, include_timeline),
+        media_type=report_export.FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="zonein-reports.{export_format}"'},
+    )
+
+
+@router.get("/heatmap", response_model=HeatmapOut)
+def get_heatmap(
+    user_id: Annotated[UUID, Depends(get_current_user_id)],
+    db: Annotated[Session, Depends(get_read_db)],
+    from_date: date | None = Query(None, alias="from"),
+    to_date: date | None = Query(None, alias="to"),
+    tz: str | None = Query(None, alias="timezone", description="IANA timezone e.g. America/New_York; from/to are local dates and slots are local hours"),
+):
+    """Hour-of-week heatmap of the user's timelines (cached until their reports change)."""
+    if tz and heatmap.resolve_tz(tz) is timezone.utc:
+        tz = None  # invalid (logged); fall back to UTC like the other endpoints
+    from_dt, to_dt = _parse_date_range(from_date, to_date, tz)
+    out = heatmap.user_heatmap(db, user_id, from_dt, to_dt, tz)
+    logger.info("GET /reports/heatmap from=%s to=%s timezone=%s", from_date, to_date, tz)
+    return out
+
+
+@router.delete("", response_model=DeletionJobOut, status_code=202)
 def delete_all_reports(
     user_id: Annotated[UUID, Depends(get_current_user_id)],
     db: Annotated[Session, Depends(get_db)],
+    background_tasks: BackgroundTasks,
 ):
-    """Delete all reports for the current user."""
-    result = db.execute(delete(SessionReport).where(SessionReport.user_id == user_id))
-    db.commit()
-    n = result.rowcount
-    logger.info("DELETE /reports user_id=%s -> %d deleted", user_id, n)
-    return {"deleted": n}
+    """Delete all reports for the current user in the background; poll /reports/deletions/{job_id}."""
+    job = report_deletion.create_job(user_id)
+    # The request session is closed once the response is sent, so the job gets its own.
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=db.get_bind())
+    background_tasks.add_task(report_deletion.run_job, job.id, session_factory, settings.delete_chunk_size)
+    logger.info("DELETE /reports user_id=%s -> job %s scheduled", user_id, job.id)
+    return _job_out(job)
+
+
+@router.get("/deletions/{job_id}", response_model=DeletionJobOut)
+def get_deletion_job(
+    job_id: str,
+    user_id: Annotated[UUID, Depends(get_current_user_id)],
+):
+    job = report_deletion.get_job(job_id)
+    if not job or job.user_id != user_id:
+        raise HTTPException(status_code=404, detail="Deletion job not found")
+    return _job_out(job)
+
+
+def _job_out(job: report_deletion.DeletionJob) -> dict:
+    return {"job_id": job.id, "status": job.status, "deleted": job.deleted, "error": job.error}
 
 
 @router.get("/{report_id}", response_model=ReportOut)
 def get_report(
     report_id: UUID,
     user_id: Annotated[UUID, Depends(get_current_user_id)],
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[Session, Depends(get_read_db)],
     tz: str | None = Query(None, alias="timezone", description="IANA timezone e.g. America/New_York; convert response datetimes to this timezone"),
 ):
-    r = db.execute(
-        select(SessionReport).where(
+    r = db.execute(statements.USER_REPORT_ROW, {"report_id": report_id, "user_id": user_id}).one_or_none()
+    if not r:
+        raise HTTPException(status_code=404, detail="Report not found")
+    out = _to_out(r, tz)
+    timeline_archive.fill(db, [(r, out)])
+    return out
+
+
+@router.get("/{report_id}/timeline", response_model=TimelineOut)
+def get_report_timeline(
+    report_id: UUID,
+    user_id: Annotated[UUID, Depends(get_current_user_id)],
+    db: Annotated[Session, Depends(get_read_db)],
+    points: int = Query(200, ge=1, le=2000, description="Number of equal-width segments to resample the session into"),
+):
+    """The report's timeline resampled to `points` segments for charting (cached per report and points)."""
+    row = db.execute(
+        select(SessionReport.timeline_buckets_json, SessionReport.timeline_archived).where(
             SessionReport.id == report_id,
             SessionReport.user_id == user_id,
         )
-    ).scalar_one_or_none()
-    if not r:
+    ).one_or_none()
+    if row is None:
         raise HTTPException(status_code=404, detail="Report not found")
-    return _to_out(r, tz)
+    timeline_json, archived = row
+    if archived:
+        timeline_json = timeline_archive.load(db, [report_id]).get(report_id)
+    return {"report_id": str(report_id), "points": points, **timeline.resampled_timeline(report_id, timeline_json, points)}
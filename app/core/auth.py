@@ -1,11 +1,14 @@
-"""JWT encode/decode and auth dependency."""
+"""JWT encode/decode and auth dependency.
+
+python-jose (and its crypto backends) is imported on first token use to keep it off
+the startup path; /health never needs it.
+"""
 from datetime import datetime, timedelta
 from typing import Annotated
 from uuid import UUID
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from jose import JWTError, jwt
 from pydantic import BaseModel
 
 from app.core.config import settings
@@ -21,12 +24,16 @@ class TokenPayload(BaseModel):
 
 
 def create_access_token(user_id: UUID) -> str:
+    from jose import jwt
+
     expire = datetime.utcnow() + timedelta(days=ACCESS_TOKEN_EXPIRE_DAYS)
     payload = {"sub": str(user_id), "exp": expire}
     return jwt.encode(payload, settings.jwt_secret, algorithm=ALGORITHM)
 
 
 def decode_access_token(token: str) -> TokenPayload | None:
+    from jose import JWTError, jwt
+
     try:
         payload = jwt.decode(token, settings.jwt_secret, algorithms=[ALGORITHM])
         return TokenPayload(sub=payload["sub"], exp=datetime.fromtimestamp(payload["exp"]))
@@ -0,0 +1,119 @@
+"""In-process fan-out of leaderboard deltas to Server-Sent Events subscribers.
+
+Handlers (sync, in the threadpool) call ``broadcaster.publish(event, data)`` after they
+commit; each event is encoded once and handed to every subscriber's bounded asyncio
+queue on its event loop. A subscriber whose queue is full is a slow consumer: it is
+dropped (told so with a ``dropped`` event) instead of buffering without bound or
+slowing everyone else down, and is expected to refetch ``GET /leaderboard`` and
+reconnect. A stream subscribes when its response body starts, not when the request
+arrives, so a client that disconnects before that never holds a slot. Only this
+process's subscribers see its events; run one worker per stream or put a shared
+pub/sub in front when scaling out.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import threading
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_DROPPED = b"event: dropped\ndata: {}\n\n"
+
+
+def encode(event_id: int, event: str, data: dict[str, Any]) -> bytes:
+    payload = json.dumps(data, separators=(",", ":"), default=str)
+    return f"id: {event_id}\nevent: {event}\ndata: {payload}\n\n".encode()
+
+
+class Subscriber:
+    def __init__(self, loop: asyncio.AbstractEventLoop, maxsize: int):
+        self.loop = loop
+        self.queue: asyncio.Queue[bytes | None] = asyncio.Queue(maxsize=maxsize)
+        self.dropped = False
+
+    def offer(self, message: bytes) -> None:
+        """Runs on the subscriber's loop."""
+        if self.dropped:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.dropped = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+
+class Broadcaster:
+    def __init__(self) -> None:
+        self._subscribers: set[Subscriber] = set()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.dropped = 0  # slow consumers disconnected so far
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    @property
+    def full(self) -> bool:
+        return len(self._subscribers) >= settings.stream_max_subscribers
+
+    def subscribe(self, maxsize: int | None = None) -> Subscriber | None:
+        """Register a subscriber on the running loop; None if at stream_max_subscribers."""
+        with self._lock:
+            if len(self._subscribers) >= settings.stream_max_subscribers:
+                return None
+            sub = Subscriber(asyncio.get_running_loop(), maxsize or settings.stream_queue_size)
+            self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def publish(self, event: str, data: dict[str, Any]) -> None:
+        """Thread-safe; never blocks on subscribers."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        if not subscribers:
+            return
+        message = encode(next(self._ids), event, data)
+        for sub in subscribers:
+            try:
+                sub.loop.call_soon_threadsafe(sub.offer, message)
+            except RuntimeError:  # loop closed; the stream's finally will unsubscribe
+                pass
+
+    async def stream(self, is_disconnected: Callable[[], Awaitable[bool]], maxsize: int | None = None) -> AsyncIterator[bytes]:
+        """SSE body: subscribes on first iteration, then events, keep-alive comments and
+        ``dropped`` when too slow (or, right away, if the limit was reached meanwhile)."""
+        sub = self.subscribe(maxsize)
+        if sub is None:
+            yield _DROPPED
+            return
+        try:
+            yield f"retry: {settings.stream_retry_ms}\n\n".encode()
+            while True:
+                try:
+                    message = await asyncio.wait_for(sub.queue.get(), timeout=settings.stream_heartbeat_sec)
+                except asyncio.TimeoutError:
+                    if await is_disconnected():
+                        return
+                    yield b": keep-alive\n\n"
+                    continue
+                if message is None:
+                    self.dropped += 1
+                    logger.info("Dropped slow leaderboard stream subscriber")
+                    yield _DROPPED
+                    return
+                yield message
+        finally:
+            self.unsubscribe(sub)
+
+
+broadcaster = Broadcaster()
@@ -1,8 +1,14 @@
 """App configuration from env."""
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
+    """In-process caches (heatmaps, user profiles) are invalidated by this process's writes;
+    their ``*_cache_ttl_sec`` bounds staleness when another process, or a lagging replica,
+    was involved."""
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -10,10 +16,48 @@ class Settings(BaseSettings):
     )
 
     database_url: str = "sqlite:///./zonein.db"
+    database_replica_urls: list[str] = []  # read replicas for GET endpoints (JSON list)
+    read_your_writes_sec: float = 5.0  # after a user writes, their reads stay on the primary this long
     google_client_id: str = ""
     google_client_secret: str = ""
     jwt_secret: str = "change-me-in-production"
     base_url: str = "http://localhost:8000"
+    heatmap_cache_ttl_sec: float = 300.0  # cached heatmaps are recomputed after this long
+    user_profile_cache_size: int = 10_000  # users whose name/email/username are kept in memory
+    user_profile_cache_ttl_sec: float = 60.0  # cached profiles are reloaded after this long
+    partition_reports: bool = False  # Postgres: session_reports partitioned by started_at month (see app/core/partitions.py)
+    partition_months_ahead: int = 3  # upcoming monthly partitions kept created
+    timeline_archive_after_days: int = 30  # maintenance archive-timelines moves older timelines to cold storage
+    tombstone_retention_days: int = 90  # deleted-report tombstones kept for GET /reports/changes
+    idempotency_store: Literal["memory", "db"] = "memory"  # memory (per-process LRU) or db (idempotency_keys table, shared)
+    idempotency_ttl_sec: float = 86_400.0  # how long a response is replayed for a repeated Idempotency-Key
+    idempotency_max_keys: int = 10_000  # memory store: least recently used keys are evicted beyond this
+    idempotency_lock_sec: float = 60.0  # an unfinished claim older than this is treated as abandoned
+    import_batch_size: int = 500  # rows per upsert transaction in POST /reports/import
+    import_max_line_bytes: int = 1_048_576  # longer import lines fail on their own instead of being buffered
+    delete_chunk_size: int = 500  # reports per transaction when deleting in the background
+    sql_compiled_cache_size: int = 1200  # compiled SQL statements cached per engine (SQLAlchemy default 500)
+    pg_prepare_threshold: int | None = 5  # postgresql+psycopg:// only: executions before a server-side prepare (None = never)
+    prewarm_on_startup: bool = False  # open a pooled connection and compile hot queries before serving
+    task_workers: int = 2  # background task threads; 0 runs post-write tasks inline after commit
+    task_queue_size: int = 10_000  # queued tasks beyond this stay in the outbox until the next replay
+    task_retry_interval_sec: float = 30.0  # how often workers re-queue failed and dropped outbox tasks
+    task_retry_backoff_sec: float = 10.0  # delay before a failed task's first retry; doubles per attempt
+    # Per-route token-bucket budgets per client (user id, else IP), "<count>/<second|minute|hour>"
+    rate_limits: dict[str, str] = {
+        "reports:create": "60/minute",
+        "leaderboard:read": "120/minute",
+        "leaderboard:react": "120/minute",
+    }
+    stream_queue_size: int = 100  # pending events per /leaderboard/stream subscriber before it is dropped
+    stream_max_subscribers: int = 1000
+    stream_heartbeat_sec: float = 15.0
+    stream_retry_ms: int = 3000  # client reconnect delay (SSE retry:)
+    admin_token: str = ""  # X-Admin-Token for /admin and X-Profile; admin endpoints are off while empty
+    profile_sample_rate: float = 0.0  # fraction of requests profiled automatically (0 = only on X-Profile: 1)
+    profile_interval_ms: float = 5.0  # stack sampling interval while a request is profiled
+    profile_keep: int = 20  # recent profiles kept in memory for /admin/profiles
+    max_threadpool_queue: int = 200  # shed requests with 503 beyond this many queued sync calls; 0 disables
 
 
 settings = Settings()
@@ -1,20 +1,43 @@
-"""SQLAlchemy engine and session."""
+"""SQLAlchemy engine and session, with optional read replicas."""
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Annotated, Callable
+from uuid import UUID
+
+from fastapi import Depends, Request
 from sqlalchemy import create_engine
-from sqlalchemy.orm import DeclarativeBase, sessionmaker
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
 
+from app.core.auth import decode_access_token, get_optional_user_id
 from app.core.config import settings
 
-_connect_args = {}
-if settings.database_url.startswith("sqlite"):
-    _connect_args["check_same_thread"] = False
 
-engine = create_engine(
-    settings.database_url,
-    connect_args=_connect_args,
-    pool_pre_ping=not settings.database_url.startswith("sqlite"),
-)
+def _make_engine(url: str) -> Engine:
+    connect_args = {}
+    if url.startswith("sqlite"):
+        connect_args["check_same_thread"] = False
+    elif url.startswith("postgresql+psycopg:"):
+        # psycopg 3 prepares a statement server-side once it has run this many times on a
+        # connection (psycopg2 has no server-side prepares)
+        connect_args["prepare_threshold"] = settings.pg_prepare_threshold
+    return create_engine(
+        url,
+        connect_args=connect_args,
+        pool_pre_ping=not url.startswith("sqlite"),
+        query_cache_size=settings.sql_compiled_cache_size,
+    )
+
+
+engine = _make_engine(settings.database_url)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+replica_engines = [_make_engine(url) for url in settings.database_replica_urls]
+replica_sessions = [sessionmaker(autocommit=False, autoflush=False, bind=e) for e in replica_engines]
+_next_replica = itertools.count()
+
 
 class Base(DeclarativeBase):
     pass
@@ -26,3 +49,58 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# user id -> monotonic time of their last successful write (bounded, oldest evicted)
+_recent_writes: OrderedDict[UUID, float] = OrderedDict()
+_recent_writes_lock = threading.Lock()
+_RECENT_WRITES_MAX = 100_000
+
+
+def note_write(user_id: UUID) -> None:
+    """Pin the user's reads to the primary for read_your_writes_sec."""
+    with _recent_writes_lock:
+        _recent_writes.pop(user_id, None)
+        _recent_writes[user_id] = time.monotonic()
+        if len(_recent_writes) > _RECENT_WRITES_MAX:
+            _recent_writes.popitem(last=False)
+
+
+def wrote_recently(user_id: UUID | None) -> bool:
+    if user_id is None:
+        return False
+    with _recent_writes_lock:
+        ts = _recent_writes.get(user_id)
+    return ts is not None and time.monotonic() - ts < settings.read_your_writes_sec
+
+
+def get_read_db(
+    primary: Annotated[Session, Depends(get_db)],
+    user_id: Annotated[UUID | None, Depends(get_optional_user_id)],
+):
+    """Session for read-only endpoints: a replica (round-robin), or the primary when no
+    replicas are configured or the user wrote within the read-your-writes window."""
+    if not replica_sessions or wrote_recently(user_id):
+        primary.info["read_source"] = "primary"
+        yield primary
+        return
+    db = replica_sessions[next(_next_replica) % len(replica_sessions)]()
+    db.info["read_source"] = "replica"
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def track_writes(request: Request, call_next: Callable):
+    """Middleware: note successful writes by authenticated users for read-your-writes routing."""
+    response = await call_next(request)
+    if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        payload = decode_access_token(token) if scheme.lower() == "bearer" and token else None
+        if payload:
+            try:
+                note_write(UUID(payload.sub))
+            except ValueError:
+                pass
+    return response
@@ -0,0 +1,44 @@
+"""Invalidation counters for in-process caches that load outside their lock.
+
+A cache reads ``begin(key)`` before loading a missing entry and stores the result only
+if ``current(key)`` still matches afterwards, so an invalidation that lands while the
+load is running isn't undone by the stale result. Counters exist only while a load for
+the key is in flight (``end`` drops them), so memory stays bounded by concurrent loads
+rather than growing with every key ever invalidated. Not locked: callers hold their
+cache's lock around every call.
+"""
+from typing import Hashable
+
+
+class Generations:
+    def __init__(self) -> None:
+        self._epoch = 0  # bumped by bump(None): covers every key
+        self._counts: dict[Hashable, int] = {}
+        self._loading: dict[Hashable, int] = {}  # key -> loads in flight
+
+    def current(self, key: Hashable) -> tuple[int, int]:
+        return self._epoch, self._counts.get(key, 0)
+
+    def begin(self, key: Hashable) -> tuple[int, int]:
+        """Mark a load of key as started; returns the generation to compare against."""
+        self._loading[key] = self._loading.get(key, 0) + 1
+        return self.current(key)
+
+    def end(self, key: Hashable) -> None:
+        """Mark a load of key as finished (call once per begin, also on errors)."""
+        n = self._loading[key] - 1
+        if n:
+            self._loading[key] = n
+        else:
+            del self._loading[key]
+            self._counts.pop(key, None)
+
+    def bump(self, key: Hashable | None) -> None:
+        """Invalidate key (or every key, if None) for loads in flight."""
+        if key is None:
+            self._epoch += 1
+        elif key in self._loading:
+            self._counts[key] = self._counts.get(key, 0) + 1
+
+    def __len__(self) -> int:
+        return len(self._counts)
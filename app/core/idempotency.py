@@ -0,0 +1,212 @@
+"""Idempotency-Key support for retried writes (POST /reports, reactions).
+
+A request with an ``Idempotency-Key`` header claims (user, key) before its handler
+runs, and the handler stores its response with ``complete``. A retry with the same key
+and the same request (method, path, query, body) within ``IDEMPOTENCY_TTL_SEC`` gets
+that response back with ``Idempotent-Replayed: true`` and never reaches the handler,
+so nothing is written twice. The same key while the first request is still running is
+a 409; reused for a different request, a 422. A request that fails releases its key,
+so the retry runs for real.
+
+Keys live in a per-process LRU by default; ``IDEMPOTENCY_STORE=db`` keeps them in
+``idempotency_keys`` instead, shared by every process (claims commit on their own, not
+in the request's transaction).
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Annotated, Any, AsyncIterator
+from uuid import UUID
+
+from fastapi import Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.auth import get_current_user_id
+from app.core.config import settings
+from app.core.database import get_db
+from app.models.idempotency_key import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+@dataclass
+class Stored:
+    fingerprint: str
+    created: float  # wall-clock seconds
+    status_code: int | None = None  # None while the first request is running
+    body: str | None = None  # JSON
+
+
+class Replay(Exception):
+    """Raised by the dependency to answer with a stored response."""
+
+    def __init__(self, status_code: int, body: str):
+        self.status_code = status_code
+        self.body = body
+
+
+def replay_response(request: Request, exc: Replay) -> JSONResponse:
+    return JSONResponse(status_code=exc.status_code, content=json.loads(exc.body), headers={"Idempotent-Replayed": "true"})
+
+
+def _usable(entry: Stored, now: float) -> bool:
+    """Not expired, and not an in-flight claim abandoned long ago."""
+    if now - entry.created >= settings.idempotency_ttl_sec:
+        return False
+    return entry.status_code is not None or now - entry.created < settings.idempotency_lock_sec
+
+
+class MemoryStore:
+    def __init__(self) -> None:
+        self._entries: OrderedDict[tuple[UUID, str], Stored] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def claim(self, user_id: UUID, key: str, fingerprint: str) -> Stored | None:
+        """The live entry for (user, key), or None after claiming it for this request."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get((user_id, key))
+            if entry is not None and _usable(entry, now):
+                self._entries.move_to_end((user_id, key))
+                return entry
+            self._entries[(user_id, key)] = Stored(fingerprint, now)
+            self._entries.move_to_end((user_id, key))
+            while len(self._entries) > settings.idempotency_max_keys:
+                self._entries.popitem(last=False)
+        return None
+
+    def complete(self, user_id: UUID, key: str, status_code: int, body: str) -> None:
+        with self._lock:
+            entry = self._entries.get((user_id, key))
+            if entry is not None:
+                entry.status_code, entry.body = status_code, body
+
+    def release(self, user_id: UUID, key: str) -> None:
+        with self._lock:
+            entry = self._entries.get((user_id, key))
+            if entry is not None and entry.status_code is None:
+                del self._entries[(user_id, key)]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class DbStore:
+    def __init__(self, session_factory: sessionmaker):
+        self._session_factory = session_factory
+
+    def claim(self, user_id: UUID, key: str, fingerprint: str) -> Stored | None:
+        now = datetime.now(timezone.utc)
+        with self._session_factory() as db:
+            for _ in range(2):
+                db.add(IdempotencyKey(user_id=user_id, key=key, fingerprint=fingerprint, created_at=now))
+                try:
+                    db.commit()
+                    return None
+                except IntegrityError:
+                    db.rollback()
+                row = db.get(IdempotencyKey, (user_id, key))
+                if row is None:
+                    continue  # released in between
+                created = row.created_at.replace(tzinfo=row.created_at.tzinfo or timezone.utc).timestamp()
+                entry = Stored(row.fingerprint, created, row.status_code, row.response_json)
+                if _usable(entry, now.timestamp()):
+                    return entry
+                db.delete(row)  # expired or abandoned: take it over
+                db.commit()
+        raise HTTPException(status_code=409, detail="Idempotency key is being used by another request", headers={"Retry-After": "1"})
+
+    def complete(self, user_id: UUID, key: str, status_code: int, body: str) -> None:
+        with self._session_factory() as db:
+            row = db.get(IdempotencyKey, (user_id, key))
+            if row is not None:
+                row.status_code, row.response_json = status_code, body
+                db.commit()
+
+    def release(self, user_id: UUID, key: str) -> None:
+        with self._session_factory() as db:
+            db.execute(delete(IdempotencyKey).where(
+                IdempotencyKey.user_id == user_id, IdempotencyKey.key == key, IdempotencyKey.status_code.is_(None)
+            ))
+            db.commit()
+
+
+memory_store = MemoryStore()
+
+
+def prune(db: Session, older_than_sec: float | None = None) -> int:
+    """Delete expired idempotency_keys rows. Caller commits."""
+    ttl = settings.idempotency_ttl_sec if older_than_sec is None else older_than_sec
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=ttl)
+    return db.execute(delete(IdempotencyKey).where(IdempotencyKey.created_at < cutoff)).rowcount
+
+
+class IdempotentCall:
+    """Handed to the handler; call ``complete`` with the response before returning it."""
+
+    def __init__(self, store: MemoryStore | DbStore, user_id: UUID, key: str):
+        self.store = store
+        self.user_id = user_id
+        self.key = key
+        self.completed = False
+
+    def complete(self, response: Any, status_code: int = 200) -> Any:
+        self.store.complete(self.user_id, self.key, status_code, json.dumps(jsonable_encoder(response)))
+        self.completed = True
+        return response
+
+
+def fingerprint(method: str, path: str, query: str, body: bytes) -> str:
+    h = hashlib.sha256()
+    for part in (method.encode(), path.encode(), query.encode()):
+        h.update(part + b"\0")
+    h.update(body)
+    return h.hexdigest()
+
+
+async def idempotency(
+    request: Request,
+    user_id: Annotated[UUID, Depends(get_current_user_id)],
+    db: Annotated[Session, Depends(get_db)],
+) -> AsyncIterator[IdempotentCall | None]:
+    """Dependency: None without an Idempotency-Key header; replays, 409s or 422s duplicates."""
+    key = request.headers.get(HEADER)
+    if not key:
+        yield None
+        return
+    if len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"{HEADER} must be at most {MAX_KEY_LENGTH} characters")
+    fp = fingerprint(request.method, request.url.path, request.url.query, await request.body())
+    if settings.idempotency_store == "db":
+        store: MemoryStore | DbStore = DbStore(sessionmaker(autocommit=False, autoflush=False, bind=db.get_bind()))
+        existing = await run_in_threadpool(store.claim, user_id, key, fp)
+    else:
+        store = memory_store
+        existing = store.claim(user_id, key, fp)
+    if existing is not None:
+        if existing.fingerprint != fp:
+            raise HTTPException(status_code=422, detail=f"{HEADER} was already used for a different request")
+        if existing.status_code is None:
+            raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress", headers={"Retry-After": "1"})
+        raise Replay(existing.status_code, existing.body)
+
+    call = IdempotentCall(store, user_id, key)
+    try:
+        yield call
+    finally:
+        if not call.completed:
+            if isinstance(store, DbStore):
+                await run_in_threadpool(store.release, user_id, key)
+            else:
+                store.release(user_id, key)
@@ -0,0 +1,57 @@
+"""App lifespan: optional pre-warming, upcoming report partitions, background task workers."""
+import logging
+import time
+import uuid
+from contextlib import asynccontextmanager
+
+from anyio import to_thread
+from fastapi import FastAPI
+from sqlalchemy import select, text
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.database import engine
+from app.core.partitions import ensure_partitions
+from app.core.tasks import start_workers, task_queue
+
+logger = logging.getLogger(__name__)
+
+
+def prewarm(bind: Engine) -> None:
+    """Open a pooled connection and run the hot queries once so their SQL is compiled and cached."""
+    from app.core import statements
+    from app.models.user import User
+
+    start = time.perf_counter()
+    nil = uuid.UUID(int=0)
+    with bind.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        conn.execute(select(User).where(User.id == nil))
+        conn.execute(statements.REPORT_BY_SESSION, {"user_id": nil, "session_id": ""})
+        conn.execute(statements.USER_REPORT, {"report_id": nil, "user_id": nil})
+        conn.execute(statements.USER_REPORT_ROW, {"report_id": nil, "user_id": nil})
+        conn.execute(statements.REACTION_COUNTS, {"report_ids": [nil]})
+        conn.execute(statements.USER_REACTIONS, {"user_id": nil, "report_ids": [nil]})
+        conn.execute(statements.USER_PROFILES, {"user_ids": [nil]})
+    logger.info("Pre-warmed database pool and hot queries in %.0fms", (time.perf_counter() - start) * 1000)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.prewarm_on_startup:
+        try:
+            await to_thread.run_sync(prewarm, engine)
+        except Exception as e:
+            logger.warning("Pre-warm failed, continuing cold: %s", e)
+    if settings.partition_reports:
+        try:
+            await to_thread.run_sync(ensure_partitions, engine)
+        except Exception as e:
+            logger.warning("Creating upcoming session_reports partitions failed: %s", e)
+    import app.services.report_tasks  # noqa: F401  (registers task handlers before replay)
+
+    await to_thread.run_sync(start_workers, engine)
+    try:
+        yield
+    finally:
+        await to_thread.run_sync(task_queue.stop)
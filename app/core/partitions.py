@@ -0,0 +1,115 @@
+"""Monthly range partitioning of session_reports by started_at (Postgres only, opt-in).
+
+With ``PARTITION_REPORTS=true`` on Postgres, the ``partition_session_reports`` migration
+turns ``session_reports`` into a table partitioned by month of ``started_at``, so
+date-range reads (``GET /reports?from=&to=``, exports, retention) only scan the months
+they touch and old months can be detached or dropped whole. Partitions for upcoming
+months are created ahead of time on startup and by ``python maintenance.py partitions``;
+a DEFAULT partition catches anything outside them. SQLite (dev, tests) always keeps
+the single table.
+
+Postgres requires the partition key in every unique constraint, so a partitioned table
+has primary key ``(id, started_at)`` and unique ``(user_id, session_id, started_at)``;
+``report_session_keys`` keeps session_id unique per user (app/services/session_keys.py).
+The foreign keys pointing at ``session_reports.id`` are dropped, so reactions, window
+entries and archived timelines are only removed by report deletion, which deletes them
+explicitly.
+"""
+import logging
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
+
+from app.core.config import settings
+from app.models.session_report import SessionReport
+
+logger = logging.getLogger(__name__)
+
+TABLE = "session_reports"
+DEFAULT_PARTITION = f"{TABLE}_default"
+
+# Longest session assumed when bounding started_at from below, so range reads can prune
+MAX_SESSION_SPAN = timedelta(days=2)
+
+
+def wanted(dialect_name: str) -> bool:
+    """Partitioning is requested and supported by this database."""
+    return settings.partition_reports and dialect_name == "postgresql"
+
+
+def report_range_conditions(from_dt: datetime | None, to_dt: datetime | None) -> list:
+    """WHERE clauses for reports overlapping [from_dt, to_dt). When partitioned, a redundant
+    lower bound on started_at lets Postgres skip the months before the range."""
+    conditions = []
+    if from_dt is not None:
+        conditions.append(SessionReport.ended_at >= from_dt)
+        if settings.partition_reports:
+            conditions.append(SessionReport.started_at >= from_dt - MAX_SESSION_SPAN)
+    if to_dt is not None:
+        conditions.append(SessionReport.started_at < to_dt)
+    return conditions
+
+
+def month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def add_months(d: date, n: int) -> date:
+    y, m = divmod(d.month - 1 + n, 12)
+    return date(d.year + y, m + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def is_partitioned(conn: Connection) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    return bool(conn.execute(
+        text("SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = :t"),
+        {"t": TABLE},
+    ).scalar())
+
+
+def create_month_partitions(conn: Connection, first: date, last: date, parent: str = TABLE) -> list[str]:
+    """Create monthly partitions covering [first, last] (by month) that don't exist yet."""
+    created = []
+    month = month_start(first)
+    while month <= last:
+        name = partition_name(month)
+        exists = conn.execute(text("SELECT to_regclass(:n)"), {"n": name}).scalar()
+        if not exists:
+            try:
+                with conn.begin_nested():
+                    conn.execute(text(
+                        f"CREATE TABLE {name} PARTITION OF {parent} "
+                        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+                    ))
+                created.append(name)
+            except DBAPIError as e:
+                # Typically rows for this month already sit in the DEFAULT partition
+                logger.warning("Could not create partition %s: %s", name, e)
+        month = add_months(month, 1)
+    return created
+
+
+def ensure_partitions(bind: Engine | Connection, months_ahead: int | None = None, today: date | None = None) -> list[str]:
+    """Create partitions through ``months_ahead`` months from now. No-op unless partitioned."""
+    months_ahead = settings.partition_months_ahead if months_ahead is None else months_ahead
+    today = today or date.today()
+
+    def run(conn: Connection) -> list[str]:
+        if not is_partitioned(conn):
+            return []
+        created = create_month_partitions(conn, today, add_months(month_start(today), months_ahead))
+        if created:
+            logger.info("Created session_reports partitions: %s", ", ".join(created))
+        return created
+
+    if isinstance(bind, Connection):
+        return run(bind)
+    with bind.begin() as conn:
+        return run(conn)
@@ -0,0 +1,262 @@
+"""On-demand request profiling and allocation tracing for admins.
+
+A request is profiled when it carries ``X-Profile: 1`` with a valid ``X-Admin-Token``,
+or when it is picked by ``PROFILE_SAMPLE_RATE`` (a fraction of all requests). A
+sampler thread then reads ``sys._current_frames()`` every ``PROFILE_INTERVAL_MS`` while
+the request runs and keeps the stacks of threads that are inside the route's endpoint
+(sync handlers run in the threadpool, not on the event loop). Stacks are stored in
+collapsed form (``frame;frame;frame count`` per line), which flamegraph.pl, speedscope
+and inferno read directly; the last ``PROFILE_KEEP`` profiles are kept in memory and
+the response says which one with ``X-Profile-Id``. Concurrent requests to the same
+endpoint are sampled together, so under load a profile describes the endpoint.
+
+Sampling costs one walk of every thread's stack per tick and nothing when no request
+is being profiled. Allocation tracing (``tracemalloc``) is only on between
+``/admin/tracemalloc/start`` and ``/stop``.
+"""
+import hmac
+import random
+import secrets
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from types import CodeType, FrameType
+from typing import Annotated, Callable
+
+from fastapi import Header, HTTPException
+from starlette.requests import Request
+
+from app.core.config import settings
+
+
+def require_admin(x_admin_token: Annotated[str | None, Header()] = None) -> None:
+    """Dependency: 404 while ADMIN_TOKEN is unset (admin endpoints off), 403 on a wrong token."""
+    if not settings.admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, settings.admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+def is_admin(request: Request) -> bool:
+    token = request.headers.get("x-admin-token")
+    return bool(settings.admin_token and token and hmac.compare_digest(token, settings.admin_token))
+
+
+# (code, line, module) per frame: enough to label a frame without keeping it (and its locals) alive
+SampledFrame = tuple[CodeType, int, str]
+
+
+def _stack(frame: FrameType | None) -> tuple[SampledFrame, ...]:
+    frames = []
+    while frame is not None:
+        frames.append((frame.f_code, frame.f_lineno, frame.f_globals.get("__name__", "?")))
+        frame = frame.f_back
+    frames.reverse()  # root first, as collapsed stacks expect
+    return tuple(frames)
+
+
+def _label(frame: SampledFrame) -> str:
+    code, lineno, module = frame
+    return f"{module}:{code.co_name}:{lineno}"
+
+
+@dataclass
+class Profile:
+    id: str
+    method: str
+    path: str
+    started: float  # wall-clock seconds
+    duration_ms: float = 0.0
+    status_code: int | None = None
+    samples: int = 0
+    interval_ms: float = 0.0
+    stacks: Counter = field(default_factory=Counter)
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "started": self.started,
+            "duration_ms": round(self.duration_ms, 1),
+            "status_code": self.status_code,
+            "samples": self.samples,
+            "interval_ms": self.interval_ms,
+        }
+
+
+class Sampler:
+    """Samples every thread's stack until stopped; ``finish`` keeps the endpoint's."""
+
+    def __init__(self, profile: Profile, interval_sec: float):
+        self.profile = profile
+        self.interval_sec = interval_sec
+        self._raw: Counter = Counter()  # stack -> samples
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"profiler-{profile.id}", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval_sec):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                self._raw[_stack(frame)] += 1
+
+    def finish(self, endpoint: Callable | None) -> None:
+        """Keep the samples that were inside endpoint (all of them if unknown) and label them."""
+        code = getattr(getattr(endpoint, "__wrapped__", endpoint), "__code__", None)
+        for frames, count in self._raw.items():
+            if code is not None:
+                codes = [f[0] for f in frames]
+                if code not in codes:
+                    continue
+                frames = frames[codes.index(code):]  # start the flamegraph at the endpoint
+            self.profile.stacks[";".join(_label(f) for f in frames)] += count
+            self.profile.samples += count
+        self._raw.clear()
+
+
+class ProfileStore:
+    def __init__(self) -> None:
+        self._profiles: OrderedDict[str, Profile] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profile: Profile) -> None:
+        with self._lock:
+            self._profiles[profile.id] = profile
+            while len(self._profiles) > settings.profile_keep:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Profile | None:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def list(self) -> list[Profile]:
+        with self._lock:
+            return list(reversed(self._profiles.values()))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._profiles.clear()
+
+
+profiles = ProfileStore()
+
+
+def _wants_profile(request: Request) -> bool:
+    if request.headers.get("x-profile") == "1" and is_admin(request):
+        return True
+    rate = settings.profile_sample_rate
+    return rate > 0 and random.random() < rate and not request.url.path.startswith("/admin")
+
+
+async def profile_requests(request: Request, call_next: Callable):
+    """Middleware: run the sampler around requests that asked for it (or were sampled)."""
+    if not _wants_profile(request):
+        return await call_next(request)
+    profile = Profile(
+        id=secrets.token_urlsafe(8),
+        method=request.method,
+        path=request.url.path,
+        started=time.time(),
+        interval_ms=settings.profile_interval_ms,
+    )
+    sampler = Sampler(profile, settings.profile_interval_ms / 1000)
+    start = time.perf_counter()
+    sampler.start()
+    try:
+        response = await call_next(request)
+    finally:
+        sampler.stop()
+        profile.duration_ms = (time.perf_counter() - start) * 1000
+    profile.status_code = response.status_code
+    sampler.finish(request.scope.get("endpoint"))
+    profiles.add(profile)
+    response.headers["X-Profile-Id"] = profile.id
+    return response
+
+
+# tracemalloc: the snapshot taken at start is the baseline that later snapshots can diff against
+_baseline: tracemalloc.Snapshot | None = None
+_tracemalloc_lock = threading.Lock()
+
+
+def _filtered(snapshot: tracemalloc.Snapshot) -> tracemalloc.Snapshot:
+    return snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    ))
+
+
+def start_tracemalloc(frames: int) -> dict:
+    global _baseline
+    with _tracemalloc_lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        _baseline = _filtered(tracemalloc.take_snapshot())
+    return tracemalloc_status()
+
+
+def stop_tracemalloc() -> dict:
+    global _baseline
+    with _tracemalloc_lock:
+        tracemalloc.stop()
+        _baseline = None
+    return tracemalloc_status()
+
+
+def tracemalloc_status() -> dict:
+    current, peak = tracemalloc.get_traced_memory()
+    return {
+        "tracing": tracemalloc.is_tracing(),
+        "frames": tracemalloc.get_traceback_limit(),
+        "traced_kb": round(current / 1024, 1),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def top_allocations(limit: int, group_by: str, diff: bool) -> dict:
+    """Largest allocation sites now (or growth since start, with diff)."""
+    if not tracemalloc.is_tracing():
+        raise HTTPException(status_code=409, detail="tracemalloc is not running; POST /admin/tracemalloc/start first")
+    snapshot = _filtered(tracemalloc.take_snapshot())
+    if diff and _baseline is not None:
+        stats = snapshot.compare_to(_baseline, group_by)
+        top = [
+            {
+                "site": _site(s.traceback, group_by),
+                "size_kb": round(s.size / 1024, 1),
+                "size_diff_kb": round(s.size_diff / 1024, 1),
+                "count": s.count,
+                "count_diff": s.count_diff,
+            }
+            for s in stats[:limit]
+        ]
+    else:
+        top = [
+            {"site": _site(s.traceback, group_by), "size_kb": round(s.size / 1024, 1), "count": s.count}
+            for s in snapshot.statistics(group_by)[:limit]
+        ]
+    return {**tracemalloc_status(), "group_by": group_by, "diff": diff and _baseline is not None, "top": top}
+
+
+def _site(traceback: tracemalloc.Traceback, group_by: str) -> str | list[str]:
+    if group_by == "traceback":
+        return [f"{f.filename}:{f.lineno}" for f in traceback]
+    frame = traceback[0]
+    return frame.filename if group_by == "filename" else f"{frame.filename}:{frame.lineno}"
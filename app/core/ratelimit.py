@@ -0,0 +1,111 @@
+"""Per-client rate limiting (token buckets) and threadpool admission control.
+
+Budgets are per route name, configured in ``Settings.rate_limits`` as ``"<count>/<second|minute|hour>"``;
+a route without a budget is not limited. Clients are keyed by user id when the request
+carries a valid token, otherwise by IP. Sync handlers share one threadpool, so when too
+many calls are already queued for it, new requests are shed with 503 before they queue.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Annotated, Callable
+from uuid import UUID
+
+from anyio import to_thread
+from fastapi import Depends, HTTPException, Request
+from fastapi.responses import JSONResponse
+
+from app.core.auth import get_current_user_id, get_optional_user_id
+from app.core.config import settings
+
+_UNITS = {"second": 1.0, "minute": 60.0, "hour": 3600.0}
+_MAX_KEYS = 100_000  # least recently seen buckets are evicted beyond this
+
+# Paths never shed (load balancer health checks must keep answering); exact matches only,
+# so the database-backed /health/* metrics are shed like everything else
+_ADMISSION_EXEMPT = frozenset({"/health"})
+
+
+def parse_rate(spec: str) -> tuple[float, float]:
+    """'60/minute' -> (refill tokens per second, burst capacity)."""
+    count, _, unit = spec.partition("/")
+    capacity = float(count)
+    return capacity / _UNITS[unit.strip()], capacity
+
+
+class RateLimiter:
+    def __init__(self, max_keys: int = _MAX_KEYS):
+        self._buckets: OrderedDict[tuple[str, str], tuple[float, float]] = OrderedDict()  # key -> (tokens, updated)
+        self._lock = threading.Lock()
+        self._max_keys = max_keys
+
+    def acquire(self, route: str, client: str, rate: float, capacity: float) -> float:
+        """Take one token; returns 0 if allowed, else seconds until a token is available."""
+        key = (route, client)
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self._max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+limiter = RateLimiter()
+
+
+def _check(route: str, client: str) -> None:
+    spec = settings.rate_limits.get(route)
+    if not spec:
+        return
+    rate, capacity = parse_rate(spec)
+    wait = limiter.acquire(route, client, rate, capacity)
+    if wait > 0:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests",
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
+
+
+def _client_ip(request: Request) -> str:
+    return request.client.host if request.client else "?"
+
+
+def rate_limit(route: str, require_user: bool = False) -> Callable:
+    """Dependency enforcing the route's budget. With require_user, keys on get_current_user_id."""
+    if require_user:
+        def dependency(user_id: Annotated[UUID, Depends(get_current_user_id)]) -> None:
+            _check(route, f"user:{user_id}")
+    else:
+        def dependency(request: Request, user_id: Annotated[UUID | None, Depends(get_optional_user_id)]) -> None:
+            _check(route, f"user:{user_id}" if user_id else f"ip:{_client_ip(request)}")
+    return dependency
+
+
+def _threadpool_backlog() -> int:
+    """Calls waiting for a worker thread in the default (sync handler) threadpool."""
+    return to_thread.current_default_thread_limiter().statistics().tasks_waiting
+
+
+async def shed_load(request: Request, call_next: Callable):
+    """Middleware: reject with 503 while the threadpool queue is over max_threadpool_queue."""
+    limit = settings.max_threadpool_queue
+    if limit > 0 and request.url.path not in _ADMISSION_EXEMPT and _threadpool_backlog() > limit:
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Server busy, retry shortly"},
+            headers={"Retry-After": "1"},
+        )
+    return await call_next(request)
@@ -0,0 +1,70 @@
+"""Single-flight request coalescing for expensive, read-only loaders.
+
+Concurrent calls of a ``@coalesce``-decorated function with the same arguments share
+one execution: the first caller runs it, the others wait and get the same result (or
+exception). Nothing is cached once the call finishes. Results are shared between
+requests, so they must be plain data that callers don't mutate; the same goes for
+values handed out by the in-process caches (timelines, heatmaps, profiles). Ignored sessions still
+contribute their ``read_source`` (primary or replica), so a read-your-writes read never
+shares a replica's result.
+"""
+import functools
+import inspect
+import threading
+from typing import Any, Callable, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+_lock = threading.Lock()
+_inflight: dict[tuple, _Call] = {}
+
+
+def coalesce(ignore: tuple[str, ...] = ("db",)) -> Callable[[F], F]:
+    """Key calls on the function and its bound arguments, minus ``ignore`` (e.g. the session)."""
+
+    def decorator(fn: F) -> F:
+        sig = inspect.signature(fn)
+        name = f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            bound = sig.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = (name, *(
+                (k, getattr(v, "info", {}).get("read_source")) if k in ignore else (k, v)
+                for k, v in bound.arguments.items()
+            ))
+            with _lock:
+                call = _inflight.get(key)
+                leader = call is None
+                if leader:
+                    call = _inflight[key] = _Call()
+            if not leader:
+                call.done.wait()
+                if call.error is not None:
+                    raise call.error
+                return call.result
+            try:
+                call.result = fn(*args, **kwargs)
+                return call.result
+            except BaseException as e:
+                call.error = e
+                raise
+            finally:
+                with _lock:
+                    del _inflight[key]
+                call.done.set()
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
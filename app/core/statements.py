@@ -0,0 +1,85 @@
+"""Hot queries, built once at import with named bind parameters.
+
+A ``select()`` built per request costs its construction plus a walk of the whole
+expression to produce the compiled-cache key, even when the compiled SQL is already
+cached. These statements are constructed once and executed with a parameter dict
+(``db.execute(statements.USER_REPORT, {"report_id": ..., "user_id": ...})``); their
+cache key is computed on first use and memoized on the object, so only the lookup and
+parameter processing remain per request. ``lambda_stmt`` was measured as well and is
+slower than plain ``select()`` for these shapes on SQLAlchemy 2.x: see
+``benchmarks/statement_overhead.py``. List parameters (``report_ids``, ``user_ids``) are
+expanding IN parameters and take a list.
+
+Read-only endpoints select ``REPORT_COLUMNS`` rather than the ``SessionReport`` entity:
+they get plain rows (attribute access like the model, no identity map, no instance
+state or relationship setup per row), which ``_to_out`` turns into output dicts.
+"""
+from sqlalchemy import bindparam, func, select
+
+from app.models.reaction import Reaction
+from app.models.session_report import SessionReport
+from app.models.user import User
+
+# session_reports columns as Core rows, for read paths that only turn reports into dicts
+REPORT_COLUMNS = tuple(SessionReport.__table__.c)
+
+# POST /reports upsert lookup: user_id, session_id
+REPORT_BY_SESSION = select(SessionReport).where(
+    SessionReport.user_id == bindparam("user_id"),
+    SessionReport.session_id == bindparam("session_id"),
+)
+
+# A report by id, only if it belongs to the user: report_id, user_id
+USER_REPORT = select(SessionReport).where(
+    SessionReport.id == bindparam("report_id"),
+    SessionReport.user_id == bindparam("user_id"),
+)
+
+# GET /reports/{id}: the same as rows
+USER_REPORT_ROW = select(*REPORT_COLUMNS).where(
+    SessionReport.id == bindparam("report_id"),
+    SessionReport.user_id == bindparam("user_id"),
+)
+
+# The all-time leaderboard: published reports (rows), best first
+PUBLISHED_REPORTS = (
+    select(*REPORT_COLUMNS)
+    .where(SessionReport.published == True)
+    .order_by(SessionReport.zone_in_score.desc(), SessionReport.created_at.desc())
+)
+
+# GET /leaderboard?distinct_users=true: each user's best published report (rows), best first
+_ranked = (
+    select(
+        *REPORT_COLUMNS,
+        func.row_number().over(
+            partition_by=SessionReport.user_id,
+            order_by=(SessionReport.zone_in_score.desc(), SessionReport.created_at.desc()),
+        ).label("user_rank"),
+    )
+    .where(SessionReport.published == True)
+    .subquery("ranked")
+)
+BEST_PUBLISHED_PER_USER = (
+    select(*(_ranked.c[c.name] for c in REPORT_COLUMNS))
+    .where(_ranked.c.user_rank == 1)
+    .order_by(_ranked.c.zone_in_score.desc(), _ranked.c.created_at.desc())
+)
+
+# (report id, emoji, count) for the reports: report_ids
+REACTION_COUNTS = (
+    select(Reaction.report_id, Reaction.emoji, func.count(Reaction.id))
+    .where(Reaction.report_id.in_(bindparam("report_ids", expanding=True)))
+    .group_by(Reaction.report_id, Reaction.emoji)
+)
+
+# (report id, emoji) of the user's reactions among the reports: user_id, report_ids
+USER_REACTIONS = select(Reaction.report_id, Reaction.emoji).where(
+    Reaction.user_id == bindparam("user_id"),
+    Reaction.report_id.in_(bindparam("report_ids", expanding=True)),
+)
+
+# Identity columns for app/services/user_profiles.py: user_ids
+USER_PROFILES = select(User.id, User.email, User.name, User.username, User.max_zone_in_score).where(
+    User.id.in_(bindparam("user_ids", expanding=True))
+)
@@ -0,0 +1,307 @@
+"""In-process background task pipeline with a durable outbox.
+
+Request handlers call ``enqueue(db, name, payload)`` before committing: the task is
+written to ``outbox_tasks`` in the same transaction as the change that needs it, and
+handed to a bounded worker pool once that transaction commits. A worker runs the
+handler and deletes the outbox row in one transaction, so each task applies once.
+Rows left behind by a crash, a full queue or a failure are replayed at startup and then
+every ``TASK_RETRY_INTERVAL_SEC``; a failed task waits ``TASK_RETRY_BACKOFF_SEC``,
+doubling per attempt, and after ``MAX_ATTEMPTS`` it is dead-lettered (``dead_at`` set,
+counted as ``outbox_dead`` in /health/tasks) until ``python maintenance.py
+retry-dead-tasks`` gives it another round.
+
+``defer(fn, *args)`` runs best-effort, non-durable work (e.g. verbose logging) on the
+same pool. With ``TASK_WORKERS=0`` (scripts, tests) everything runs inline right after
+the commit instead.
+"""
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from sqlalchemy import event, func, or_, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.outbox_task import OutboxTask
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Session, dict], None]
+
+_handlers: dict[str, Handler] = {}
+
+MAX_ATTEMPTS = 5
+MAX_BACKOFF = timedelta(hours=1)
+
+
+def task(name: str) -> Callable[[Handler], Handler]:
+    """Register a durable task handler. It gets its own session; the pipeline commits."""
+
+    def decorator(fn: Handler) -> Handler:
+        _handlers[name] = fn
+        return fn
+
+    return decorator
+
+
+@dataclass
+class QueueStats:
+    enqueued: int = 0
+    processed: int = 0
+    failed: int = 0
+    dropped: int = 0  # queue full; left in the outbox for the next replay
+    dead: int = 0  # outbox tasks that used up MAX_ATTEMPTS
+    last_lag_ms: float = 0.0  # enqueue (commit) -> start of the last task
+    max_lag_ms: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def incr(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def record_lag(self, lag_ms: float) -> None:
+        with self._lock:
+            self.last_lag_ms = lag_ms
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+
+
+class TaskQueue:
+    def __init__(self, maxsize: int):
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._threads: list[threading.Thread] = []
+        self._stopping = threading.Event()
+        self._queued_ids: set[int] = set()  # outbox rows waiting in the queue, not replayed twice
+        self._ids_lock = threading.Lock()
+        self.stats = QueueStats()
+
+    @property
+    def running(self) -> bool:
+        return bool(self._threads)
+
+    @property
+    def workers(self) -> int:
+        return sum(t.name.startswith("task-worker") for t in self._threads)
+
+    def start(self, workers: int) -> None:
+        if self._threads:
+            return
+        self._stopping.clear()
+        for i in range(workers):
+            t = threading.Thread(target=self._work, name=f"task-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        logger.info("Started %d background task workers", workers)
+
+    def every(self, interval: float, fn: Callable[..., Any], *args: Any) -> None:
+        """Call ``fn(*args)`` every ``interval`` seconds on its own thread until ``stop``."""
+
+        def loop() -> None:
+            while not self._stopping.wait(interval):
+                try:
+                    fn(*args)
+                except Exception:
+                    logger.exception("Periodic task %s failed", getattr(fn, "__name__", fn))
+
+        t = threading.Thread(target=loop, name="task-retry", daemon=True)
+        t.start()
+        self._threads.append(t)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Finish queued work, then stop the workers."""
+        self._stopping.set()
+        for t in self._threads:
+            if t.name.startswith("task-worker"):
+                self._queue.put(None)
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+    def join(self) -> None:
+        """Block until everything queued so far has been processed."""
+        self._queue.join()
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, item: tuple) -> None:
+        """item: ("outbox", bind, task_id) or ("call", fn, args)."""
+        self.stats.incr("enqueued")
+        if not self.running:
+            self._run(item, time.monotonic())
+            return
+        if item[0] == "outbox":
+            with self._ids_lock:
+                if item[2] in self._queued_ids:
+                    return
+                self._queued_ids.add(item[2])
+        try:
+            self._queue.put_nowait((time.monotonic(), item))
+        except queue.Full:
+            self._forget(item)
+            self.stats.incr("dropped")
+            logger.warning("Task queue full (%d), leaving %s for replay", self._queue.maxsize, item[0])
+
+    def queued(self, task_id: int) -> bool:
+        with self._ids_lock:
+            return task_id in self._queued_ids
+
+    def _forget(self, item: tuple) -> None:
+        if item[0] == "outbox":
+            with self._ids_lock:
+                self._queued_ids.discard(item[2])
+
+    def _work(self) -> None:
+        while True:
+            entry = self._queue.get()
+            try:
+                if entry is None:
+                    return
+                enqueued_at, item = entry
+                self._forget(item)
+                self._run(item, enqueued_at)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, item: tuple, enqueued_at: float) -> None:
+        self.stats.record_lag((time.monotonic() - enqueued_at) * 1000)
+        try:
+            if item[0] == "outbox":
+                _run_outbox_task(item[1], item[2])
+            else:
+                item[1](*item[2])
+            self.stats.incr("processed")
+        except Exception:
+            self.stats.incr("failed")
+            logger.exception("Background task %s failed", item[0])
+
+
+task_queue = TaskQueue(maxsize=settings.task_queue_size)
+
+
+def _run_outbox_task(bind: Engine, task_id: int) -> None:
+    with Session(bind=bind) as db:
+        row = db.get(OutboxTask, task_id, with_for_update=True)
+        if row is None:
+            return  # already processed (e.g. replayed twice)
+        handler = _handlers.get(row.name)
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for task {row.name!r}")
+            handler(db, json.loads(row.payload_json))
+            db.delete(row)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            row = db.get(OutboxTask, task_id)
+            if row is not None:
+                row.attempts += 1
+                row.last_error = str(e)[:2000]
+                now = datetime.utcnow()
+                if row.attempts >= MAX_ATTEMPTS:
+                    row.dead_at = now
+                    task_queue.stats.incr("dead")
+                    logger.error("Outbox task %s id=%s dead after %d attempts: %s", row.name, task_id, row.attempts, e)
+                else:
+                    backoff = timedelta(seconds=settings.task_retry_backoff_sec * 2 ** (row.attempts - 1))
+                    row.next_attempt_at = now + min(backoff, MAX_BACKOFF)
+                db.commit()
+            raise
+
+
+def _after_commit(db: Session) -> None:
+    ids = db.info.pop("outbox_task_ids", [])
+    bind = db.get_bind()
+    for task_id in ids:
+        task_queue.submit(("outbox", bind, task_id))
+
+
+def _after_rollback(db: Session) -> None:
+    db.info.pop("outbox_task_ids", None)
+
+
+def enqueue(db: Session, name: str, payload: dict[str, Any]) -> None:
+    """Record a task in the caller's transaction; it is dispatched when the caller commits."""
+    row = OutboxTask(name=name, payload_json=json.dumps(payload, default=str), attempts=0)
+    db.add(row)
+    db.flush()
+    if "outbox_task_ids" not in db.info:
+        db.info["outbox_task_ids"] = []
+        if not event.contains(db, "after_commit", _after_commit):
+            event.listen(db, "after_commit", _after_commit)
+            event.listen(db, "after_rollback", _after_rollback)
+    db.info["outbox_task_ids"].append(row.id)
+
+
+def defer(fn: Callable[..., Any], *args: Any) -> None:
+    """Run best-effort work off the request path (lost if the process dies)."""
+    task_queue.submit(("call", fn, args))
+
+
+def replay_outbox(bind: Engine, min_age_sec: float = 0) -> int:
+    """Queue the outbox tasks that are due (crash, full queue, failure past its backoff).
+
+    Rows newer than ``min_age_sec`` are skipped: they are normally still on their way
+    through the queue after their commit.
+    """
+    now = datetime.utcnow()
+    with Session(bind=bind) as db:
+        ids = db.execute(
+            select(OutboxTask.id)
+            .where(
+                OutboxTask.dead_at.is_(None),
+                or_(OutboxTask.next_attempt_at.is_(None), OutboxTask.next_attempt_at <= now),
+                or_(OutboxTask.created_at.is_(None), OutboxTask.created_at <= now - timedelta(seconds=min_age_sec)),
+            )
+            .order_by(OutboxTask.id)
+        ).scalars().all()
+    ids = [task_id for task_id in ids if not task_queue.queued(task_id)]
+    for task_id in ids:
+        task_queue.submit(("outbox", bind, task_id))
+    if ids:
+        logger.info("Replayed %d outbox tasks", len(ids))
+    return len(ids)
+
+
+def revive_dead(db: Session) -> int:
+    """Give dead-lettered tasks a fresh set of attempts (picked up by the next replay). Caller commits."""
+    return db.execute(
+        update(OutboxTask)
+        .where(OutboxTask.dead_at.isnot(None))
+        .values(dead_at=None, attempts=0, next_attempt_at=None)
+    ).rowcount
+
+
+def queue_metrics(db: Session) -> dict[str, Any]:
+    """Queue depth, lag and outbox backlog for /health/tasks."""
+    pending, oldest = db.execute(
+        select(func.count(OutboxTask.id), func.min(OutboxTask.created_at)).where(OutboxTask.dead_at.is_(None))
+    ).one()
+    dead = db.execute(select(func.count(OutboxTask.id)).where(OutboxTask.dead_at.isnot(None))).scalar_one()
+    s = task_queue.stats
+    return {
+        "workers": task_queue.workers,
+        "queue_depth": task_queue.depth(),
+        "outbox_pending": pending,
+        "outbox_oldest_created_at": oldest,
+        "outbox_dead": dead,
+        "enqueued": s.enqueued,
+        "processed": s.processed,
+        "failed": s.failed,
+        "dropped": s.dropped,
+        "last_lag_ms": round(s.last_lag_ms, 1),
+        "max_lag_ms": round(s.max_lag_ms, 1),
+    }
+
+
+def start_workers(bind: Engine) -> None:
+    if settings.task_workers <= 0:
+        return
+    task_queue.start(settings.task_workers)
+    replay_outbox(bind)
+    task_queue.every(settings.task_retry_interval_sec, replay_outbox, bind, settings.task_retry_interval_sec)
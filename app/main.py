@@ -7,11 +7,24 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.requests import Request
 
-from app.api import auth, health, me, reports, leaderboard
+from app.api import admin, auth, health, me, reports, leaderboard
+from app.core import idempotency, profiling
+from app.core.database import track_writes
+from app.core.lifespan import lifespan
+from app.core.ratelimit import shed_load
 
 logging.getLogger("app").setLevel(logging.INFO)
 
-app = FastAPI(title="ZoneIn Backend", description="Aggregated focus session reports (privacy-first)")
+app = FastAPI(title="ZoneIn Backend", description="Aggregated focus session reports (privacy-first)", lifespan=lifespan)
+
+app.add_exception_handler(idempotency.Replay, idempotency.replay_response)
+
+# Shed load before anything else runs (registered first = innermost, so requests are still logged)
+app.middleware("http")(shed_load)
+# Pin a user's reads to the primary right after they write (read replicas may lag)
+app.middleware("http")(track_writes)
+# Sample stacks of admin-requested (X-Profile: 1) or PROFILE_SAMPLE_RATE-picked requests
+app.middleware("http")(profiling.profile_requests)
 
 
 @app.middleware("http")
@@ -51,3 +64,4 @@ app.include_router(auth.router)
 app.include_router(me.router)
 app.include_router(reports.router)
 app.include_router(leaderboard.router)
+app.include_router(admin.router)
@@ -1,5 +1,12 @@
 from app.models.user import User
 from app.models.session_report import SessionReport
 from app.models.reaction import Reaction
+from app.models.user_stats import UserStats
+from app.models.leaderboard_window_entry import LeaderboardWindowEntry
+from app.models.outbox_task import OutboxTask
+from app.models.timeline_archive import TimelineArchive
+from app.models.report_tombstone import ReportTombstone
+from app.models.idempotency_key import IdempotencyKey
+from app.models.report_session_key import ReportSessionKey
 
-__all__ = ["User", "SessionReport", "Reaction"]
+__all__ = ["User", "SessionReport", "Reaction", "UserStats", "LeaderboardWindowEntry", "OutboxTask", "TimelineArchive", "ReportTombstone", "IdempotencyKey", "ReportSessionKey"]
@@ -0,0 +1,20 @@
+"""Stored responses for Idempotency-Key retries (IDEMPOTENCY_STORE=db)."""
+import uuid
+from datetime import datetime
+from sqlalchemy import DateTime, Integer, String, Text, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class IdempotencyKey(Base):
+    """A write claimed by (user, key): in flight while status_code is NULL, then its response."""
+
+    __tablename__ = "idempotency_keys"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)  # sha256 of method, path, query and body
+    status_code: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    response_json: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
@@ -0,0 +1,25 @@
+"""Precomputed entries for time-windowed (day/week/month) leaderboards."""
+import uuid
+from datetime import date, datetime
+from sqlalchemy import Date, DateTime, Float, ForeignKey, Index, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class LeaderboardWindowEntry(Base):
+    """One row per published report started within the retention window, bucketed by UTC day.
+
+    Day buckets serve every window in any timezone: a local day/week/month maps to a
+    UTC range that spans a handful of buckets.
+    """
+
+    __tablename__ = "leaderboard_window_entries"
+    __table_args__ = (Index("ix_leaderboard_window_entries_day_score", "day", "zone_in_score"),)
+
+    report_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("session_reports.id", ondelete="CASCADE"), primary_key=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    day: Mapped[date] = mapped_column(Date, nullable=False)  # UTC date of started_at
+    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    zone_in_score: Mapped[float] = mapped_column(Float, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)  # report's, for tie-breaks
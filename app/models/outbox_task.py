@@ -0,0 +1,21 @@
+"""Durable outbox of post-write tasks (derived-data maintenance)."""
+from datetime import datetime
+from sqlalchemy import DateTime, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class OutboxTask(Base):
+    """Written in the same transaction as the change that needs it; deleted when the task has run."""
+
+    __tablename__ = "outbox_tasks"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    name: Mapped[str] = mapped_column(String(64), nullable=False)
+    payload_json: Mapped[str] = mapped_column(Text, nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    next_attempt_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)  # retry backoff after a failure
+    dead_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)  # gave up after MAX_ATTEMPTS
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
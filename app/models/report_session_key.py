@@ -0,0 +1,17 @@
+"""Which report owns a (user, session_id), for partitioned session_reports."""
+import uuid
+from sqlalchemy import ForeignKey, String, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class ReportSessionKey(Base):
+    """A partitioned session_reports can only enforce unique (user_id, session_id, started_at)
+    (app/core/partitions.py); this unpartitioned table keeps session_id unique per user."""
+
+    __tablename__ = "report_session_keys"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    session_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    report_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False, index=True)
@@ -0,0 +1,18 @@
+"""Deleted reports, kept so incremental sync can tell clients what to remove."""
+import uuid
+from datetime import datetime
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Index, String, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class ReportTombstone(Base):
+    __tablename__ = "report_tombstones"
+    __table_args__ = (Index("ix_report_tombstones_user_change_seq", "user_id", "change_seq"),)
+
+    report_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    session_id: Mapped[str] = mapped_column(String(64), nullable=False)
+    change_seq: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    deleted_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
@@ -1,20 +1,36 @@
 """Session report model (aggregated, privacy-first)."""
 import uuid
 from datetime import datetime
-from sqlalchemy import String, DateTime, Boolean, Float, ForeignKey, Text, UniqueConstraint, UUID
+from sqlalchemy import BigInteger, String, DateTime, Boolean, Float, ForeignKey, Index, Text, UniqueConstraint, UUID, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from app.core.config import settings
 from app.core.database import Base
 
+# Partitioned by started_at month on Postgres (app/core/partitions.py): the partition key
+# must be part of the primary key and of every unique constraint.
+PARTITION_COLUMNS = ("user_id", "session_id", "started_at") if settings.partition_reports else ("user_id", "session_id")
+
 
 class SessionReport(Base):
     __tablename__ = "session_reports"
-    __table_args__ = (UniqueConstraint("user_id", "session_id", name="uq_session_reports_user_session"),)
+    __table_args__ = (
+        UniqueConstraint(*PARTITION_COLUMNS, name="uq_session_reports_user_session"),
+        Index("ix_session_reports_user_change_seq", "user_id", "change_seq"),  # GET /reports/changes
+        # GET /leaderboard?distinct_users=true: each user's published reports, best first
+        Index(
+            "ix_session_reports_published_user_score", "user_id", "zone_in_score", "created_at",
+            postgresql_where=text("published"), sqlite_where=text("published"),
+        ),
+        {"postgresql_partition_by": "RANGE (started_at)"} if settings.partition_reports else {},
+    )
+    # Rows are still identified by id alone in the ORM (db.get(SessionReport, id))
+    __mapper_args__ = {"primary_key": ["id"]} if settings.partition_reports else {}
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     session_id: Mapped[str] = mapped_column(String(64), nullable=False, index=True)  # UUID from macOS app
-    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, primary_key=settings.partition_reports)
     ended_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     duration_sec: Mapped[float] = mapped_column(Float, nullable=False)
     focused_sec: Mapped[float] = mapped_column(Float, nullable=False)
@@ -23,9 +39,13 @@ class SessionReport(Base):
     snoozed_sec: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
     zone_in_score: Mapped[float] = mapped_column(Float, nullable=False)  # 0–100
     timeline_buckets_json: Mapped[str | None] = mapped_column(Text, nullable=True)  # JSON array of buckets
+    timeline_archived: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)  # JSON moved to timeline_archive
     cloud_ai_enabled: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
     published: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False, index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    updated_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True, default=datetime.utcnow)
+    # Per-user change sequence (users.change_seq) at the last client-visible change; see app/services/report_sync.py
+    change_seq: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0, server_default="0")
 
     user: Mapped["User"] = relationship("User", back_populates="reports")
     reactions: Mapped[list["Reaction"]] = relationship("Reaction", back_populates="report", cascade="all, delete-orphan")
@@ -0,0 +1,21 @@
+"""Compressed cold storage for old report timelines."""
+import uuid
+from datetime import datetime
+from sqlalchemy import DateTime, ForeignKey, Integer, LargeBinary, String, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class TimelineArchive(Base):
+    """A report's timeline_buckets_json moved out of session_reports (which keeps its summary columns)."""
+
+    __tablename__ = "timeline_archive"
+
+    report_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("session_reports.id", ondelete="CASCADE"), primary_key=True
+    )
+    codec: Mapped[str] = mapped_column(String(16), nullable=False, default="zlib")
+    data: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    raw_bytes: Mapped[int] = mapped_column(Integer, nullable=False)  # size of the uncompressed JSON
+    archived_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
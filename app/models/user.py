@@ -1,7 +1,7 @@
 """User model (Google OAuth)."""
 import uuid
 from datetime import datetime
-from sqlalchemy import String, DateTime, UUID, Float
+from sqlalchemy import BigInteger, String, DateTime, UUID, Float
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
@@ -17,6 +17,8 @@ class User(Base):
     username: Mapped[str | None] = mapped_column(String(255), unique=True, nullable=True, index=True)
     max_zone_in_score: Mapped[float | None] = mapped_column(Float, nullable=True, default=None)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    change_seq: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0, server_default="0")  # last sync change handed out
+    tombstones_pruned_seq: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0, server_default="0")  # tombstones at or below were pruned
 
     reports: Mapped[list["SessionReport"]] = relationship("SessionReport", back_populates="user")
     reactions: Mapped[list["Reaction"]] = relationship("Reaction", back_populates="user")
@@ -0,0 +1,24 @@
+"""Per-user running statistics, maintained incrementally on report writes."""
+import uuid
+from datetime import date, datetime
+from sqlalchemy import Date, DateTime, Float, ForeignKey, Integer, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class UserStats(Base):
+    __tablename__ = "user_stats"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    report_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total_duration_sec: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    total_focused_sec: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    total_distracted_sec: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    total_neutral_sec: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    total_snoozed_sec: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    zone_in_score_sum: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)  # average = sum / report_count
+    last_session_date: Mapped[date | None] = mapped_column(Date, nullable=True)  # UTC date of latest started_at
+    current_streak_days: Mapped[int] = mapped_column(Integer, nullable=False, default=0)  # run ending at last_session_date
+    longest_streak_days: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
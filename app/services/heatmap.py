@@ -0,0 +1,137 @@
+"""Hour-of-week heatmap: seconds per state in each local (weekday, hour) slot.
+
+Every report's timeline buckets in the range are decoded into one set of NumPy arrays
+and projected into local hour slots in a single pass: a bucket is at most an hour long,
+so it touches at most two local hours, and UTC offsets are looked up once per distinct
+UTC hour rather than per bucket. Results are cached per (user, range, timezone) and
+dropped when the user's reports change (``invalidate``) or after
+``HEATMAP_CACHE_TTL_SEC`` (see ``Settings``).
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone, tzinfo
+from uuid import UUID
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from app.core import partitions
+from app.core.config import settings
+from app.core.generations import Generations
+from app.models.session_report import SessionReport
+from app.services import timeline_archive
+from app.services.timeline import STATES, decode_buckets
+
+logger = logging.getLogger(__name__)
+
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+_EPOCH_WEEKDAY = 3  # 1970-01-01 was a Thursday
+_CACHE_MAX = 1024
+
+
+def resolve_tz(tz_str: str | None) -> tzinfo:
+    try:
+        return ZoneInfo(tz_str) if tz_str else timezone.utc
+    except Exception as e:
+        logger.warning("Invalid timezone %s: %s, using UTC", tz_str, e)
+        return timezone.utc
+
+
+def project(start, end, state, tz: tzinfo):
+    """Add each bucket's seconds into a (7, 24, len(STATES)) grid of local weekday/hour slots."""
+    import numpy as np
+
+    grid = np.zeros((7, 24, len(STATES)))
+    if not len(start):
+        return grid
+    utc_hours, inverse = np.unique(np.floor_divide(start, 3600).astype(np.int64), return_inverse=True)
+    offsets = np.array([
+        datetime.fromtimestamp(int(h) * 3600, tz).utcoffset().total_seconds() for h in utc_hours
+    ])[inverse]
+    local_start, local_end = start + offsets, end + offsets
+    boundary = (np.floor_divide(local_start, 3600) + 1) * 3600
+    # First part up to the next local hour boundary, the rest (if any) in the following hour
+    for t, seconds in ((local_start, np.minimum(local_end, boundary) - local_start),
+                       (boundary, np.maximum(local_end - boundary, 0.0))):
+        keep = seconds > 0
+        t, seconds = t[keep], seconds[keep]
+        weekday = (np.floor_divide(t, 86400).astype(np.int64) + _EPOCH_WEEKDAY) % 7
+        hour = (np.floor_divide(t, 3600).astype(np.int64)) % 24
+        np.add.at(grid, (weekday, hour, state[keep]), seconds)
+    return grid
+
+
+def compute(db: Session, user_id: UUID, from_dt: datetime | None, to_dt: datetime | None, tz: tzinfo) -> dict:
+    """Heatmap of the user's reports overlapping [from_dt, to_dt); buckets are clipped to the range."""
+    import numpy as np
+
+    q = select(SessionReport.id, SessionReport.timeline_buckets_json, SessionReport.timeline_archived).where(
+        SessionReport.user_id == user_id,
+        or_(SessionReport.timeline_buckets_json.is_not(None), SessionReport.timeline_archived == True),
+    )
+    q = q.where(*partitions.report_range_conditions(from_dt, to_dt))
+    decoded = []
+    for rows in db.execute(q.execution_options(yield_per=500)).partitions():
+        archived = timeline_archive.load(db, [rid for rid, _, is_archived in rows if is_archived])
+        decoded.extend(decode_buckets(archived.get(rid) if is_archived else j) for rid, j, is_archived in rows)
+    decoded = [b for b in decoded if len(b)]
+    if decoded:
+        start = np.concatenate([b.start for b in decoded])
+        end = np.concatenate([b.end for b in decoded])
+        state = np.concatenate([b.state for b in decoded])
+        lo = from_dt.timestamp() if from_dt is not None else -np.inf
+        hi = to_dt.timestamp() if to_dt is not None else np.inf
+        start, end = np.clip(start, lo, hi), np.clip(end, lo, hi)
+    else:
+        start = end = np.empty(0)
+        state = np.empty(0, dtype=np.int8)
+    grid = project(start, end, state, tz)
+    return {
+        "weekdays": list(WEEKDAYS),
+        **{s: np.round(grid[:, :, k], 1).tolist() for k, s in enumerate(STATES)},
+    }
+
+
+# Per user, bumped whenever their reports change so a computation in flight isn't cached
+_generations = Generations()
+# (user id, from, to, tz) -> (computed at (monotonic), heatmap)
+_cache: OrderedDict[tuple, tuple[float, dict]] = OrderedDict()
+_lock = threading.Lock()
+
+
+def invalidate(user_id: UUID | None) -> None:
+    """Drop cached heatmaps for a user (or everyone, if None) after their reports changed."""
+    with _lock:
+        _generations.bump(user_id)
+        if user_id is None:
+            _cache.clear()
+        else:
+            for key in [key for key in _cache if key[0] == user_id]:
+                del _cache[key]
+
+
+def user_heatmap(db: Session, user_id: UUID, from_dt: datetime | None, to_dt: datetime | None, tz_str: str | None) -> dict:
+    """compute(), cached. Results are shared (see app/core/singleflight.py)."""
+    key = (user_id, from_dt, to_dt, tz_str)
+    now = time.monotonic()
+    with _lock:
+        hit = _cache.get(key)
+        if hit is not None and now - hit[0] < settings.heatmap_cache_ttl_sec:
+            _cache.move_to_end(key)
+            return hit[1]
+        generation = _generations.begin(user_id)
+    try:
+        result = compute(db, user_id, from_dt, to_dt, resolve_tz(tz_str))
+        with _lock:
+            if _generations.current(user_id) == generation:  # not invalidated while computing
+                _cache[key] = (now, result)
+                _cache.move_to_end(key)
+                while len(_cache) > _CACHE_MAX:
+                    _cache.popitem(last=False)
+    finally:
+        with _lock:
+            _generations.end(user_id)
+    return result
@@ -0,0 +1,61 @@
+"""Leaderboard deltas pushed to GET /leaderboard/stream subscribers.
+
+Events (SSE ``event:`` names), all keyed by ``report_id``:
+    added      a report was published: its score, owner's username and all-time rank
+    removed    a report was unpublished
+    rank       a published report's score changed: new score and rank
+    reactions  a reaction was set or cleared: the report's per-emoji counts
+Ranks are positions on the all-time board (zone_in_score desc, newest first on ties) and
+are only computed while someone is subscribed. Call after the change is committed.
+"""
+from uuid import UUID
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.core.broadcast import broadcaster
+from app.models.session_report import SessionReport
+from app.models.user import User
+
+
+def report_rank(db: Session, report: SessionReport) -> int:
+    ahead = db.execute(
+        select(func.count(SessionReport.id)).where(
+            SessionReport.published == True,
+            or_(
+                SessionReport.zone_in_score > report.zone_in_score,
+                and_(SessionReport.zone_in_score == report.zone_in_score, SessionReport.created_at > report.created_at),
+            ),
+        )
+    ).scalar_one()
+    return ahead + 1
+
+
+def report_added(db: Session, report: SessionReport) -> None:
+    if not broadcaster.subscribers:
+        return
+    username = db.execute(select(User.username).where(User.id == report.user_id)).scalar_one_or_none()
+    broadcaster.publish("added", {
+        "report_id": str(report.id),
+        "zone_in_score": report.zone_in_score,
+        "username": username,
+        "rank": report_rank(db, report),
+    })
+
+
+def report_removed(report_id: UUID) -> None:
+    broadcaster.publish("removed", {"report_id": str(report_id)})
+
+
+def rank_changed(db: Session, report: SessionReport) -> None:
+    if not broadcaster.subscribers:
+        return
+    broadcaster.publish("rank", {
+        "report_id": str(report.id),
+        "zone_in_score": report.zone_in_score,
+        "rank": report_rank(db, report),
+    })
+
+
+def reactions_changed(report_id: UUID, counts: dict[str, int]) -> None:
+    broadcaster.publish("reactions", {"report_id": str(report_id), "reactions": counts})
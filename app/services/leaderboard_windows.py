@@ -0,0 +1,92 @@
+"""Maintenance and querying of the day/week/month leaderboard entries.
+
+Entries are kept for published reports that started within RETENTION_DAYS (the longest
+window plus a day of timezone slack on each side); older ones are compacted away.
+"""
+import logging
+from datetime import date, datetime, timedelta, timezone
+from uuid import UUID
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from app.models.leaderboard_window_entry import LeaderboardWindowEntry
+from app.models.session_report import SessionReport
+from app.services.user_stats import utc_day
+
+logger = logging.getLogger(__name__)
+
+WINDOWS = ("day", "week", "month")
+RETENTION_DAYS = 33
+
+
+def retention_cutoff(today: date | None = None) -> date:
+    today = today or datetime.now(timezone.utc).date()
+    return today - timedelta(days=RETENTION_DAYS)
+
+
+def sync_report(db: Session, report: SessionReport) -> None:
+    """Insert, update or drop the window entry for a report after it changed. Caller commits."""
+    entry = db.get(LeaderboardWindowEntry, report.id)
+    day = utc_day(report.started_at)
+    if not report.published or day < retention_cutoff():
+        if entry is not None:
+            db.delete(entry)
+        return
+    if entry is None:
+        entry = LeaderboardWindowEntry(report_id=report.id, user_id=report.user_id)
+        db.add(entry)
+    entry.day = day
+    entry.started_at = report.started_at
+    entry.zone_in_score = report.zone_in_score
+    entry.created_at = report.created_at
+
+
+def remove_reports(db: Session, report_ids: list[UUID]) -> None:
+    db.execute(delete(LeaderboardWindowEntry).where(LeaderboardWindowEntry.report_id.in_(report_ids)))
+
+
+def compact(db: Session, today: date | None = None) -> int:
+    """Drop entries that no window can reach any more. Caller commits."""
+    n = db.execute(delete(LeaderboardWindowEntry).where(LeaderboardWindowEntry.day < retention_cutoff(today))).rowcount
+    if n:
+        logger.info("Compacted %d leaderboard window entries", n)
+    return n
+
+
+def window_bounds(window: str, tz_str: str | None, now: datetime | None = None) -> tuple[datetime, datetime]:
+    """UTC [start, end) of the current local day, week (Monday-based) or month."""
+    try:
+        tz = ZoneInfo(tz_str) if tz_str else timezone.utc
+    except Exception as e:
+        logger.warning("Invalid timezone %s: %s, using UTC", tz_str, e)
+        tz = timezone.utc
+    local_now = (now or datetime.now(timezone.utc)).astimezone(tz)
+    today = local_now.date()
+    if window == "day":
+        start, end = today, today + timedelta(days=1)
+    elif window == "week":
+        start = today - timedelta(days=today.weekday())
+        end = start + timedelta(days=7)
+    elif window == "month":
+        start = today.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1)
+    else:
+        raise ValueError(f"Unknown leaderboard window: {window}")
+
+    def to_utc(d: date) -> datetime:
+        return datetime(d.year, d.month, d.day, tzinfo=tz).astimezone(timezone.utc)
+
+    return to_utc(start), to_utc(end)
+
+
+def window_conditions(window: str, tz_str: str | None) -> list:
+    """WHERE clauses on LeaderboardWindowEntry selecting the current window's entries."""
+    start, end = window_bounds(window, tz_str)
+    return [
+        LeaderboardWindowEntry.day >= start.date(),
+        LeaderboardWindowEntry.day <= end.date(),
+        LeaderboardWindowEntry.started_at >= start,
+        LeaderboardWindowEntry.started_at < end,
+    ]
@@ -0,0 +1,478 @@
+"""Set-based maintenance of derived data (max scores, usernames, user stats, leaderboard windows),
+timeline archival, pruning of sync tombstones and idempotency keys, and retrying dead outbox tasks.
+
+Chunked tasks walk ``users`` (archival: ``session_reports``) in keyset order (``id > after``)
+in chunks, issue one grouped statement per chunk and commit per chunk, so a run can be
+interrupted and resumed from the last printed cursor without redoing finished work. The
+rest (UNCHUNKED_TASKS) run one statement and ignore ``chunk_size`` and ``after``.
+"""
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timezone
+from typing import Callable
+from uuid import UUID
+
+from sqlalchemy import delete, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.models.leaderboard_window_entry import LeaderboardWindowEntry
+from app.models.session_report import SessionReport
+from app.models.user import User
+from app.models.user_stats import UserStats
+from app.core import idempotency, partitions, tasks
+from app.core.config import settings
+from app.services import leaderboard_windows, report_sync, timeline_archive, user_profiles
+from app.services.user_stats import TOTAL_COLUMNS, streaks, utc_day
+from app.services.username import extract_first_name, generate_random_suffix
+
+DEFAULT_CHUNK_SIZE = 1000
+
+Progress = Callable[[str], None]
+
+
+@dataclass
+class MaintenanceResult:
+    scanned: int = 0
+    changed: int = 0
+    last_id: UUID | None = None
+    details: list[str] = field(default_factory=list)
+
+
+def _next_user_chunk(db: Session, after: UUID | None, chunk_size: int, *where) -> list[UUID]:
+    q = select(User.id).where(*where).order_by(User.id).limit(chunk_size)
+    if after is not None:
+        q = q.where(User.id > after)
+    return list(db.execute(q).scalars().all())
+
+
+def _max_scores_subquery(user_ids: list[UUID] | None):
+    q = select(
+        SessionReport.user_id.label("user_id"),
+        func.max(SessionReport.zone_in_score).label("max_score"),
+    ).group_by(SessionReport.user_id)
+    if user_ids is not None:
+        q = q.where(SessionReport.user_id.in_(user_ids))
+    return q.subquery()
+
+
+def _below_max(sub):
+    return or_(User.max_zone_in_score.is_(None), User.max_zone_in_score < sub.c.max_score)
+
+
+def refresh_max_scores(db: Session, user_ids: list[UUID] | None, raise_only: bool = False) -> int:
+    """One UPDATE ... FROM setting max_zone_in_score for the given users (all if None). Caller commits.
+
+    With ``raise_only`` the stored value is only ever increased, like the update_max_score
+    task, so a lifetime max survives reports being overwritten with lower scores.
+    """
+    sub = _max_scores_subquery(user_ids)
+    if raise_only:
+        changed = _below_max(sub)
+    else:
+        changed = User.max_zone_in_score.is_distinct_from(sub.c.max_score)
+    stmt = (
+        update(User)
+        .where(User.id == sub.c.user_id)
+        .where(changed)
+        .values(max_zone_in_score=sub.c.max_score)
+    )
+    user_profiles.invalidate_on_commit(db, user_ids)
+    return db.execute(stmt).rowcount
+
+
+def backfill_max_scores(
+    db: Session,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    after: UUID | None = None,
+    dry_run: bool = False,
+    progress: Progress = print,
+) -> MaintenanceResult:
+    """Raise users.max_zone_in_score to MAX(zone_in_score) of their reports.
+
+    The stored value is never lowered (raise_only): it is a lifetime max, so it survives
+    deleting or overwriting the best report. A chunk_size of 0 runs a single
+    UPDATE ... FROM over the whole table.
+    """
+    result = MaintenanceResult(last_id=after)
+    while True:
+        user_ids = _next_user_chunk(db, result.last_id, chunk_size) if chunk_size else None
+        if user_ids == []:
+            break
+        changed = refresh_max_scores(db, user_ids, raise_only=True)
+        if dry_run:
+            db.rollback()
+        else:
+            db.commit()
+        result.changed += changed
+        if user_ids is None:
+            progress(f"max-scores: updated {changed} users")
+            break
+        result.scanned += len(user_ids)
+        result.last_id = user_ids[-1]
+        progress(f"max-scores: {result.scanned} users scanned, {result.changed} updated (resume with --after {result.last_id})")
+    return result
+
+
+def verify_max_scores(
+    db: Session,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    after: UUID | None = None,
+    progress: Progress = print,
+) -> MaintenanceResult:
+    """Report users whose stored max_zone_in_score is below their reports' MAX() (what max-scores fixes)."""
+    result = MaintenanceResult(last_id=after)
+    while True:
+        user_ids = _next_user_chunk(db, result.last_id, chunk_size or DEFAULT_CHUNK_SIZE)
+        if not user_ids:
+            break
+        sub = _max_scores_subquery(user_ids)
+        rows = db.execute(
+            select(User.id, User.email, User.username, User.max_zone_in_score, sub.c.max_score)
+            .join(sub, sub.c.user_id == User.id)
+            .where(User.id.in_(user_ids))
+            .where(_below_max(sub))
+            .order_by(User.id)
+        ).all()
+        for uid, email, username, stored, actual in rows:
+            line = f"✗ User {uid} ({email or username or 'unknown'}): stored={stored} actual={actual}"
+            result.details.append(line)
+            progress(line)
+        result.scanned += len(user_ids)
+        result.changed += len(rows)
+        result.last_id = user_ids[-1]
+        progress(f"verify-max-scores: {result.scanned} users scanned, {result.changed} mismatches (resume with --after {result.last_id})")
+    return result
+
+
+def _unique_usernames(db: Session, names: dict[UUID, str], max_attempts: int = 100) -> dict[UUID, str]:
+    """Pick a unique firstname-random8chars username for every user id, one IN query per round."""
+    chosen: dict[UUID, str] = {}
+    pending = dict(names)
+    for _ in range(max_attempts):
+        if not pending:
+            break
+        candidates = {uid: f"{extract_first_name(name)}-{generate_random_suffix(8)}" for uid, name in pending.items()}
+        taken = set(
+            db.execute(select(User.username).where(User.username.in_(candidates.values()))).scalars().all()
+        )
+        taken.update(chosen.values())
+        for uid, username in candidates.items():
+            if username not in taken:
+                chosen[uid] = username
+                taken.add(username)
+                del pending[uid]
+    if pending:
+        raise RuntimeError(f"Could not generate unique usernames for {len(pending)} users")
+    return chosen
+
+
+def backfill_usernames(
+    db: Session,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    after: UUID | None = None,
+    dry_run: bool = False,
+    progress: Progress = print,
+) -> MaintenanceResult:
+    """Generate usernames for users who don't have one."""
+    result = MaintenanceResult(last_id=after)
+    while True:
+        q = select(User.id, User.name, User.email).where(User.username.is_(None)).order_by(User.id)
+        q = q.limit(chunk_size or DEFAULT_CHUNK_SIZE)
+        if result.last_id is not None:
+            q = q.where(User.id > result.last_id)
+        rows = db.execute(q).all()
+        if not rows:
+            break
+        names = {uid: name or (email.split("@")[0] if email else "user") for uid, name, email in rows}
+        usernames = _unique_usernames(db, names)
+        db.execute(update(User), [{"id": uid, "username": username} for uid, username in usernames.items()])
+        user_profiles.invalidate_on_commit(db, list(usernames))
+        if dry_run:
+            db.rollback()
+        else:
+            db.commit()
+        result.scanned += len(rows)
+        result.changed += len(usernames)
+        result.last_id = rows[-1][0]
+        progress(f"usernames: {result.changed} generated (resume with --after {result.last_id})")
+    return result
+
+
+def backfill_user_stats(
+    db: Session,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    after: UUID | None = None,
+    dry_run: bool = False,
+    progress: Progress = print,
+) -> MaintenanceResult:
+    """Rebuild user_stats rows: one grouped aggregate plus one date scan per chunk of users."""
+    result = MaintenanceResult(last_id=after)
+    while True:
+        user_ids = _next_user_chunk(db, result.last_id, chunk_size or DEFAULT_CHUNK_SIZE)
+        if not user_ids:
+            break
+        totals = db.execute(
+            select(
+                SessionReport.user_id,
+                func.count(SessionReport.id),
+                *(func.sum(getattr(SessionReport, field)) for field in TOTAL_COLUMNS),
+            )
+            .where(SessionReport.user_id.in_(user_ids))
+            .group_by(SessionReport.user_id)
+        ).all()
+        days: dict[UUID, set] = {}
+        for uid, started_at in db.execute(
+            select(SessionReport.user_id, SessionReport.started_at).where(SessionReport.user_id.in_(user_ids))
+        ):
+            days.setdefault(uid, set()).add(utc_day(started_at))
+
+        rows = []
+        for uid, count, *sums in totals:
+            user_days = sorted(days[uid])
+            current, longest = streaks(user_days)
+            row = {"user_id": uid, "report_count": count, "last_session_date": user_days[-1]}
+            row.update({column: value or 0.0 for column, value in zip(TOTAL_COLUMNS.values(), sums)})
+            row.update({"current_streak_days": current, "longest_streak_days": longest})
+            rows.append(row)
+        db.execute(delete(UserStats).where(UserStats.user_id.in_(user_ids)))
+        if rows:
+            db.execute(insert(UserStats), rows)
+        if dry_run:
+            db.rollback()
+        else:
+            db.commit()
+        result.scanned += len(user_ids)
+        result.changed += len(rows)
+        result.last_id = user_ids[-1]
+        progress(f"user-stats: {result.scanned} users scanned, {result.changed} rebuilt (resume with --after {result.last_id})")
+    return result
+
+
+def rebuild_window_entries(db: Session, user_ids: list[UUID], cutoff: date | None = None) -> int:
+    """Replace the users' leaderboard window entries with ones built from their published reports. Caller commits."""
+    cutoff = cutoff or leaderboard_windows.retention_cutoff()
+    reports = db.execute(
+        select(
+            SessionReport.id,
+            SessionReport.user_id,
+            SessionReport.started_at,
+            SessionReport.zone_in_score,
+            SessionReport.created_at,
+        ).where(
+            SessionReport.user_id.in_(user_ids),
+            SessionReport.published == True,
+            SessionReport.started_at >= datetime.combine(cutoff, time.min, tzinfo=timezone.utc),
+        )
+    ).all()
+    rows = [
+        {
+            "report_id": rid,
+            "user_id": uid,
+            "day": utc_day(started_at),
+            "started_at": started_at,
+            "zone_in_score": score,
+            "created_at": created_at,
+        }
+        for rid, uid, started_at, score, created_at in reports
+    ]
+    db.execute(delete(LeaderboardWindowEntry).where(LeaderboardWindowEntry.user_id.in_(user_ids)))
+    if rows:
+        db.execute(insert(LeaderboardWindowEntry), rows)
+    return len(rows)
+
+
+def rebuild_leaderboard_windows(
+    db: Session,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    after: UUID | None = None,
+    dry_run: bool = False,
+    progress: Progress = print,
+) -> MaintenanceResult:
+    """Compact expired window entries, then rebuild entries per chunk of users from published reports."""
+    result = MaintenanceResult(last_id=after)
+    compacted = leaderboard_windows.compact(db)
+    if dry_run:
+        db.rollback()
+    else:
+        db.commit()
+    progress(f"leaderboard-windows: compacted {compacted} expired entries")
+    cutoff = leaderboard_windows.retention_cutoff()
+    while True:
+        user_ids = _next_user_chunk(db, result.last_id, chunk_size or DEFAULT_CHUNK_SIZE)
+        if not user_ids:
+            break
+        entries = rebuild_window_entries(db, user_ids, cutoff)
+        if dry_run:
+            db.rollback()
+        else:
+            db.commit()
+        result.scanned += len(user_ids)
+        result.changed += entries
+        result.last_id = user_ids[-1]
+        progress(f"leaderboard-windows: {result.scanned} users scanned, {result.changed} entries (resume with --after {result.last_id})")
+    return result
+
+
+def _next_report_chunk(db: Session, after: UUID | None, chunk_size: int, *where) -> list[UUID]:
+    q = select(SessionReport.id).where(*where).order_by(SessionReport.id).limit(chunk_size)
+    if after is not None:
+        q = q.where(SessionReport.id > after)
+    return list(db.execute(q).scalars().all())
+
+
+def archive_timelines(
+    db: Session,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    after: UUID | None = None,
+    dry_run: bool = False,
+    progress: Progress = print,
+) -> MaintenanceResult:
+    """Move timelines of reports started over TIMELINE_ARCHIVE_AFTER_DAYS ago into timeline_archive."""
+    result = MaintenanceResult(last_id=after)
+    older_than = timeline_archive.cutoff(settings.timeline_archive_after_days)
+    raw_total = stored_total = 0
+    while True:
+        report_ids = _next_report_chunk(
+            db, result.last_id, chunk_size or DEFAULT_CHUNK_SIZE,
+            SessionReport.started_at < older_than,
+            SessionReport.timeline_archived == False,
+            SessionReport.timeline_buckets_json.is_not(None),
+        )
+        if not report_ids:
+            break
+        raw, stored = timeline_archive.archive_reports(db, report_ids)
+        if dry_run:
+            db.rollback()
+        else:
+            db.commit()
+        raw_total, stored_total = raw_total + raw, stored_total + stored
+        result.scanned += len(report_ids)
+        result.changed += len(report_ids)
+        result.last_id = report_ids[-1]
+        progress(
+            f"archive-timelines: {result.changed} archived, {raw_total - stored_total} bytes reclaimed "
+            f"(resume with --after {result.last_id})"
+        )
+    result.details.append(f"raw_bytes={raw_total} compressed_bytes={stored_total}")
+    return result
+
+
+def restore_timelines(
+    db: Session,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    after: UUID | None = None,
+    dry_run: bool = False,
+    progress: Progress = print,
+) -> MaintenanceResult:
+    """Move every archived timeline back into session_reports (e.g. before downgrading)."""
+    result = MaintenanceResult(last_id=after)
+    while True:
+        report_ids = _next_report_chunk(db, result.last_id, chunk_size or DEFAULT_CHUNK_SIZE, SessionReport.timeline_archived == True)
+        if not report_ids:
+            break
+        restored = timeline_archive.restore_reports(db, report_ids)
+        if dry_run:
+            db.rollback()
+        else:
+            db.commit()
+        result.scanned += len(report_ids)
+        result.changed += restored
+        result.last_id = report_ids[-1]
+        progress(f"restore-timelines: {result.changed} restored (resume with --after {result.last_id})")
+    return result
+
+
+def create_report_partitions(
+    db: Session,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    after: UUID | None = None,
+    dry_run: bool = False,
+    progress: Progress = print,
+) -> MaintenanceResult:
+    """Create session_reports partitions for the next PARTITION_MONTHS_AHEAD months (Postgres, if partitioned)."""
+    created = partitions.ensure_partitions(db.connection())
+    if dry_run:
+        db.rollback()
+    else:
+        db.commit()
+    progress(f"partitions: created {', '.join(created) or 'none'}")
+    return MaintenanceResult(changed=len(created), details=created)
+
+
+def prune_tombstones(
+    db: Session,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    after: UUID | None = None,
+    dry_run: bool = False,
+    progress: Progress = print,
+) -> MaintenanceResult:
+    """Drop sync tombstones older than TOMBSTONE_RETENTION_DAYS; older change tokens then get a reset."""
+    result = MaintenanceResult(last_id=after)
+    before = timeline_archive.cutoff(settings.tombstone_retention_days)
+    while True:
+        user_ids = _next_user_chunk(db, result.last_id, chunk_size or DEFAULT_CHUNK_SIZE)
+        if not user_ids:
+            break
+        removed = report_sync.prune_tombstones(db, user_ids, before)
+        if dry_run:
+            db.rollback()
+        else:
+            db.commit()
+        result.scanned += len(user_ids)
+        result.changed += removed
+        result.last_id = user_ids[-1]
+        progress(f"tombstones: {result.scanned} users scanned, {result.changed} pruned (resume with --after {result.last_id})")
+    return result
+
+
+def prune_idempotency_keys(
+    db: Session,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    after: UUID | None = None,
+    dry_run: bool = False,
+    progress: Progress = print,
+) -> MaintenanceResult:
+    """Delete idempotency_keys rows older than IDEMPOTENCY_TTL_SEC (IDEMPOTENCY_STORE=db)."""
+    removed = idempotency.prune(db)
+    if dry_run:
+        db.rollback()
+    else:
+        db.commit()
+    progress(f"idempotency-keys: {removed} expired keys deleted")
+    return MaintenanceResult(changed=removed)
+
+
+def retry_dead_tasks(
+    db: Session,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    after: UUID | None = None,
+    dry_run: bool = False,
+    progress: Progress = print,
+) -> MaintenanceResult:
+    """Reset outbox tasks that used up their attempts; running workers pick them up on their next retry pass."""
+    revived = tasks.revive_dead(db)
+    if dry_run:
+        db.rollback()
+    else:
+        db.commit()
+    progress(f"retry-dead-tasks: {revived} dead outbox tasks queued for retry")
+    return MaintenanceResult(changed=revived)
+
+
+# name -> (description, runner). Runners take (db, chunk_size=, after=, progress=) plus
+# dry_run= for writing tasks; new derived columns register here to get a CLI subcommand.
+# The CLI offers --chunk-size/--after only for tasks not in UNCHUNKED_TASKS.
+TASKS: dict[str, tuple[str, Callable[..., MaintenanceResult]]] = {
+    "max-scores": ("Backfill users.max_zone_in_score from session_reports", backfill_max_scores),
+    "verify-max-scores": ("Report users whose max_zone_in_score is out of date", verify_max_scores),
+    "usernames": ("Generate usernames for users without one", backfill_usernames),
+    "user-stats": ("Rebuild user_stats (totals, streaks) from session_reports", backfill_user_stats),
+    "leaderboard-windows": ("Compact and rebuild day/week/month leaderboard entries", rebuild_leaderboard_windows),
+    "archive-timelines": ("Compress old timelines into timeline_archive", archive_timelines),
+    "restore-timelines": ("Move archived timelines back into session_reports", restore_timelines),
+    "tombstones": ("Prune sync tombstones older than TOMBSTONE_RETENTION_DAYS", prune_tombstones),
+    "idempotency-keys": ("Delete expired Idempotency-Key responses (IDEMPOTENCY_STORE=db)", prune_idempotency_keys),
+    "partitions": ("Create upcoming monthly session_reports partitions (Postgres)", create_report_partitions),
+    "retry-dead-tasks": ("Give dead-lettered outbox tasks another MAX_ATTEMPTS (see /health/tasks outbox_dead)", retry_dead_tasks),
+}
+READ_ONLY_TASKS = {"verify-max-scores"}
+UNCHUNKED_TASKS = {"partitions", "idempotency-keys", "retry-dead-tasks"}
@@ -0,0 +1,92 @@
+"""Reaction set/clear as single upserts/deletes that also return the report's live counts.
+
+Setting a reaction is ``INSERT ... SELECT ... FROM session_reports WHERE published ON
+CONFLICT (user_id, report_id) DO UPDATE``: the published check is part of the statement
+and concurrent taps by the same user can't trip ``uq_reactions_user_report``. On
+Postgres the write runs in a CTE and the same statement returns the per-emoji counts
+(one round-trip); a CTE's own write isn't visible to the outer query, so counts are
+taken over the other users' reactions plus the returned row. SQLite has no data-modifying
+CTEs, so it runs the write (with RETURNING) and a grouped count in one transaction.
+"""
+import uuid
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import delete, func, literal, select, true
+from sqlalchemy.orm import Session
+
+from app.models.reaction import Reaction
+from app.models.session_report import SessionReport
+
+
+def _insert(db: Session):
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(Reaction)
+
+
+def _others_counts(report_id: UUID, user_id: UUID):
+    return (
+        select(Reaction.emoji, func.count().label("n"))
+        .where(Reaction.report_id == report_id, Reaction.user_id != user_id)
+        .group_by(Reaction.emoji)
+    )
+
+
+def _with_counts(db: Session, write_cte, report_id: UUID, user_id: UUID) -> tuple[list[str], dict[str, int]]:
+    """Postgres: run the write CTE and read (rows it returned, other users' counts) in one statement."""
+    written = select(func.array_agg(write_cte.c.emoji).label("emojis")).subquery()
+    others = _others_counts(report_id, user_id).subquery()
+    rows = db.execute(
+        select(written.c.emojis, others.c.emoji, others.c.n).select_from(written.outerjoin(others, true()))
+    ).all()
+    emojis = (rows[0][0] if rows else None) or []
+    return emojis, {emoji: n for _, emoji, n in rows if emoji is not None}
+
+
+def set_reaction(db: Session, user_id: UUID, report_id: UUID, emoji: str) -> dict[str, int] | None:
+    """Add or change the user's reaction on a published report and commit.
+
+    Returns the report's counts per emoji, or None if the report doesn't exist or isn't published.
+    """
+    source = select(
+        literal(uuid.uuid4(), Reaction.id.type),
+        literal(user_id, Reaction.user_id.type),
+        SessionReport.id,
+        literal(emoji, Reaction.emoji.type),
+        literal(datetime.utcnow(), Reaction.created_at.type),
+    ).where(SessionReport.id == report_id, SessionReport.published == True)
+    stmt = _insert(db).from_select(["id", "user_id", "report_id", "emoji", "created_at"], source)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "report_id"],
+        set_={"emoji": stmt.excluded.emoji},
+    ).returning(Reaction.emoji)
+
+    if db.get_bind().dialect.name == "postgresql":
+        written, counts = _with_counts(db, stmt.cte("written"), report_id, user_id)
+    else:
+        written = list(db.execute(stmt).scalars())
+        counts = dict(db.execute(_others_counts(report_id, user_id)).all()) if written else {}
+    if not written:
+        db.rollback()
+        return None
+    db.commit()
+    counts[emoji] = counts.get(emoji, 0) + 1
+    return counts
+
+
+def clear_reaction(db: Session, user_id: UUID, report_id: UUID) -> dict[str, int] | None:
+    """Remove the user's reaction and commit. Returns the remaining counts, or None if there was none."""
+    stmt = delete(Reaction).where(Reaction.user_id == user_id, Reaction.report_id == report_id).returning(Reaction.emoji)
+    if db.get_bind().dialect.name == "postgresql":
+        removed, counts = _with_counts(db, stmt.cte("removed"), report_id, user_id)
+    else:
+        removed = list(db.execute(stmt).scalars())
+        counts = dict(db.execute(_others_counts(report_id, user_id)).all()) if removed else {}
+    if not removed:
+        db.rollback()
+        return None
+    db.commit()
+    return counts
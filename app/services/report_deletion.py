@@ -0,0 +1,139 @@
+"""Chunked, background deletion of session reports.
+
+Reports are deleted in keyset order (by id) a chunk at a time, each chunk in its own
+short transaction, so a large delete never holds locks or WAL for the whole table.
+Job status lives in an in-memory store (like OAuth state), expired after an hour. It is
+per process: with several workers, a ``GET /reports/deletions/{job_id}`` that reaches a
+worker other than the one running the job gets 404, so route polls back to it (sticky
+sessions) or run a single worker.
+"""
+import logging
+import secrets
+import time
+from dataclasses import dataclass
+from typing import Callable
+from uuid import UUID
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.reaction import Reaction
+from app.models.session_report import SessionReport
+from app.models.user_stats import UserStats
+from app.services import heatmap, leaderboard_events, leaderboard_windows, report_sync, session_keys, timeline_archive
+from app.services.user_stats import recompute_user_stats
+
+logger = logging.getLogger(__name__)
+
+_TTL_SEC = 3600  # keep finished jobs around for an hour
+
+
+@dataclass
+class DeletionJob:
+    id: str
+    user_id: UUID | None
+    status: str = "pending"  # pending | running | done | failed
+    deleted: int = 0
+    error: str | None = None
+    created_at: float = 0.0
+    finished_at: float | None = None
+
+
+_jobs: dict[str, DeletionJob] = {}
+
+
+def _expire_jobs() -> None:
+    now = time.monotonic()
+    for job_id in [j.id for j in _jobs.values() if j.finished_at is not None and now - j.finished_at > _TTL_SEC]:
+        del _jobs[job_id]
+
+
+def create_job(user_id: UUID | None) -> DeletionJob:
+    _expire_jobs()
+    job = DeletionJob(id=secrets.token_urlsafe(16), user_id=user_id, created_at=time.monotonic())
+    _jobs[job.id] = job
+    return job
+
+
+def get_job(job_id: str) -> DeletionJob | None:
+    return _jobs.get(job_id)
+
+
+def delete_reports_chunked(
+    db: Session,
+    user_id: UUID | None,
+    chunk_size: int,
+    on_chunk: Callable[[int], None] | None = None,
+) -> int:
+    """Delete all reports (of one user, or everyone's if user_id is None) chunk by chunk.
+
+    Reactions, leaderboard window entries and archived timelines are deleted explicitly
+    with their reports, since SQLite doesn't enforce ON DELETE CASCADE unless foreign keys
+    are switched on. Each deleted report leaves a sync tombstone in the same transaction,
+    and published ones are announced as ``removed`` to leaderboard stream subscribers once
+    their chunk commits. User stats are rebuilt once at the end from whatever reports
+    remain; stats tasks still queued for a deleted report rebuild them again instead of
+    applying it (apply_report_change).
+    """
+    total = 0
+    last_id: UUID | None = None
+    while True:
+        q = (
+            select(SessionReport.id, SessionReport.user_id, SessionReport.session_id, SessionReport.published)
+            .order_by(SessionReport.id)
+            .limit(chunk_size)
+        )
+        if user_id is not None:
+            q = q.where(SessionReport.user_id == user_id)
+        if last_id is not None:
+            q = q.where(SessionReport.id > last_id)
+        rows = db.execute(q).all()
+        if not rows:
+            break
+        ids = [row.id for row in rows]
+        report_sync.record_deletions(db, [(row.id, row.user_id, row.session_id) for row in rows])
+        db.execute(delete(Reaction).where(Reaction.report_id.in_(ids)))
+        leaderboard_windows.remove_reports(db, ids)
+        timeline_archive.discard(db, ids)
+        if settings.partition_reports:
+            session_keys.release(db, ids)
+        total += db.execute(delete(SessionReport).where(SessionReport.id.in_(ids))).rowcount
+        db.commit()
+        for row in rows:
+            if row.published:
+                leaderboard_events.report_removed(row.id)
+        last_id = ids[-1]
+        if on_chunk:
+            on_chunk(total)
+    if user_id is not None:
+        recompute_user_stats(db, user_id)
+    else:
+        db.execute(delete(UserStats))
+    db.commit()
+    heatmap.invalidate(user_id)
+    return total
+
+
+def run_job(job_id: str, session_factory: Callable[[], Session], chunk_size: int) -> None:
+    """Execute a deletion job; meant to run as a background task after the response."""
+    job = _jobs.get(job_id)
+    if job is None:
+        return
+    job.status = "running"
+    db = session_factory()
+    try:
+        def _progress(n: int) -> None:
+            job.deleted = n
+
+        job.deleted = delete_reports_chunked(db, job.user_id, chunk_size, on_chunk=_progress)
+        job.status = "done"
+        logger.info("Deletion job %s user_id=%s -> %d deleted", job.id, job.user_id, job.deleted)
+    except Exception as e:
+        db.rollback()
+        job.status = "failed"
+        job.error = str(e)
+        logger.exception("Deletion job %s user_id=%s failed after %d deleted", job.id, job.user_id, job.deleted)
+    finally:
+        job.finished_at = time.monotonic()
+        db.close()
@@ -0,0 +1,156 @@
+"""Serialization of report rows for bulk export (NDJSON, CSV, Parquet).
+
+Each serializer consumes an iterator of output dicts (``_to_out`` rows) and yields
+encoded chunks, so an export streams in constant memory however many reports there
+are. Parquet needs the optional ``pyarrow`` dependency (``pip install .[export]``).
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, Iterable, Iterator
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+COLUMNS = (
+    "id",
+    "session_id",
+    "started_at",
+    "ended_at",
+    "duration_sec",
+    "focused_sec",
+    "distracted_sec",
+    "neutral_sec",
+    "snoozed_sec",
+    "zone_in_score",
+    "cloud_ai_enabled",
+    "published",
+    "created_at",
+)
+TIMELINE_COLUMN = "timeline_buckets_json"
+
+_ROWS_PER_CHUNK = 500
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def columns(include_timeline: bool) -> tuple[str, ...]:
+    return COLUMNS + (TIMELINE_COLUMN,) if include_timeline else COLUMNS
+
+
+def _json_default(o: Any) -> Any:
+    if isinstance(o, datetime):
+        return o.isoformat()
+    return str(o)
+
+
+def _batches(rows: Iterable[dict], size: int = _ROWS_PER_CHUNK) -> Iterator[list[dict]]:
+    batch: list[dict] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_ndjson(rows: Iterable[dict], include_timeline: bool) -> Iterator[bytes]:
+    """One JSON object per line; with include_timeline the buckets are decoded into ``timeline_buckets``."""
+    for batch in _batches(rows):
+        lines = []
+        for row in batch:
+            out = {c: row[c] for c in COLUMNS}
+            if include_timeline:
+                raw = row.get(TIMELINE_COLUMN)
+                try:
+                    out["timeline_buckets"] = json.loads(raw) if raw else []
+                except ValueError:
+                    out["timeline_buckets"] = []
+            lines.append(json.dumps(out, default=_json_default))
+        yield ("\n".join(lines) + "\n").encode()
+
+
+def iter_csv(rows: Iterable[dict], include_timeline: bool) -> Iterator[bytes]:
+    """Header plus one line per report; the timeline stays a JSON string column."""
+    cols = columns(include_timeline)
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(cols)
+    for batch in _batches(rows):
+        for row in batch:
+            writer.writerow([row[c].isoformat() if isinstance(row[c], datetime) else row[c] for c in cols])
+        yield buf.getvalue().encode()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands written bytes back to the generator instead of storing them."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b: Any) -> int:
+        data = bytes(b)
+        self._chunks.append(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def drain(self) -> bytes:
+        out, self._chunks = b"".join(self._chunks), []
+        return out
+
+
+def iter_parquet(rows: Iterable[dict], include_timeline: bool) -> Iterator[bytes]:
+    """One row group per chunk of rows, flushed as it is written."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    ts = pa.timestamp("us", tz="UTC")
+    types = {
+        "id": pa.string(),
+        "session_id": pa.string(),
+        "started_at": ts,
+        "ended_at": ts,
+        "duration_sec": pa.float64(),
+        "focused_sec": pa.float64(),
+        "distracted_sec": pa.float64(),
+        "neutral_sec": pa.float64(),
+        "snoozed_sec": pa.float64(),
+        "zone_in_score": pa.float64(),
+        "cloud_ai_enabled": pa.bool_(),
+        "published": pa.bool_(),
+        "created_at": ts,
+        TIMELINE_COLUMN: pa.string(),
+    }
+    cols = columns(include_timeline)
+    schema = pa.schema([(c, types[c]) for c in cols])
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for batch in _batches(rows):
+            writer.write_batch(pa.RecordBatch.from_pylist([{c: row[c] for c in cols} for row in batch], schema=schema))
+            yield sink.drain()
+    yield sink.drain()
+
+
+SERIALIZERS = {"ndjson": iter_ndjson, "csv": iter_csv, "parquet": iter_parquet}
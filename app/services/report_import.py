@@ -0,0 +1,223 @@
+"""Bulk import of a user's reports from an export file (NDJSON or CSV).
+
+Rows are validated like ``POST /reports`` bodies and written in batches, one transaction
+per batch, so a large file never holds a long transaction and a bad row only fails
+itself: sessions the user already has are updated by id, new ones inserted with an
+upsert on ``uq_session_reports_user_session``. Derived data (max score,
+stats, leaderboard entries) is rebuilt once for the user when the import finishes
+instead of per row.
+"""
+import csv
+import json
+import logging
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any
+from uuid import UUID
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import and_, bindparam, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.session_report import PARTITION_COLUMNS, SessionReport
+from app.services import heatmap, report_sync, session_keys, timeline_archive
+from app.services.maintenance import rebuild_window_entries, refresh_max_scores
+from app.services.user_stats import recompute_user_stats
+
+logger = logging.getLogger(__name__)
+
+MAX_ERRORS = 1000  # rows failing beyond this are counted but not itemized
+
+# Columns an import overwrites on conflict (created_at and id keep their original values)
+_UPDATE_COLUMNS = (
+    "started_at",
+    "ended_at",
+    "duration_sec",
+    "focused_sec",
+    "distracted_sec",
+    "neutral_sec",
+    "snoozed_sec",
+    "zone_in_score",
+    "timeline_buckets_json",
+    "cloud_ai_enabled",
+)
+
+
+@dataclass
+class ImportResult:
+    received: int = 0
+    imported: int = 0
+    failed: int = 0
+    errors: list[dict] = field(default_factory=list)  # {"line": n, "error": "..."}
+
+    def fail(self, line: int, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append({"line": line, "error": error})
+
+
+def parse_ndjson(line: str) -> dict:
+    row = json.loads(line)
+    if not isinstance(row, dict):
+        raise ValueError("expected a JSON object")
+    return row
+
+
+class CsvRows:
+    """Parses CSV one line at a time; the first line is the header."""
+
+    def __init__(self) -> None:
+        self.header: list[str] | None = None
+
+    def parse(self, line: str) -> dict | None:
+        values = next(csv.reader([line]))
+        if self.header is None:
+            self.header = values
+            return None
+        if len(values) != len(self.header):
+            raise ValueError(f"expected {len(self.header)} columns, got {len(values)}")
+        # Empty cells are missing values (e.g. no timeline)
+        return {k: v for k, v in zip(self.header, values) if v != ""}
+
+
+def _utc(dt: datetime) -> datetime:
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def _insert(db: Session):
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(SessionReport)
+
+
+class ReportImporter:
+    """Collects raw rows; ``flush`` validates them against ``schema`` (the POST /reports body)
+    and upserts them in one transaction."""
+
+    def __init__(self, db: Session, user_id: UUID, schema: type[BaseModel]):
+        self.db = db
+        self.user_id = user_id
+        self.schema = schema
+        self.result = ImportResult()
+        self._pending: list[tuple[int, dict]] = []
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def add(self, line: int, row: dict) -> None:
+        self.result.received += 1
+        self._pending.append((line, row))
+
+    def _values(self, row: dict) -> dict:
+        row = dict(row)
+        if "timeline_buckets" in row:  # decoded form from NDJSON exports
+            row["timeline_buckets_json"] = json.dumps(row.pop("timeline_buckets"))
+        body = self.schema.model_validate(row)
+        values = body.model_dump(include={"session_id", *_UPDATE_COLUMNS})
+        values["started_at"] = _utc(body.started_at)
+        values["ended_at"] = _utc(body.ended_at)
+        if "published" in row:
+            values["published"] = str(row["published"]).lower() in ("true", "1")
+        return values
+
+    def flush(self) -> None:
+        """Upsert the pending rows (last one wins per session_id) and commit."""
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        by_session: dict[str, tuple[int, dict]] = {}
+        for line, row in batch:
+            try:
+                values = self._values(row)
+            except ValidationError as e:
+                self.result.fail(line, "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()))
+                continue
+            except (TypeError, ValueError) as e:
+                self.result.fail(line, str(e))
+                continue
+            by_session[values["session_id"]] = (line, values)
+        if not by_session:
+            return
+        now = datetime.utcnow()
+        rows = [
+            {"id": uuid.uuid4(), "user_id": self.user_id, "created_at": now, "published": False, "timeline_archived": False, **values}
+            for _, values in by_session.values()
+        ]
+        try:
+            # One block of sync sequence values for the batch, one per row
+            first = report_sync.next_seq(self.db, self.user_id, len(rows)) - len(rows) + 1
+            for i, r in enumerate(rows):
+                r["change_seq"], r["updated_at"] = first + i, now
+            # Sessions the user already has are updated by id: with PARTITION_REPORTS the
+            # conflict key includes started_at, so a moved session wouldn't conflict, and the
+            # session keys say which report owns each session (app/services/session_keys.py)
+            if settings.partition_reports:
+                owners = session_keys.claim(self.db, self.user_id, {r["session_id"]: r["id"] for r in rows})
+                owned = SessionReport.id.in_([owners[r["session_id"]] for r in rows if owners[r["session_id"]] != r["id"]])
+            else:
+                owned = and_(SessionReport.user_id == self.user_id, SessionReport.session_id.in_(list(by_session)))
+            existing = {
+                session_id: (report_id, archived)
+                for report_id, session_id, archived in self.db.execute(
+                    select(SessionReport.id, SessionReport.session_id, SessionReport.timeline_archived).where(owned)
+                )
+            }
+            # An imported timeline replaces any archived copy
+            timeline_archive.discard(self.db, [report_id for report_id, archived in existing.values() if archived])
+            table = SessionReport.__table__
+            # Rows with a published flag set it; rows without one keep the stored flag.
+            for with_published in (True, False):
+                group = [r for r, (_, v) in zip(rows, by_session.values()) if ("published" in v) == with_published]
+                columns = _UPDATE_COLUMNS + ("timeline_archived", "change_seq", "updated_at") + (("published",) if with_published else ())
+                updates = [r for r in group if r["session_id"] in existing]
+                if updates:
+                    self.db.execute(
+                        update(table).where(table.c.id == bindparam("report_id")).values({c: bindparam(f"v_{c}") for c in columns}),
+                        [{"report_id": existing[r["session_id"]][0], **{f"v_{c}": r[c] for c in columns}} for r in updates],
+                    )
+                inserts = [r for r in group if r["session_id"] not in existing]
+                if not inserts:
+                    continue
+                # New sessions; the conflict clause covers one created concurrently
+                stmt = _insert(self.db).values(inserts)
+                stmt = stmt.on_conflict_do_update(
+                    # (user_id, session_id), plus started_at when partitioned (app/core/partitions.py)
+                    index_elements=list(PARTITION_COLUMNS),
+                    set_={c: stmt.excluded[c] for c in columns},
+                )
+                self.db.execute(stmt)
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            logger.warning("Import batch failed for user_id=%s: %s", self.user_id, e)
+            for line, _ in by_session.values():
+                self.result.fail(line, f"database error: {e.__class__.__name__}")
+            return
+        self.result.imported += len(rows)
+
+    def finish(self) -> ImportResult:
+        """Flush the rest, then rebuild the user's derived data once."""
+        self.flush()
+        if self.result.imported:
+            refresh_max_scores(self.db, [self.user_id], raise_only=True)
+            recompute_user_stats(self.db, self.user_id)
+            rebuild_window_entries(self.db, [self.user_id])
+            self.db.commit()
+            heatmap.invalidate(self.user_id)
+        logger.info(
+            "Import user_id=%s: %d received, %d imported, %d failed",
+            self.user_id, self.result.received, self.result.imported, self.result.failed,
+        )
+        return self.result
+
+
+def parse_row(fmt: str, csv_rows: CsvRows, line: str) -> dict[str, Any] | None:
+    """One text line -> raw row (None for blank lines and the CSV header)."""
+    if not line.strip():
+        return None
+    return parse_ndjson(line) if fmt == "ndjson" else csv_rows.parse(line)
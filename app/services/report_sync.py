@@ -0,0 +1,121 @@
+"""Incremental sync: per-user change sequences, tombstones and the changes feed.
+
+Every client-visible change to a user's reports takes the next value of
+``users.change_seq`` (an ``UPDATE ... RETURNING``, which also row-locks the user until
+commit, so a user's changes commit in sequence order) and stores it on the report, or
+on a ``report_tombstones`` row when the report is deleted. A change token is the last
+sequence the client has seen (values are unique per user, so it is an exact cursor); ``GET /reports/changes?since=<token>`` returns what has
+a higher one, off the ``(user_id, change_seq)`` indexes. When nothing changed the
+user's own ``change_seq`` already says so and no report index is touched.
+
+Tombstones older than ``TOMBSTONE_RETENTION_DAYS`` are pruned; a token from before the
+pruned range gets ``reset`` and the client does a full sync (no token).
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterable
+from uuid import UUID
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models.report_tombstone import ReportTombstone
+from app.models.session_report import SessionReport
+from app.models.user import User
+
+
+def next_seq(db: Session, user_id: UUID, n: int = 1) -> int:
+    """Reserve n sequence values for the user; returns the last (the first is this - n + 1)."""
+    seq = db.execute(
+        update(User).where(User.id == user_id).values(change_seq=User.change_seq + n).returning(User.change_seq)
+    ).scalar_one_or_none()
+    return seq or 0
+
+
+def stamp(db: Session, report: SessionReport) -> None:
+    """Mark a report as changed in the caller's transaction."""
+    report.change_seq = next_seq(db, report.user_id)
+    report.updated_at = datetime.utcnow()
+
+
+def record_deletions(db: Session, rows: Iterable[tuple[UUID, UUID, str]]) -> None:
+    """Tombstones for (report id, user id, session id) about to be deleted. Caller commits."""
+    by_user: dict[UUID, list[tuple[UUID, str]]] = {}
+    for report_id, user_id, session_id in rows:
+        by_user.setdefault(user_id, []).append((report_id, session_id))
+    now = datetime.utcnow()
+    for user_id, reports in by_user.items():
+        first = next_seq(db, user_id, len(reports)) - len(reports) + 1
+        db.execute(insert(ReportTombstone), [
+            {"report_id": rid, "user_id": user_id, "session_id": sid, "change_seq": first + i, "deleted_at": now}
+            for i, (rid, sid) in enumerate(reports)
+        ])
+
+
+def parse_token(token: str | None) -> int | None:
+    if token is None or token == "":
+        return None
+    if not token.isdigit():
+        raise ValueError("Invalid change token")
+    return int(token)
+
+
+@dataclass
+class Changes:
+    reports: list[SessionReport] = field(default_factory=list)
+    deleted: list[ReportTombstone] = field(default_factory=list)
+    token: int = 0  # pass back as since= on the next call
+    has_more: bool = False
+    reset: bool = False  # since is older than the retained tombstones (or unknown): full sync needed
+
+
+def changes_since(db: Session, user_id: UUID, since: int | None, limit: int) -> Changes:
+    """Reports changed and deleted after `since` (everything current if None), in sequence order."""
+    current, pruned = db.execute(
+        select(User.change_seq, User.tombstones_pruned_seq).where(User.id == user_id)
+    ).one_or_none() or (0, 0)
+    if since is not None and (since < pruned or since > current):
+        return Changes(token=current, reset=True)
+    if since is not None and since >= current:
+        return Changes(token=since)
+
+    q = select(SessionReport).where(SessionReport.user_id == user_id)
+    if since is not None:
+        q = q.where(SessionReport.change_seq > since)
+    reports = list(db.execute(q.order_by(SessionReport.change_seq, SessionReport.id).limit(limit + 1)).scalars())
+    deleted: list[ReportTombstone] = []
+    if since is not None:  # a full sync has nothing to delete
+        deleted = list(db.execute(
+            select(ReportTombstone)
+            .where(ReportTombstone.user_id == user_id, ReportTombstone.change_seq > since)
+            .order_by(ReportTombstone.change_seq)
+            .limit(limit + 1)
+        ).scalars())
+
+    # Merge by sequence and cut at `limit`; the token is the last sequence included
+    merged = sorted([(r.change_seq, r) for r in reports] + [(t.change_seq, t) for t in deleted], key=lambda x: x[0])
+    has_more = len(merged) > limit
+    merged = merged[:limit]
+    token = merged[-1][0] if has_more else max(current, since or 0)
+    out = Changes(token=token, has_more=has_more)
+    for _, item in merged:
+        (out.reports if isinstance(item, SessionReport) else out.deleted).append(item)
+    return out
+
+
+def prune_tombstones(db: Session, user_ids: list[UUID], before: datetime) -> int:
+    """Delete these users' tombstones older than `before` and raise their pruned floor. Caller commits."""
+    floors = db.execute(
+        select(ReportTombstone.user_id, func.max(ReportTombstone.change_seq))
+        .where(ReportTombstone.user_id.in_(user_ids), ReportTombstone.deleted_at < before)
+        .group_by(ReportTombstone.user_id)
+    ).all()
+    if not floors:
+        return 0
+    removed = 0
+    for user_id, floor in floors:
+        db.execute(update(User).where(User.id == user_id).values(tombstones_pruned_seq=floor))
+        removed += db.execute(
+            delete(ReportTombstone).where(ReportTombstone.user_id == user_id, ReportTombstone.change_seq <= floor)
+        ).rowcount
+    return removed
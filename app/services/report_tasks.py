@@ -0,0 +1,59 @@
+"""Post-write derived-data tasks for session reports, run by the background pipeline."""
+import logging
+from datetime import date
+from uuid import UUID
+
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session
+
+from app.core.tasks import task
+from app.models.session_report import SessionReport
+from app.models.user import User
+from app.services import leaderboard_windows, user_profiles
+from app.services.user_stats import ReportSnapshot, apply_report_change
+
+logger = logging.getLogger(__name__)
+
+
+def snapshot_payload(s: ReportSnapshot | None) -> dict | None:
+    if s is None:
+        return None
+    return {**s.__dict__, "day": s.day.isoformat()}
+
+
+def _snapshot(payload: dict | None) -> ReportSnapshot | None:
+    if payload is None:
+        return None
+    return ReportSnapshot(**{**payload, "day": date.fromisoformat(payload["day"])})
+
+
+@task("update_max_score")
+def update_max_score(db: Session, payload: dict) -> None:
+    """Raise users.max_zone_in_score if the new score is higher (a single conditional UPDATE)."""
+    user_id, score = UUID(payload["user_id"]), payload["score"]
+    n = db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .where(or_(User.max_zone_in_score.is_(None), User.max_zone_in_score < score))
+        .values(max_zone_in_score=score)
+    ).rowcount
+    if n:
+        user_profiles.invalidate_on_commit(db, [user_id])
+        logger.info("Updated max_zone_in_score for user_id=%s -> %s", user_id, score)
+
+
+@task("apply_user_stats")
+def apply_user_stats(db: Session, payload: dict) -> None:
+    apply_report_change(
+        db, UUID(payload["user_id"]), _snapshot(payload["old"]), _snapshot(payload["new"]), UUID(payload["report_id"])
+    )
+
+
+@task("sync_leaderboard_entry")
+def sync_leaderboard_entry(db: Session, payload: dict) -> None:
+    report = db.get(SessionReport, UUID(payload["report_id"]))
+    if report is None:
+        leaderboard_windows.remove_reports(db, [UUID(payload["report_id"])])
+    else:
+        leaderboard_windows.sync_report(db, report)
+    leaderboard_windows.compact(db)
@@ -0,0 +1,64 @@
+"""Per-user session_id ownership for a partitioned session_reports.
+
+A partitioned table can't have unique ``(user_id, session_id)`` (app/core/partitions.py),
+so with ``PARTITION_REPORTS=true`` writers first claim the session in
+``report_session_keys``. The claim takes a row lock on the key, so two uploads of the same
+session serialize there and the second one updates the report the first created instead
+of inserting another row under a different ``started_at``. Without partitioning the unique
+constraint on session_reports does this and nothing here is called.
+"""
+from uuid import UUID
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from app.models.report_session_key import ReportSessionKey
+from app.models.session_report import SessionReport
+
+
+def _insert(db: Session):
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(ReportSessionKey)
+
+
+def claim(db: Session, user_id: UUID, wanted: dict[str, UUID]) -> dict[str, UUID]:
+    """Claim session_id -> new report id for each session, locking the keys until commit.
+
+    Returns the report id that owns each session: the wanted id if the session was free (or
+    its report is gone), otherwise the existing report's id. Caller commits.
+    """
+    if not wanted:
+        return {}
+    db.execute(
+        _insert(db)
+        .values([{"user_id": user_id, "session_id": s, "report_id": r} for s, r in wanted.items()])
+        .on_conflict_do_nothing()
+    )
+    rows = db.execute(
+        select(ReportSessionKey.session_id, ReportSessionKey.report_id, SessionReport.id)
+        .outerjoin(SessionReport, SessionReport.id == ReportSessionKey.report_id)
+        .where(ReportSessionKey.user_id == user_id, ReportSessionKey.session_id.in_(list(wanted)))
+        .with_for_update(of=ReportSessionKey)
+    ).all()
+    owners = {}
+    orphaned = []
+    for session_id, report_id, live_id in rows:
+        if live_id is None and report_id != wanted[session_id]:
+            orphaned.append(session_id)  # report deleted without releasing its key
+            report_id = wanted[session_id]
+        owners[session_id] = report_id
+    for session_id in orphaned:
+        db.execute(
+            update(ReportSessionKey)
+            .where(ReportSessionKey.user_id == user_id, ReportSessionKey.session_id == session_id)
+            .values(report_id=wanted[session_id])
+        )
+    return owners
+
+
+def release(db: Session, report_ids: list[UUID]) -> None:
+    """Drop the keys of deleted reports. Caller commits."""
+    db.execute(delete(ReportSessionKey).where(ReportSessionKey.report_id.in_(report_ids)))
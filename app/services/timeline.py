@@ -0,0 +1,132 @@
+"""Decoding and resampling of report timelines (``timeline_buckets_json``).
+
+Buckets are turned into NumPy arrays once and resampled with cumulative per-state
+time: sample the running total of each state's seconds at the segment edges with
+``np.interp`` and difference it. Cost is O(buckets + points), independent of how many
+buckets fall into each segment. NumPy is imported on first use to keep it off the
+startup path.
+"""
+import json
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+from uuid import UUID
+
+logger = logging.getLogger(__name__)
+
+STATES = ("focused", "distracted", "neutral", "snoozed")
+_STATE_INDEX = {s: i for i, s in enumerate(STATES)}
+
+_CACHE_MAX = 2048
+
+
+@dataclass
+class Buckets:
+    """Timeline buckets sorted by start, with overlaps trimmed. ``state`` indexes STATES."""
+    start: Any  # np.ndarray[float64], unix seconds
+    end: Any  # np.ndarray[float64]
+    state: Any  # np.ndarray[int8]
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+
+def decode_buckets(timeline_json: str | None) -> Buckets:
+    """Parse timeline_buckets_json; malformed JSON or entries are skipped (logged)."""
+    import numpy as np
+
+    items: list = []
+    if timeline_json:
+        try:
+            items = json.loads(timeline_json)
+        except ValueError as e:
+            logger.warning("Malformed timeline_buckets_json: %s", e)
+        if not isinstance(items, list):
+            items = []
+    rows = []
+    for b in items:
+        try:
+            rows.append((float(b["bucket_start_ts"]), float(b["bucket_duration_sec"]), _STATE_INDEX[b["state"]]))
+        except (KeyError, TypeError, ValueError):
+            continue
+    if not rows:
+        empty = np.empty(0)
+        return Buckets(empty, empty, np.empty(0, dtype=np.int8))
+    arr = np.array(rows, dtype=np.float64)
+    arr = arr[np.argsort(arr[:, 0], kind="stable")]
+    start = arr[:, 0]
+    end = start + np.maximum(arr[:, 1], 0.0)
+    # A bucket never extends past the next one's start (keeps the cumulative curve monotonic)
+    end[:-1] = np.minimum(end[:-1], start[1:])
+    return Buckets(start, end, arr[:, 2].astype(np.int8))
+
+
+def state_seconds_between(b: Buckets, edges: Any) -> Any:
+    """Seconds of each state between consecutive edges: shape (len(edges) - 1, len(STATES))."""
+    import numpy as np
+
+    n = len(b)
+    # Knots of the piecewise-linear cumulative curve: each bucket's start, then its end
+    xs = np.empty(2 * n)
+    xs[0::2], xs[1::2] = b.start, b.end
+    gained = np.zeros((2 * n, len(STATES)))
+    gained[1::2][np.arange(n), b.state] = b.end - b.start
+    cumulative = np.cumsum(gained, axis=0)
+    at_edges = np.column_stack([np.interp(edges, xs, cumulative[:, k]) for k in range(len(STATES))])
+    return np.diff(at_edges, axis=0)
+
+
+def resample(b: Buckets, points: int) -> dict:
+    """Split the session span into ``points`` equal segments; per segment, the seconds of each
+    state as fractions of the segment and the majority state (None where nothing was recorded)."""
+    import numpy as np
+
+    if not len(b):
+        return {"start_ts": None, "segment_duration_sec": 0.0, "segments": []}
+    t0, t1 = float(b.start[0]), float(b.end.max())
+    edges = np.linspace(t0, t1, points + 1)
+    seconds = state_seconds_between(b, edges)
+    width = (t1 - t0) / points
+    fractions = seconds / width if width > 0 else np.zeros_like(seconds)
+    majority = np.argmax(seconds, axis=1)
+    covered = seconds.sum(axis=1) > 0
+    segments = [
+        {
+            "start_ts": float(edges[i]),
+            "state": STATES[majority[i]] if covered[i] else None,
+            **{s: round(float(fractions[i, k]), 4) for k, s in enumerate(STATES)},
+        }
+        for i in range(points)
+    ]
+    return {"start_ts": t0, "segment_duration_sec": width, "segments": segments}
+
+
+# (report_id, points) -> (fingerprint of timeline_buckets_json, resampled result)
+_cache: OrderedDict[tuple[UUID, int], tuple[int, dict]] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def resampled_timeline(report_id: UUID, timeline_json: str | None, points: int) -> dict:
+    """resample(), cached per (report, points). The fingerprint drops entries whose report
+    was re-uploaded with a different timeline. Results are shared (see app/core/singleflight.py)."""
+    key = (report_id, points)
+    fingerprint = hash(timeline_json)
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit is not None and hit[0] == fingerprint:
+            _cache.move_to_end(key)
+            return hit[1]
+    result = resample(decode_buckets(timeline_json), points)
+    with _cache_lock:
+        _cache[key] = (fingerprint, result)
+        _cache.move_to_end(key)
+        while len(_cache) > _CACHE_MAX:
+            _cache.popitem(last=False)
+    return result
+
+
+def clear_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,115 @@
+"""Cold storage of old timelines: compress, rehydrate, measure.
+
+Archiving moves a report's ``timeline_buckets_json`` into ``timeline_archive`` (zlib),
+nulls it in ``session_reports`` and sets ``timeline_archived``; the summary columns
+stay in place, so lists, stats and leaderboards never need the archive. Readers that
+return timelines call ``fill`` / ``load`` to put the JSON back transparently.
+"""
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable
+from uuid import UUID
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models.session_report import SessionReport
+from app.models.timeline_archive import TimelineArchive
+
+CODEC = "zlib"
+
+
+def compress(timeline_json: str) -> bytes:
+    return zlib.compress(timeline_json.encode(), 6)
+
+
+def decompress(codec: str, data: bytes) -> str:
+    if codec != CODEC:
+        raise ValueError(f"Unknown timeline archive codec: {codec}")
+    return zlib.decompress(data).decode()
+
+
+def cutoff(older_than_days: int, now: datetime | None = None) -> datetime:
+    return (now or datetime.now(timezone.utc)) - timedelta(days=older_than_days)
+
+
+def archive_reports(db: Session, report_ids: list[UUID]) -> tuple[int, int]:
+    """Archive these reports' timelines. Returns (raw bytes, compressed bytes). Caller commits."""
+    rows = db.execute(
+        select(SessionReport.id, SessionReport.timeline_buckets_json).where(
+            SessionReport.id.in_(report_ids),
+            SessionReport.timeline_archived == False,
+            SessionReport.timeline_buckets_json.is_not(None),
+        )
+    ).all()
+    if not rows:
+        return 0, 0
+    now = datetime.utcnow()
+    archive = [
+        {"report_id": rid, "codec": CODEC, "data": compress(j), "raw_bytes": len(j.encode()), "archived_at": now}
+        for rid, j in rows
+    ]
+    db.execute(insert(TimelineArchive), archive)
+    db.execute(
+        update(SessionReport)
+        .where(SessionReport.id.in_([rid for rid, _ in rows]))
+        .values(timeline_buckets_json=None, timeline_archived=True)
+        .execution_options(synchronize_session=False)
+    )
+    return sum(a["raw_bytes"] for a in archive), sum(len(a["data"]) for a in archive)
+
+
+def restore_reports(db: Session, report_ids: list[UUID]) -> int:
+    """Move archived timelines back into session_reports. Caller commits."""
+    timelines = load(db, report_ids)
+    for rid, j in timelines.items():
+        db.execute(
+            update(SessionReport)
+            .where(SessionReport.id == rid)
+            .values(timeline_buckets_json=j, timeline_archived=False)
+            .execution_options(synchronize_session=False)
+        )
+    discard(db, list(timelines))
+    return len(timelines)
+
+
+def discard(db: Session, report_ids: list[UUID]) -> None:
+    """Drop archived copies (the report got a new timeline or is being deleted). Caller commits."""
+    if report_ids:
+        db.execute(delete(TimelineArchive).where(TimelineArchive.report_id.in_(report_ids)))
+
+
+def load(db: Session, report_ids: Iterable[UUID]) -> dict[UUID, str]:
+    """Decompressed timelines for the archived reports among report_ids."""
+    ids = list(report_ids)
+    if not ids:
+        return {}
+    rows = db.execute(
+        select(TimelineArchive.report_id, TimelineArchive.codec, TimelineArchive.data)
+        .where(TimelineArchive.report_id.in_(ids))
+    ).all()
+    return {rid: decompress(codec, data) for rid, codec, data in rows}
+
+
+def fill(db: Session, pairs: Iterable[tuple[Any, dict]]) -> None:
+    """Put archived timelines back into output dicts; pairs are (report or row, its _to_out dict)."""
+    archived = {r.id: out for r, out in pairs if getattr(r, "timeline_archived", False)}
+    for rid, j in load(db, archived).items():
+        archived[rid]["timeline_buckets_json"] = j
+
+
+def stats(db: Session) -> dict:
+    """Archive size and bytes reclaimed from session_reports, for /health/archive."""
+    count, raw, stored = db.execute(
+        select(
+            func.count(TimelineArchive.report_id),
+            func.coalesce(func.sum(TimelineArchive.raw_bytes), 0),
+            func.coalesce(func.sum(func.length(TimelineArchive.data)), 0),
+        )
+    ).one()
+    return {
+        "archived_reports": count,
+        "raw_bytes": int(raw),
+        "compressed_bytes": int(stored),
+        "bytes_reclaimed": int(raw) - int(stored),
+    }
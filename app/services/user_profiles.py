@@ -0,0 +1,112 @@
+"""In-process cache of user identity fields (name, email, username, max score).
+
+``/me`` and the leaderboard read profiles through ``get`` / ``get_many`` instead of
+selecting or joining ``users`` every time; a page of leaderboard entries needs one IN
+query for the owners that aren't cached yet. Writers call ``invalidate_on_commit`` so
+entries are dropped once the change is visible (dropping them earlier would let a
+concurrent read put the old row back); ``USER_PROFILE_CACHE_TTL_SEC`` covers changes
+made elsewhere (see ``Settings``).
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterable
+from uuid import UUID
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core import statements
+from app.core.config import settings
+from app.core.generations import Generations
+
+
+@dataclass(frozen=True)
+class Profile:
+    id: UUID
+    email: str | None
+    name: str | None
+    username: str | None
+    max_zone_in_score: float | None
+
+
+# Bumped on invalidation so a load in flight doesn't cache what it read before
+_generations = Generations()
+# user id -> (loaded at (monotonic), profile)
+_cache: OrderedDict[UUID, tuple[float, Profile]] = OrderedDict()
+_lock = threading.Lock()
+_PENDING = "user_profiles_pending"
+
+
+def invalidate(user_ids: Iterable[UUID] | None) -> None:
+    """Drop cached profiles for these users (or everyone, if None)."""
+    with _lock:
+        if user_ids is None:
+            _generations.bump(None)
+            _cache.clear()
+            return
+        for uid in user_ids:
+            _generations.bump(uid)
+            _cache.pop(uid, None)
+
+
+def _after_commit(db: Session) -> None:
+    pending = db.info.pop(_PENDING, set())
+    invalidate(None if None in pending else pending)
+
+
+def _after_rollback(db: Session) -> None:
+    db.info.pop(_PENDING, None)
+
+
+def invalidate_on_commit(db: Session, user_ids: Iterable[UUID] | None) -> None:
+    """Invalidate these users (or everyone, if None) when db's transaction commits."""
+    pending = db.info.setdefault(_PENDING, set())
+    if user_ids is None:
+        pending.add(None)
+    else:
+        pending.update(user_ids)
+    if not event.contains(db, "after_commit", _after_commit):
+        event.listen(db, "after_commit", _after_commit)
+        event.listen(db, "after_rollback", _after_rollback)
+
+
+def get_many(db: Session, user_ids: Iterable[UUID]) -> dict[UUID, Profile]:
+    """Profiles for the users that exist, loading missing or expired ones in one query."""
+    wanted = set(user_ids)
+    found: dict[UUID, Profile] = {}
+    generations: dict[UUID, tuple[int, int]] = {}
+    now = time.monotonic()
+    with _lock:
+        for uid in wanted:
+            hit = _cache.get(uid)
+            if hit is not None and now - hit[0] < settings.user_profile_cache_ttl_sec:
+                _cache.move_to_end(uid)
+                found[uid] = hit[1]
+            else:
+                generations[uid] = _generations.begin(uid)
+    if not generations:
+        return found
+    try:
+        loaded = [
+            Profile(*row)
+            for row in db.execute(statements.USER_PROFILES, {"user_ids": list(generations)})
+        ]
+        with _lock:
+            for p in loaded:
+                found[p.id] = p
+                if _generations.current(p.id) == generations[p.id]:  # not invalidated while loading
+                    _cache[p.id] = (now, p)
+                    _cache.move_to_end(p.id)
+            while len(_cache) > settings.user_profile_cache_size:
+                _cache.popitem(last=False)
+    finally:
+        with _lock:
+            for uid in generations:
+                _generations.end(uid)
+    return found
+
+
+def get(db: Session, user_id: UUID) -> Profile | None:
+    return get_many(db, [user_id]).get(user_id)
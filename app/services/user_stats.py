@@ -0,0 +1,159 @@
+"""Incremental maintenance of per-user statistics (totals, averages, daily streaks).
+
+Streak days are UTC dates of a report's started_at. The common case (a new report on
+or after the latest session day) is applied in O(1); out-of-order reports and upserts
+that move a report to another day fall back to recomputing streaks from report dates.
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from uuid import UUID
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.models.session_report import SessionReport
+from app.models.user_stats import UserStats
+
+# report column -> user_stats running total
+TOTAL_COLUMNS = {
+    "duration_sec": "total_duration_sec",
+    "focused_sec": "total_focused_sec",
+    "distracted_sec": "total_distracted_sec",
+    "neutral_sec": "total_neutral_sec",
+    "snoozed_sec": "total_snoozed_sec",
+    "zone_in_score": "zone_in_score_sum",
+}
+
+
+@dataclass(frozen=True)
+class ReportSnapshot:
+    """The values of a report that feed into user_stats."""
+
+    day: date
+    duration_sec: float
+    focused_sec: float
+    distracted_sec: float
+    neutral_sec: float
+    snoozed_sec: float
+    zone_in_score: float
+
+    @classmethod
+    def of(cls, r) -> "ReportSnapshot":
+        return cls(
+            day=utc_day(r.started_at),
+            duration_sec=r.duration_sec,
+            focused_sec=r.focused_sec,
+            distracted_sec=r.distracted_sec,
+            neutral_sec=r.neutral_sec,
+            snoozed_sec=r.snoozed_sec or 0.0,
+            zone_in_score=r.zone_in_score,
+        )
+
+
+def utc_day(dt: datetime) -> date:
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc)
+    return dt.date()
+
+
+def streaks(days: list[date]) -> tuple[int, int]:
+    """(current, longest) consecutive-day runs for sorted distinct days; current ends at the last day."""
+    current = longest = 0
+    prev: date | None = None
+    for d in days:
+        current = current + 1 if prev is not None and d == prev + timedelta(days=1) else 1
+        longest = max(longest, current)
+        prev = d
+    return current, longest
+
+
+def _recompute_streaks(db: Session, stats: UserStats) -> None:
+    db.flush()
+    started = db.execute(select(SessionReport.started_at).where(SessionReport.user_id == stats.user_id)).scalars()
+    days = sorted({utc_day(s) for s in started})
+    stats.current_streak_days, stats.longest_streak_days = streaks(days)
+    stats.last_session_date = days[-1] if days else None
+
+
+def _insert(db: Session):
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(UserStats)
+
+
+def _get_or_create(db: Session, user_id: UUID) -> UserStats:
+    """The user's stats row, locked for this transaction.
+
+    The row is created first with INSERT ... ON CONFLICT DO NOTHING (zeroed by the column
+    defaults) so there is always a row for FOR UPDATE to lock; two workers handling a
+    user's first reports can't both insert it. SQLite has no row locks, but the insert
+    already takes its database write lock.
+    """
+    db.execute(_insert(db).values(user_id=user_id).on_conflict_do_nothing(index_elements=["user_id"]))
+    return db.get(UserStats, user_id, with_for_update=True, populate_existing=True)
+
+
+def apply_report_change(
+    db: Session,
+    user_id: UUID,
+    old: ReportSnapshot | None,
+    new: ReportSnapshot,
+    report_id: UUID | None = None,
+) -> None:
+    """Fold a created (old is None) or replaced report into the user's stats. Caller commits.
+
+    If ``report_id`` was deleted since the change was queued, the stats are rebuilt from
+    the remaining reports instead (checked under the stats row lock, so a deletion's own
+    rebuild either already ran or waits for this one).
+    """
+    stats = _get_or_create(db, user_id)
+    if report_id is not None and db.execute(select(SessionReport.id).where(SessionReport.id == report_id)).first() is None:
+        recompute_user_stats(db, user_id)
+        return
+    if old is None:
+        stats.report_count += 1
+    for field, column in TOTAL_COLUMNS.items():
+        delta = getattr(new, field) - (getattr(old, field) if old is not None else 0.0)
+        setattr(stats, column, getattr(stats, column) + delta)
+
+    if old is not None and old.day == new.day:
+        return
+    last = stats.last_session_date
+    if old is None and (last is None or new.day >= last):
+        if last is None or new.day > last + timedelta(days=1):
+            stats.current_streak_days = 1
+        elif new.day == last + timedelta(days=1):
+            stats.current_streak_days += 1
+        stats.last_session_date = new.day
+        stats.longest_streak_days = max(stats.longest_streak_days, stats.current_streak_days)
+    else:
+        _recompute_streaks(db, stats)
+
+
+def recompute_user_stats(db: Session, user_id: UUID) -> UserStats | None:
+    """Rebuild a user's stats from their reports (after deletes / imports). Caller commits."""
+    row = db.execute(
+        select(
+            func.count(SessionReport.id),
+            *(func.coalesce(func.sum(getattr(SessionReport, field)), 0.0) for field in TOTAL_COLUMNS),
+        ).where(SessionReport.user_id == user_id)
+    ).one()
+    if row[0] == 0:
+        db.execute(delete(UserStats).where(UserStats.user_id == user_id))
+        return None
+    stats = _get_or_create(db, user_id)
+    stats.report_count = row[0]
+    for column, value in zip(TOTAL_COLUMNS.values(), row[1:]):
+        setattr(stats, column, value)
+    _recompute_streaks(db, stats)
+    return stats
+
+
+def current_streak(stats: UserStats, today: date | None = None) -> int:
+    """The stored streak only counts as current if the last session was today or yesterday."""
+    today = today or datetime.now(timezone.utc).date()
+    if stats.last_session_date is None or stats.last_session_date < today - timedelta(days=1):
+        return 0
+    return stats.current_streak_days
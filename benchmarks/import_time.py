@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Cold-start import benchmark for app.main, based on `python -X importtime`.
+
+Usage:
+    python benchmarks/import_time.py [--budget-ms 1200] [--runs 5] [--top 15]
+
+Imports app.main in fresh interpreters, reports the median cumulative import time and
+the slowest modules, and exits non-zero if the budget is exceeded or a module that must
+stay lazy (Google/OAuth stack, JWT) is imported at startup.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Only needed by the OAuth callback / token handling / timeline math; must not load before the first request.
+LAZY_MODULES = ("google.oauth2", "google.auth.transport.requests", "httpx", "jose", "requests", "numpy")
+
+DEFAULT_BUDGET_MS = 1200.0
+
+
+def measure() -> tuple[float, list[tuple[float, str]], list[str]]:
+    """Return (total ms for app.main, [(cumulative ms, module)], eagerly imported lazy modules)."""
+    check = f"import sys, app.main; print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", check],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules: list[tuple[float, str]] = []
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        modules.append((int(cumulative_us) / 1000, name))
+        if name == "app.main":
+            total_us = int(cumulative_us)
+    eager = [m for m in proc.stdout.strip().split(",") if m]
+    return total_us / 1000, modules, eager
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure app.main import time")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    totals = []
+    modules: list[tuple[float, str]] = []
+    eager: list[str] = []
+    for _ in range(args.runs):
+        total, modules, eager = measure()
+        totals.append(total)
+    median = statistics.median(totals)
+
+    print(f"app.main import: median {median:.0f}ms over {args.runs} runs (min {min(totals):.0f}ms, budget {args.budget_ms:.0f}ms)")
+    print("\nSlowest top-level imports (last run, cumulative):")
+    top_level = [(ms, name) for ms, name in modules if "." not in name or name.startswith("app.")]
+    for ms, name in sorted(top_level, reverse=True)[: args.top]:
+        print(f"  {ms:8.1f}ms  {name}")
+
+    failed = False
+    if eager:
+        print(f"\nFAIL: lazily-imported modules loaded at startup: {', '.join(eager)}")
+        failed = True
+    if median > args.budget_ms:
+        print(f"\nFAIL: median import time {median:.0f}ms exceeds budget {args.budget_ms:.0f}ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
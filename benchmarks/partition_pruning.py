@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Partition pruning check for date-range report queries (Postgres with PARTITION_REPORTS).
+
+Usage:
+    python benchmarks/partition_pruning.py [--seed-reports 20000] [--months 24] [--runs 20]
+
+Seeds a throwaway user with reports spread over --months months, then runs the
+GET /reports?from=&to= query for one month: prints how many partitions the plan scans
+(should be 1, plus the DEFAULT partition at most) out of how many exist, and the median
+execution time. Everything seeded is deleted at the end. Uses DATABASE_URL.
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import delete, insert, select, text  # noqa: E402
+
+from app.core import partitions  # noqa: E402
+from app.core.database import engine  # noqa: E402
+from app.models.session_report import SessionReport  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+
+def _plan_relations(plan: dict) -> list[str]:
+    names = [plan["Relation Name"]] if "Relation Name" in plan else []
+    for child in plan.get("Plans", []):
+        names.extend(_plan_relations(child))
+    return names
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check partition pruning on report date ranges")
+    parser.add_argument("--seed-reports", type=int, default=20_000)
+    parser.add_argument("--months", type=int, default=24)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        sys.exit("Partitioning is Postgres-only; point DATABASE_URL at a Postgres database.")
+    with engine.begin() as conn:
+        if not partitions.is_partitioned(conn):
+            sys.exit("session_reports is not partitioned: set PARTITION_REPORTS=true and run `alembic upgrade head`.")
+        today = date.today()
+        partitions.create_month_partitions(conn, partitions.add_months(today, -args.months), today)
+
+    user_id = uuid.uuid4()
+    now = datetime.now(timezone.utc)
+    with engine.begin() as conn:
+        conn.execute(insert(User).values(id=user_id, google_sub=f"bench-{user_id}", email="", name="bench"))
+        rows = []
+        for i in range(args.seed_reports):
+            started = now - timedelta(days=random.uniform(0, args.months * 30))
+            rows.append({
+                "id": uuid.uuid4(), "user_id": user_id, "session_id": f"bench-{i}",
+                "started_at": started, "ended_at": started + timedelta(hours=1),
+                "duration_sec": 3600, "focused_sec": 3000, "distracted_sec": 300, "neutral_sec": 300,
+                "snoozed_sec": 0, "zone_in_score": random.uniform(0, 100), "cloud_ai_enabled": False,
+                "published": False, "timeline_archived": False, "created_at": now,
+            })
+        conn.execute(insert(SessionReport), rows)
+    try:
+        month = partitions.month_start(today) if today.day > 1 else partitions.add_months(today, -1)
+        start = datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+        end = datetime.combine(partitions.add_months(month, 1), datetime.min.time(), tzinfo=timezone.utc)
+        # Same shape as GET /reports?from=&to= (app/api/reports.py::_load_reports)
+        query = (
+            select(SessionReport)
+            .where(SessionReport.user_id == user_id, *partitions.report_range_conditions(start, end))
+            .order_by(SessionReport.started_at.desc())
+        )
+        compiled = query.compile(engine, compile_kwargs={"literal_binds": True})
+        with engine.connect() as conn:
+            total = conn.execute(
+                text("SELECT count(*) FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhparent WHERE c.relname = :t"),
+                {"t": partitions.TABLE},
+            ).scalar()
+            times = []
+            for _ in range(args.runs):
+                plan = conn.execute(text(f"EXPLAIN (ANALYZE, FORMAT JSON) {compiled}")).scalar()
+                plan = plan[0] if isinstance(plan, list) else json.loads(plan)[0]
+                times.append(plan["Execution Time"])
+            scanned = sorted(set(_plan_relations(plan["Plan"])))
+        print(f"Range {start.date()}..{end.date()}: scanned {len(scanned)} of {total} partitions: {', '.join(scanned)}")
+        print(f"Median execution time: {statistics.median(times):.2f}ms over {args.runs} runs ({args.seed_reports} seeded reports)")
+        # The range month, the one before (MAX_SESSION_SPAN slack) and the DEFAULT partition at most
+        sys.exit(0 if len(scanned) <= 3 else 1)
+    finally:
+        with engine.begin() as conn:
+            conn.execute(delete(SessionReport).where(SessionReport.user_id == user_id))
+            conn.execute(delete(User).where(User.id == user_id))
+
+
+if __name__ == "__main__":
+    main()
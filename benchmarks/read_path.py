@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""ORM entities vs Core rows on the read-only list and leaderboard paths.
+
+Usage:
+    python benchmarks/read_path.py [--reports 10000] [--runs 5]
+
+Seeds a temporary SQLite database with --reports published reports (with timelines)
+spread over a few users, then loads them the way GET /reports and GET /leaderboard
+used to (ORM SessionReport instances, leaderboard joined to User) and the way they do
+now (Core rows from app/core/statements.py, owners from the profile cache), both
+converted to output dicts with _to_out (the leaderboard also reads reaction counts and
+fills archived timelines in both cases). Prints the median latency and the peak traced
+memory (tracemalloc) of one load for each.
+"""
+import argparse
+import gc
+import json
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine, insert, select  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+import app.models  # noqa: E402,F401  (registers every table on Base.metadata)
+from app.api.leaderboard import _load_leaderboard  # noqa: E402
+from app.api.reports import _load_reports, _to_out  # noqa: E402
+from app.core import statements  # noqa: E402
+from app.core.database import Base  # noqa: E402
+from app.models.session_report import SessionReport  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services import timeline_archive, user_profiles  # noqa: E402
+
+USERS = 20
+
+
+def seed(engine, n: int) -> uuid.UUID:
+    users = [uuid.uuid4() for _ in range(USERS)]
+    timeline = json.dumps([{"bucket_start_ts": i * 300, "bucket_duration_sec": 300, "state": "focused"} for i in range(24)])
+    now = datetime.now(timezone.utc)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": u, "google_sub": f"bench-{u}", "email": f"{i}@example.com", "name": f"User {i}", "username": f"user{i}"}
+            for i, u in enumerate(users)
+        ])
+        conn.execute(insert(SessionReport), [
+            {
+                "id": uuid.uuid4(), "user_id": users[0] if i % 2 else users[i % USERS], "session_id": f"s{i}",
+                "started_at": now - timedelta(hours=i), "ended_at": now - timedelta(hours=i) + timedelta(hours=2),
+                "duration_sec": 7200.0, "focused_sec": 6000.0, "distracted_sec": 600.0, "neutral_sec": 600.0,
+                "snoozed_sec": 0.0, "zone_in_score": (i * 37) % 100, "timeline_buckets_json": timeline,
+                "timeline_archived": False, "cloud_ai_enabled": False, "published": True, "created_at": now,
+                "change_seq": i + 1,
+            }
+            for i in range(n)
+        ])
+    return users[0]
+
+
+def orm_list(db: Session, user_id: uuid.UUID) -> list[dict]:
+    q = select(SessionReport).where(SessionReport.user_id == user_id).order_by(SessionReport.started_at.desc())
+    return [_to_out(r) for r in db.execute(q).scalars().all()]
+
+
+def orm_leaderboard(db: Session) -> list[dict]:
+    q = (
+        select(SessionReport, User.name, User.email, User.username)
+        .join(User, SessionReport.user_id == User.id)
+        .where(SessionReport.published == True)
+        .order_by(SessionReport.zone_in_score.desc(), SessionReport.created_at.desc())
+    )
+    results = db.execute(q).all()
+    reaction_counts: dict[uuid.UUID, dict[str, int]] = {}
+    for report_id, emoji, count in db.execute(statements.REACTION_COUNTS, {"report_ids": [r.id for r, *_ in results]}):
+        reaction_counts.setdefault(report_id, {})[emoji] = count
+    out, pairs = [], []
+    for r, name, email, username in results:
+        fields = {**_to_out(r), "user_name": name, "user_email": email, "username": username}
+        out.append((fields, r.user_id, reaction_counts.get(r.id, {})))
+        pairs.append((r, fields))
+    timeline_archive.fill(db, pairs)
+    return out
+
+
+def measure(engine, load, runs: int) -> tuple[float, float, int]:
+    """(median ms, peak MiB, rows) with a fresh session (empty identity map) per run."""
+    times = []
+    for _ in range(runs):
+        user_profiles.invalidate(None)
+        with Session(engine) as db:
+            gc.collect()
+            start = time.perf_counter()
+            rows = load(db)
+            times.append((time.perf_counter() - start) * 1000)
+    user_profiles.invalidate(None)
+    with Session(engine) as db:
+        gc.collect()
+        tracemalloc.start()
+        load(db)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return statistics.median(times), peak / 2**20, len(rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="ORM vs Core rows on read-only endpoints")
+    parser.add_argument("--reports", type=int, default=10_000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.db")
+        Base.metadata.create_all(engine)
+        user_id = seed(engine, args.reports)
+        cases = {
+            "list (ORM)": lambda db: orm_list(db, user_id),
+            "list (Core)": lambda db: _load_reports.__wrapped__(db, user_id, None, None, None),
+            "leaderboard (ORM)": orm_leaderboard,
+            "leaderboard (Core)": lambda db: _load_leaderboard.__wrapped__(db, None, None),
+        }
+        print(f"{'path':<20} {'rows':>7} {'median ms':>10} {'peak MiB':>9}")
+        for name, load in cases.items():
+            ms, mib, rows = measure(engine, load, args.runs)
+            print(f"{name:<20} {rows:>7} {ms:>10.1f} {mib:>9.1f}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Python overhead of building and compiling the hot queries, per execution.
+
+Usage:
+    python benchmarks/statement_overhead.py [--runs 5000]
+
+Runs each hot query against an in-memory SQLite database with empty tables and prints
+the median microseconds per execution for:
+
+    uncached   select() built per call, engine compiled cache off (compiles every time)
+    select     select() built per call, compiled cache on (what the handlers did before)
+    lambda     lambda_stmt built per call, compiled cache on
+    prebuilt   the module-level statement from app/core/statements.py plus a params dict
+
+The tables are empty, so the time is almost all statement construction, cache-key
+generation, compilation and result setup: the per-request cost that does not depend
+on the data. `compile` is uncached - select; `saved` is prebuilt vs select.
+"""
+import argparse
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine, func, lambda_stmt, select  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+import app.models  # noqa: E402,F401  (registers every table on Base.metadata)
+from app.core import statements  # noqa: E402
+from app.core.database import Base  # noqa: E402
+from app.models.reaction import Reaction  # noqa: E402
+from app.models.session_report import SessionReport  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+USER, REPORT = uuid.uuid4(), uuid.uuid4()
+IDS = [uuid.uuid4() for _ in range(50)]
+
+
+def _report_by_session(u=USER, s="s"):
+    return select(SessionReport).where(SessionReport.user_id == u, SessionReport.session_id == s)
+
+
+def _user_report(r=REPORT, u=USER):
+    return select(SessionReport).where(SessionReport.id == r, SessionReport.user_id == u)
+
+
+def _published():
+    return (
+        select(*statements.REPORT_COLUMNS).where(SessionReport.published == True)
+        .order_by(SessionReport.zone_in_score.desc(), SessionReport.created_at.desc())
+    )
+
+
+def _reaction_counts(ids=IDS):
+    return (
+        select(Reaction.report_id, Reaction.emoji, func.count(Reaction.id))
+        .where(Reaction.report_id.in_(ids)).group_by(Reaction.report_id, Reaction.emoji)
+    )
+
+
+def _user_reactions(u=USER, ids=IDS):
+    return select(Reaction.report_id, Reaction.emoji).where(Reaction.user_id == u, Reaction.report_id.in_(ids))
+
+
+def _user_profiles(ids=IDS):
+    return select(User.id, User.email, User.name, User.username, User.max_zone_in_score).where(User.id.in_(ids))
+
+
+# name -> (select() builder, lambda_stmt builder, prebuilt statement, its params)
+QUERIES = {
+    "report_by_session": (
+        _report_by_session,
+        lambda u=USER, s="s": lambda_stmt(lambda: _report_by_session(u, s)),
+        statements.REPORT_BY_SESSION, {"user_id": USER, "session_id": "s"},
+    ),
+    "user_report": (
+        _user_report,
+        lambda r=REPORT, u=USER: lambda_stmt(lambda: _user_report(r, u)),
+        statements.USER_REPORT, {"report_id": REPORT, "user_id": USER},
+    ),
+    "published_reports": (
+        _published,
+        lambda: lambda_stmt(lambda: _published()),
+        statements.PUBLISHED_REPORTS, None,
+    ),
+    "reaction_counts": (
+        _reaction_counts,
+        lambda ids=IDS: lambda_stmt(lambda: _reaction_counts(ids)),
+        statements.REACTION_COUNTS, {"report_ids": IDS},
+    ),
+    "user_reactions": (
+        _user_reactions,
+        lambda u=USER, ids=IDS: lambda_stmt(lambda: _user_reactions(u, ids)),
+        statements.USER_REACTIONS, {"user_id": USER, "report_ids": IDS},
+    ),
+    "user_profiles": (
+        _user_profiles,
+        lambda ids=IDS: lambda_stmt(lambda: _user_profiles(ids)),
+        statements.USER_PROFILES, {"user_ids": IDS},
+    ),
+}
+
+
+def _engine(cache_size: int):
+    e = create_engine("sqlite://", poolclass=StaticPool, query_cache_size=cache_size)
+    Base.metadata.create_all(e)
+    return e
+
+
+def _per_call_us(conn, build, params, runs: int) -> float:
+    conn.execute(build(), params).all()  # warm up (fills the compiled cache)
+    samples = []
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(runs // 5):
+            conn.execute(build(), params).all()
+        samples.append((time.perf_counter() - start) / (runs // 5) * 1e6)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-execution overhead of the hot queries")
+    parser.add_argument("--runs", type=int, default=5000)
+    args = parser.parse_args()
+
+    uncached, cached = _engine(0), _engine(1200)
+    print(f"{'query':<20} {'uncached':>9} {'select':>9} {'lambda':>9} {'prebuilt':>9} {'compile':>9} {'saved':>7}   (us per execution)")
+    totals = [0.0] * 4
+    with uncached.connect() as cold, cached.connect() as warm:
+        for name, (build, lam, stmt, params) in QUERIES.items():
+            row = [
+                _per_call_us(cold, build, None, args.runs),
+                _per_call_us(warm, build, None, args.runs),
+                _per_call_us(warm, lam, None, args.runs),
+                _per_call_us(warm, lambda: stmt, params, args.runs),
+            ]
+            totals = [t + r for t, r in zip(totals, row)]
+            print(f"{name:<20} " + " ".join(f"{v:>9.1f}" for v in row) + f" {row[0] - row[1]:>9.1f} {(row[1] - row[3]) / row[1]:>7.0%}")
+    print(f"{'total':<20} " + " ".join(f"{v:>9.1f}" for v in totals) + f" {totals[0] - totals[1]:>9.1f} {(totals[1] - totals[3]) / totals[1]:>7.0%}")
+
+
+if __name__ == "__main__":
+    main()
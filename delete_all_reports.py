@@ -1,17 +1,19 @@
 #!/usr/bin/env python3
-"""Delete all reports from the database."""
+"""Delete all reports from the database, in chunks (one transaction per chunk)."""
 import sys
-from sqlalchemy import delete
-from app.core.database import SessionLocal, engine
-from app.models.session_report import SessionReport
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.report_deletion import delete_reports_chunked
 
 def main():
     db = SessionLocal()
     try:
-        # Delete all reports
-        result = db.execute(delete(SessionReport))
-        db.commit()
-        n = result.rowcount
+        n = delete_reports_chunked(
+            db,
+            user_id=None,
+            chunk_size=settings.delete_chunk_size,
+            on_chunk=lambda total: print(f"  ... {total} deleted", flush=True),
+        )
         print(f"✅ Deleted {n} report(s) from the database.")
     except Exception as e:
         db.rollback()
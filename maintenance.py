@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Maintenance CLI for derived data, archival, pruning and outbox retries.
+
+Usage:
+    python maintenance.py max-scores [--chunk-size N] [--after USER_ID] [--dry-run]
+    python maintenance.py verify-max-scores [--chunk-size N] [--after USER_ID]
+    python maintenance.py usernames [--chunk-size N] [--after USER_ID] [--dry-run]
+    python maintenance.py user-stats [--chunk-size N] [--after USER_ID] [--dry-run]
+    python maintenance.py leaderboard-windows [--chunk-size N] [--after USER_ID] [--dry-run]
+    python maintenance.py archive-timelines [--chunk-size N] [--after REPORT_ID] [--dry-run]
+    python maintenance.py restore-timelines [--chunk-size N] [--after REPORT_ID] [--dry-run]
+    python maintenance.py tombstones [--chunk-size N] [--after USER_ID] [--dry-run]
+    python maintenance.py idempotency-keys [--dry-run]
+    python maintenance.py partitions [--dry-run]
+    python maintenance.py retry-dead-tasks [--dry-run]
+
+Chunked tasks commit each chunk on its own; pass the printed --after cursor to resume.
+"""
+import argparse
+import sys
+from uuid import UUID
+
+from app.core.database import SessionLocal
+from app.services.maintenance import DEFAULT_CHUNK_SIZE, READ_ONLY_TASKS, TASKS, UNCHUNKED_TASKS
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="task", required=True)
+    for name, (description, _) in TASKS.items():
+        p = sub.add_parser(name, help=description)
+        if name not in UNCHUNKED_TASKS:
+            p.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="users (or reports) per batch (max-scores: 0 = single statement)")
+            p.add_argument("--after", type=UUID, default=None, help="resume after this user (or report) id")
+        if name not in READ_ONLY_TASKS:
+            p.add_argument("--dry-run", action="store_true", help="roll back every batch")
+    args = parser.parse_args()
+
+    _, runner = TASKS[args.task]
+    kwargs = {} if args.task in UNCHUNKED_TASKS else {"chunk_size": args.chunk_size, "after": args.after}
+    if args.task not in READ_ONLY_TASKS:
+        kwargs["dry_run"] = args.dry_run
+
+    db = SessionLocal()
+    try:
+        result = runner(db, **kwargs)
+        print(f"\n{args.task} completed: {result.scanned} scanned, {result.changed} changed")
+    except Exception as e:
+        db.rollback()
+        print(f"Error during {args.task}: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -10,11 +10,15 @@ from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import Session, sessionmaker
 
+from app.core import idempotency
 from app.core.auth import create_access_token
+from app.core.config import settings
 from app.core.database import Base, get_db
+from app.core.ratelimit import limiter
 from app.main import app
 from app.models.session_report import SessionReport
 from app.models.user import User
+from app.services import user_profiles
 
 
 def _sqlite_url() -> str:
@@ -45,7 +49,13 @@ def db(engine) -> Generator[Session, None, None]:
 
 
 @pytest.fixture
-def client(db: Session):
+def client(db: Session, monkeypatch):
+    # Run post-write tasks inline after commit so tests see derived data immediately.
+    monkeypatch.setattr(settings, "task_workers", 0)
+    limiter.reset()
+    user_profiles.invalidate(None)
+    idempotency.memory_store.clear()
+
     def override_get_db():
         try:
             yield db
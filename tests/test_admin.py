@@ -0,0 +1,78 @@
+"""Admin diagnostics: token gating, request profiles, tracemalloc snapshots."""
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import profiling
+from app.core.config import settings
+
+ADMIN = {"X-Admin-Token": "test-admin-token"}
+
+
+@pytest.fixture
+def admin(monkeypatch):
+    monkeypatch.setattr(settings, "admin_token", ADMIN["X-Admin-Token"])
+    profiling.profiles.clear()
+    yield
+    profiling.profiles.clear()
+
+
+def test_admin_endpoints_gated(client: TestClient, monkeypatch):
+    assert client.get("/admin/profiles", headers=ADMIN).status_code == 404  # no ADMIN_TOKEN configured
+    monkeypatch.setattr(settings, "admin_token", ADMIN["X-Admin-Token"])
+    assert client.get("/admin/profiles").status_code == 403
+    assert client.get("/admin/profiles", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert client.get("/admin/profiles", headers=ADMIN).json() == []
+
+
+def test_sampler_keeps_endpoint_stacks():
+    def busy_endpoint():
+        deadline = time.perf_counter() + 0.1
+        while time.perf_counter() < deadline:
+            pass
+
+    profile = profiling.Profile(id="p", method="GET", path="/x", started=time.time())
+    sampler = profiling.Sampler(profile, 0.002)
+    sampler.start()
+    worker = threading.Thread(target=busy_endpoint)
+    worker.start()
+    worker.join()
+    sampler.stop()
+    sampler.finish(busy_endpoint)
+
+    assert profile.samples > 0
+    lines = profile.collapsed().splitlines()
+    assert lines and all(":busy_endpoint:" in line.split(";")[0] for line in lines)
+
+
+def test_profiled_request_is_stored(client: TestClient, admin):
+    r = client.get("/leaderboard", headers={**ADMIN, "X-Profile": "1"})
+    assert r.status_code == 200
+    profile_id = r.headers["X-Profile-Id"]
+    assert client.get("/leaderboard").headers.get("X-Profile-Id") is None  # not requested, not sampled
+
+    listed = client.get("/admin/profiles", headers=ADMIN).json()
+    assert [(p["id"], p["path"], p["status_code"]) for p in listed] == [(profile_id, "/leaderboard", 200)]
+    collapsed = client.get(f"/admin/profiles/{profile_id}", headers=ADMIN)
+    assert collapsed.status_code == 200 and collapsed.headers["content-type"].startswith("text/plain")
+    assert client.get("/admin/profiles/missing", headers=ADMIN).status_code == 404
+
+
+def test_profile_sample_rate(client: TestClient, admin, monkeypatch):
+    monkeypatch.setattr(settings, "profile_sample_rate", 1.0)
+    assert "X-Profile-Id" in client.get("/health").headers
+
+
+def test_tracemalloc_snapshot(client: TestClient, admin):
+    assert client.get("/admin/tracemalloc/snapshot", headers=ADMIN).status_code == 409
+    try:
+        assert client.post("/admin/tracemalloc/start?frames=5", headers=ADMIN).json()["tracing"] is True
+        hold = [bytearray(1024) for _ in range(200)]
+        snap = client.get("/admin/tracemalloc/snapshot?limit=5&diff=true", headers=ADMIN).json()
+        assert snap["diff"] is True and len(snap["top"]) <= 5
+        assert any("test_admin.py" in s["site"] for s in snap["top"])
+        del hold
+    finally:
+        assert client.post("/admin/tracemalloc/stop", headers=ADMIN).json()["tracing"] is False
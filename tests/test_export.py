@@ -0,0 +1,54 @@
+"""Streaming export (GET /reports/export)."""
+import csv
+import io
+import json
+import uuid
+
+import pytest
+
+from app.services import report_export
+
+
+def _create(client, token, payload, n):
+    for _ in range(n):
+        client.post("/reports", json={**payload, "session_id": str(uuid.uuid4())}, headers={"Authorization": f"Bearer {token}"})
+
+
+def test_export_ndjson(client, token_a, token_b, report_payload):
+    _create(client, token_a, report_payload, 3)
+    _create(client, token_b, report_payload, 1)
+    resp = client.get("/reports/export?include_timeline=true", headers={"Authorization": f"Bearer {token_a}"})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    assert len(rows) == 3
+    assert rows[0]["timeline_buckets"][0]["state"] == "focused"
+    assert rows[0]["zone_in_score"] == report_payload["zone_in_score"]
+
+    rows = [json.loads(line) for line in client.get("/reports/export", headers={"Authorization": f"Bearer {token_a}"}).text.splitlines()]
+    assert "timeline_buckets" not in rows[0]
+
+
+def test_export_csv(client, token_a, report_payload):
+    _create(client, token_a, report_payload, 2)
+    resp = client.get("/reports/export?format=csv&include_timeline=true", headers={"Authorization": f"Bearer {token_a}"})
+    rows = list(csv.DictReader(io.StringIO(resp.text)))
+    assert len(rows) == 2
+    assert json.loads(rows[0]["timeline_buckets_json"])[0]["bucket_duration_sec"] == 300
+    assert float(rows[0]["focused_sec"]) == report_payload["focused_sec"]
+
+
+@pytest.mark.skipif(not report_export.parquet_available(), reason="pyarrow not installed")
+def test_export_parquet(client, token_a, report_payload):
+    import pyarrow.parquet as pq
+
+    _create(client, token_a, report_payload, 2)
+    resp = client.get("/reports/export?format=parquet", headers={"Authorization": f"Bearer {token_a}"})
+    table = pq.read_table(io.BytesIO(resp.content))
+    assert table.num_rows == 2
+    assert "timeline_buckets_json" not in table.column_names
+    assert table.column("zone_in_score").to_pylist() == [report_payload["zone_in_score"]] * 2
+
+
+def test_export_requires_auth(client):
+    assert client.get("/reports/export").status_code in (401, 403)
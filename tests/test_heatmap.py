@@ -0,0 +1,80 @@
+"""Hour-of-week heatmap (GET /reports/heatmap) and its projection into local hours."""
+import json
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pytest
+
+from app.services import heatmap
+
+MONDAY_10_UTC = datetime(2026, 1, 5, 10, 0, tzinfo=timezone.utc).timestamp()
+
+
+def _buckets(*spec: tuple[float, int, str]) -> str:
+    return json.dumps([{"bucket_start_ts": t, "bucket_duration_sec": d, "state": s} for t, d, s in spec])
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    heatmap.invalidate(None)
+    yield
+    heatmap.invalidate(None)
+
+
+def test_project_splits_at_local_hour_boundaries():
+    # 10:45-11:15 UTC Monday; in Kolkata (+5:30) that's 16:15-16:45 local, one slot
+    start, end, state = np.array([MONDAY_10_UTC + 2700]), np.array([MONDAY_10_UTC + 4500]), np.array([0], dtype=np.int8)
+    utc = heatmap.project(start, end, state, timezone.utc)
+    assert utc[0, 10, 0] == 900 and utc[0, 11, 0] == 900
+    ist = heatmap.project(start, end, state, ZoneInfo("Asia/Kolkata"))
+    assert ist[0, 16, 0] == 1800 and ist.sum() == 1800
+
+
+def test_heatmap_endpoint(client, token_a, token_b, report_payload):
+    headers = {"Authorization": f"Bearer {token_a}"}
+    report_payload["started_at"] = datetime(2026, 1, 5, 10, 0, tzinfo=timezone.utc).isoformat()
+    report_payload["ended_at"] = datetime(2026, 1, 5, 11, 0, tzinfo=timezone.utc).isoformat()
+    report_payload["timeline_buckets_json"] = _buckets(
+        (MONDAY_10_UTC, 1800, "focused"), (MONDAY_10_UTC + 1800, 1200, "distracted"), (MONDAY_10_UTC + 3000, 600, "snoozed"),
+    )
+    client.post("/reports", json=report_payload, headers=headers)
+    data = client.get("/reports/heatmap?timezone=America/New_York", headers=headers).json()
+    assert data["weekdays"][0] == "Mon"
+    assert len(data["focused"]) == 7 and len(data["focused"][0]) == 24
+    assert data["focused"][0][5] == 1800  # 10:00 UTC = 05:00 EST
+    assert data["distracted"][0][5] == 1200
+    assert data["snoozed"][0][5] == 600
+    assert sum(map(sum, client.get("/reports/heatmap", headers={"Authorization": f"Bearer {token_b}"}).json()["focused"])) == 0
+    # Outside the range
+    assert sum(map(sum, client.get("/reports/heatmap?from=2026-01-06", headers=headers).json()["focused"])) == 0
+
+
+def test_heatmap_cache_invalidated_on_write(client, token_a, report_payload):
+    headers = {"Authorization": f"Bearer {token_a}"}
+    report_payload["timeline_buckets_json"] = _buckets((MONDAY_10_UTC, 600, "focused"))
+    client.post("/reports", json=report_payload, headers=headers)
+    assert client.get("/reports/heatmap", headers=headers).json()["focused"][0][10] == 600
+    report_payload["timeline_buckets_json"] = _buckets((MONDAY_10_UTC, 600, "neutral"))
+    client.post("/reports", json=report_payload, headers=headers)
+    data = client.get("/reports/heatmap", headers=headers).json()
+    assert data["focused"][0][10] == 0 and data["neutral"][0][10] == 600
+
+
+def test_invalidation_state_is_bounded(db, user_a, monkeypatch):
+    import uuid
+
+    for _ in range(100):
+        heatmap.invalidate(uuid.uuid4())
+    assert len(heatmap._generations) == 0
+
+    # An invalidation while computing keeps the stale result out of the cache
+    compute = heatmap.compute
+
+    def racing_compute(*args):
+        heatmap.invalidate(user_a.id)
+        return compute(*args)
+
+    monkeypatch.setattr(heatmap, "compute", racing_compute)
+    heatmap.user_heatmap(db, user_a.id, None, None, None)
+    assert not heatmap._cache and len(heatmap._generations) == 0
@@ -0,0 +1,64 @@
+"""Idempotency-Key: replayed responses, conflicts, released keys, memory and db stores."""
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core import idempotency
+from app.core.config import settings
+from app.models.idempotency_key import IdempotencyKey
+from app.models.session_report import SessionReport
+
+
+@pytest.fixture(params=["memory", "db"])
+def store(request, monkeypatch) -> str:
+    monkeypatch.setattr(settings, "idempotency_store", request.param)
+    return request.param
+
+
+def test_post_reports_retry_is_replayed(client: TestClient, db: Session, token_a: str, report_payload: dict, store: str):
+    headers = {"Authorization": f"Bearer {token_a}", "Idempotency-Key": "k1"}
+    first = client.post("/reports", json=report_payload, headers=headers)
+    # A later write to the same session must not be undone by replaying the retry
+    client.post("/reports", json={**report_payload, "zone_in_score": 10.0}, headers={"Authorization": f"Bearer {token_a}"})
+    retry = client.post("/reports", json=report_payload, headers=headers)
+
+    assert retry.status_code == 200
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json() == first.json()
+    assert db.execute(select(SessionReport.zone_in_score)).scalar_one() == 10.0
+    if store == "db":
+        assert db.execute(select(func.count()).select_from(IdempotencyKey)).scalar_one() == 1
+
+
+def test_key_reused_for_another_request(client: TestClient, token_a: str, report_payload: dict, store: str):
+    headers = {"Authorization": f"Bearer {token_a}", "Idempotency-Key": "k1"}
+    client.post("/reports", json=report_payload, headers=headers)
+    r = client.post("/reports", json={**report_payload, "session_id": "other"}, headers=headers)
+    assert r.status_code == 422
+
+
+def test_in_flight_key_conflicts(client: TestClient, user_a, token_a: str, report_payload: dict):
+    body = client.build_request("POST", "/reports", json=report_payload).content
+    fp = idempotency.fingerprint("POST", "/reports", "", body)
+    assert idempotency.memory_store.claim(user_a.id, "k1", fp) is None
+
+    r = client.post("/reports", json=report_payload, headers={"Authorization": f"Bearer {token_a}", "Idempotency-Key": "k1"})
+    assert r.status_code == 409
+
+
+def test_failed_request_releases_key(client: TestClient, token_a: str, report_payload: dict, store: str):
+    auth = {"Authorization": f"Bearer {token_a}"}
+    rid = client.post("/reports", json=report_payload, headers=auth).json()["id"]
+    react = {**auth, "Idempotency-Key": str(uuid.uuid4())}
+
+    assert client.post(f"/leaderboard/reports/{rid}/react", json={"emoji": "🔥"}, headers=react).status_code == 400
+    client.post(f"/leaderboard/reports/{rid}/publish", headers=auth)
+    r = client.post(f"/leaderboard/reports/{rid}/react", json={"emoji": "🔥"}, headers=react)
+    assert r.status_code == 200 and "Idempotent-Replayed" not in r.headers
+
+    removed = client.delete(f"/leaderboard/reports/{rid}/react", headers={**auth, "Idempotency-Key": "del"})
+    again = client.delete(f"/leaderboard/reports/{rid}/react", headers={**auth, "Idempotency-Key": "del"})
+    assert again.status_code == 200 and again.json() == removed.json() == {"removed": True, "reactions": {}}
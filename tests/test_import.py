@@ -0,0 +1,117 @@
+"""Streaming import (POST /reports/import), including round trips through the export."""
+import json
+import os
+import subprocess
+import sys
+import uuid
+from pathlib import Path
+
+from app.core.config import settings
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Runs with PARTITION_REPORTS=true, where the conflict key is (user_id, session_id, started_at)
+_PARTITIONED_IMPORT = """
+import sys, tempfile, uuid
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+from app.api.reports import ReportCreate
+from app.core import statements
+from app.core.database import Base
+from app.models import SessionReport, User
+from app.services.report_import import ReportImporter
+
+engine = create_engine(f"sqlite:///{tempfile.mkdtemp()}/p.db")
+Base.metadata.create_all(engine)
+db = Session(engine)
+user = User(id=uuid.uuid4(), google_sub="p", email="p@example.com", name="P")
+db.add(user)
+db.commit()
+row = {"session_id": "moved", "duration_sec": 60, "focused_sec": 60, "distracted_sec": 0, "neutral_sec": 0, "zone_in_score": 50}
+for started in ("2026-01-10T10:00:00Z", "2026-03-10T10:00:00Z"):
+    importer = ReportImporter(db, user.id, ReportCreate)
+    importer.add(1, {**row, "started_at": started, "ended_at": started})
+    assert importer.finish().imported == 1
+report = db.execute(statements.REPORT_BY_SESSION, {"user_id": user.id, "session_id": "moved"}).scalar_one()
+print(db.scalar(select(func.count()).select_from(SessionReport)), report.started_at.month)
+"""
+
+
+def _auth(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _row(report_payload: dict, **overrides) -> dict:
+    return {**report_payload, "session_id": str(uuid.uuid4()), **overrides}
+
+
+def test_import_ndjson_upserts_and_reports_errors(client, db, user_a, token_a, report_payload):
+    existing = client.post("/reports", json=report_payload, headers=_auth(token_a)).json()
+    lines = [
+        json.dumps(_row(report_payload, zone_in_score=91.0)),
+        json.dumps({**report_payload, "zone_in_score": 50.0}),  # same session: updates in place
+        "",
+        json.dumps(_row(report_payload, zone_in_score=150)),  # out of range
+        "{not json",
+    ]
+    resp = client.post("/reports/import", content="\n".join(lines).encode(), headers=_auth(token_a))
+    assert resp.status_code == 200
+    result = resp.json()
+    assert (result["received"], result["imported"], result["failed"]) == (4, 2, 2)
+    assert [e["line"] for e in result["errors"]] == [5, 4]  # parse errors are reported as they stream in
+    assert "zone_in_score" in result["errors"][1]["error"]
+
+    reports = {r["session_id"]: r for r in client.get("/reports", headers=_auth(token_a)).json()}
+    assert len(reports) == 2
+    assert reports[report_payload["session_id"]]["id"] == existing["id"]
+    assert reports[report_payload["session_id"]]["zone_in_score"] == 50.0
+    # Derived data is rebuilt once at the end
+    assert client.get("/me/stats", headers=_auth(token_a)).json()["report_count"] == 2
+    db.refresh(user_a)
+    assert user_a.max_zone_in_score == 91.0
+
+
+def test_import_fails_overlong_lines_alone(client, token_a, report_payload, monkeypatch):
+    monkeypatch.setattr(settings, "import_max_line_bytes", 1000)
+    body = "\n".join([
+        json.dumps(_row(report_payload)),
+        json.dumps(_row(report_payload, timeline_buckets_json="x" * 5000)),
+        json.dumps(_row(report_payload)),
+    ]).encode()
+    # Streamed in small chunks, so the long line is never held whole
+    chunks = (body[i:i + 100] for i in range(0, len(body), 100))
+    result = client.post("/reports/import", content=chunks, headers=_auth(token_a)).json()
+    assert (result["received"], result["imported"], result["failed"]) == (3, 2, 1)
+    assert result["errors"] == [{"line": 2, "error": "line longer than 1000 bytes"}]
+
+
+def test_export_import_round_trip(client, token_a, token_b, report_payload):
+    for _ in range(3):
+        client.post("/reports", json=_row(report_payload), headers=_auth(token_a))
+    for fmt in ("ndjson", "csv"):
+        exported = client.get(f"/reports/export?format={fmt}&include_timeline=true", headers=_auth(token_a)).content
+        result = client.post(f"/reports/import?format={fmt}", content=exported, headers=_auth(token_b)).json()
+        assert result["imported"] == 3 and result["failed"] == 0, result
+    mine = client.get("/reports", headers=_auth(token_b)).json()
+    assert len(mine) == 3  # the second import updated the first one's rows
+    assert json.loads(mine[0]["timeline_buckets_json"])[0]["state"] == "focused"
+
+
+def test_import_moved_started_at_when_partitioned():
+    out = subprocess.run(
+        [sys.executable, "-c", _PARTITIONED_IMPORT], cwd=ROOT, capture_output=True, text=True, check=True,
+        env={**os.environ, "PARTITION_REPORTS": "true"},
+    ).stdout
+    assert out.split() == ["1", "3"]  # updated in place, not inserted as a second row
+
+
+def test_import_keeps_lifetime_max_score(client, db, user_a, token_a, report_payload):
+    client.post("/reports", json={**report_payload, "zone_in_score": 95.0}, headers=_auth(token_a))
+    db.refresh(user_a)
+    assert user_a.max_zone_in_score == 95.0
+    # The import lowers the only report's score; the lifetime max stays
+    line = json.dumps({**report_payload, "zone_in_score": 40.0})
+    assert client.post("/reports/import", content=line.encode(), headers=_auth(token_a)).json()["imported"] == 1
+    assert client.get("/reports", headers=_auth(token_a)).json()[0]["zone_in_score"] == 40.0
+    db.refresh(user_a)
+    assert user_a.max_zone_in_score == 95.0
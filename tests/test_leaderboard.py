@@ -0,0 +1,123 @@
+"""Leaderboard: publish/unpublish, time-windowed boards, reactions."""
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core import tasks
+from app.models.leaderboard_window_entry import LeaderboardWindowEntry
+from app.services import leaderboard_windows
+
+
+def _publish(client: TestClient, token: str, payload: dict, started_at: datetime | None = None, **overrides) -> str:
+    started_at = started_at or datetime.now(timezone.utc)
+    body = {**payload, "started_at": started_at.isoformat(), "ended_at": started_at.isoformat(), **overrides}
+    rid = client.post("/reports", json=body, headers={"Authorization": f"Bearer {token}"}).json()["id"]
+    r = client.post(f"/leaderboard/reports/{rid}/publish", headers={"Authorization": f"Bearer {token}"})
+    assert r.status_code == 200
+    return rid
+
+
+def test_leaderboard_window_day(client: TestClient, token_a: str, report_payload: dict):
+    today = _publish(client, token_a, report_payload, session_id="today", zone_in_score=50.0)
+    old = _publish(client, token_a, report_payload, datetime.now(timezone.utc) - timedelta(days=3), session_id="old", zone_in_score=90.0)
+
+    all_time = [e["id"] for e in client.get("/leaderboard").json()]
+    assert all_time == [old, today]
+    day = [e["id"] for e in client.get("/leaderboard?window=day&timezone=UTC").json()]
+    assert day == [today]
+
+
+def test_leaderboard_window_follows_unpublish_and_upsert(client: TestClient, token_a: str, report_payload: dict):
+    rid = _publish(client, token_a, report_payload, session_id="s1", zone_in_score=50.0)
+    other = _publish(client, token_a, report_payload, session_id="s2", zone_in_score=60.0)
+
+    client.post("/reports", json={**report_payload, "session_id": "s1", "zone_in_score": 99.0,
+                                  "started_at": datetime.now(timezone.utc).isoformat()},
+                headers={"Authorization": f"Bearer {token_a}"})
+    assert [e["id"] for e in client.get("/leaderboard?window=week").json()] == [rid, other]
+
+    client.post(f"/leaderboard/reports/{rid}/unpublish", headers={"Authorization": f"Bearer {token_a}"})
+    assert [e["id"] for e in client.get("/leaderboard?window=month").json()] == [other]
+
+
+def test_leaderboard_window_hides_unpublished_before_sync(client: TestClient, token_a: str, report_payload: dict, monkeypatch):
+    rid = _publish(client, token_a, report_payload, session_id="s1")
+    # The window entry is still there until sync_leaderboard_entry runs
+    monkeypatch.setitem(tasks._handlers, "sync_leaderboard_entry", lambda db, payload: None)
+    client.post(f"/leaderboard/reports/{rid}/unpublish", headers={"Authorization": f"Bearer {token_a}"})
+    assert client.get("/leaderboard?window=day").json() == []
+    assert client.get("/leaderboard?window=day&distinct_users=true").json() == []
+
+
+def test_leaderboard_window_compaction(client: TestClient, db: Session, token_a: str, report_payload: dict):
+    _publish(client, token_a, report_payload, session_id="s1")
+    future = datetime.now(timezone.utc).date() + timedelta(days=leaderboard_windows.RETENTION_DAYS + 2)
+    assert leaderboard_windows.compact(db, today=future) == 1
+    db.commit()
+    assert db.query(LeaderboardWindowEntry).count() == 0
+
+
+def test_react_upsert_returns_live_counts(client: TestClient, token_a: str, token_b: str, report_payload: dict):
+    rid = _publish(client, token_a, report_payload)
+    a, b = {"Authorization": f"Bearer {token_a}"}, {"Authorization": f"Bearer {token_b}"}
+
+    r = client.post(f"/leaderboard/reports/{rid}/react", json={"emoji": "🔥"}, headers=a)
+    assert r.json() == {"emoji": "🔥", "count": 1, "reactions": {"🔥": 1}}
+    r = client.post(f"/leaderboard/reports/{rid}/react", json={"emoji": "🔥"}, headers=b)
+    assert r.json()["reactions"] == {"🔥": 2}
+    # Changing a reaction updates in place (one per user)
+    r = client.post(f"/leaderboard/reports/{rid}/react", json={"emoji": "👏"}, headers=a)
+    assert r.json() == {"emoji": "👏", "count": 1, "reactions": {"🔥": 1, "👏": 1}}
+
+    r = client.delete(f"/leaderboard/reports/{rid}/react", headers=b)
+    assert r.json() == {"removed": True, "reactions": {"👏": 1}}
+    assert client.delete(f"/leaderboard/reports/{rid}/react", headers=b).status_code == 404
+    entry = client.get("/leaderboard", headers=a).json()[0]
+    assert entry["reactions"] == {"👏": 1} and entry["user_reaction"] == "👏"
+
+
+def test_react_requires_published_report(client: TestClient, token_a: str, report_payload: dict):
+    a = {"Authorization": f"Bearer {token_a}"}
+    rid = client.post("/reports", json=report_payload, headers=a).json()["id"]
+    assert client.post(f"/leaderboard/reports/{rid}/react", json={"emoji": "🔥"}, headers=a).status_code == 400
+    missing = "00000000-0000-0000-0000-000000000000"
+    assert client.post(f"/leaderboard/reports/{missing}/react", json={"emoji": "🔥"}, headers=a).status_code == 404
+    assert client.post(f"/leaderboard/reports/{rid}/react", json={"emoji": "x"}, headers=a).status_code == 400
+
+
+def test_leaderboard_compact_format(client: TestClient, token_a: str, token_b: str, report_payload: dict):
+    a1 = _publish(client, token_a, report_payload, session_id="a1", zone_in_score=90.0)
+    b1 = _publish(client, token_b, report_payload, session_id="b1", zone_in_score=80.0)
+    a2 = _publish(client, token_a, report_payload, session_id="a2", zone_in_score=70.0)
+    a = {"Authorization": f"Bearer {token_a}"}
+    full = client.get("/leaderboard", headers=a).json()
+
+    body = client.get("/leaderboard?format=compact", headers=a).json()
+    assert [e["id"] for e in body["entries"]] == [a1, b1, a2]
+    assert len(body["users"]) == 2
+    owner = body["entries"][0]["user_id"]
+    assert body["entries"][2]["user_id"] == owner
+    assert body["users"][owner] == {k: full[0][k] for k in ("user_name", "user_email", "username")}
+    assert [e["is_own_report"] for e in body["entries"]] == [True, False, True]
+    assert all("timeline_buckets_json" not in e and "user_email" not in e for e in body["entries"])
+
+    with_timeline = client.get("/leaderboard?format=compact&include_timeline=true").json()
+    assert [e["timeline_buckets_json"] for e in with_timeline["entries"]] == [e["timeline_buckets_json"] for e in full]
+    # The full format is unchanged
+    assert "timeline_buckets_json" in full[0] and "user_email" in full[0]
+
+
+def test_leaderboard_distinct_users(client: TestClient, token_a: str, token_b: str, report_payload: dict):
+    a_best = _publish(client, token_a, report_payload, session_id="a1", zone_in_score=90.0)
+    _publish(client, token_a, report_payload, session_id="a2", zone_in_score=85.0)
+    b_best = _publish(client, token_b, report_payload, session_id="b1", zone_in_score=80.0)
+    _publish(client, token_b, report_payload, session_id="b2", zone_in_score=10.0)
+
+    assert len(client.get("/leaderboard").json()) == 4
+    assert [e["id"] for e in client.get("/leaderboard?distinct_users=true").json()] == [a_best, b_best]
+    assert [e["id"] for e in client.get("/leaderboard?distinct_users=true&window=day&timezone=UTC").json()] == [a_best, b_best]
+    # Paginated in SQL
+    assert [e["id"] for e in client.get("/leaderboard?distinct_users=true&limit=1&offset=1").json()] == [b_best]
+    assert [e["id"] for e in client.get("/leaderboard?limit=2&offset=1").json()][0] != a_best
+    assert client.get("/leaderboard?distinct_users=true&limit=0").status_code == 422
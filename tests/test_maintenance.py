@@ -0,0 +1,85 @@
+"""Set-based maintenance tasks: max scores, verification, usernames, user stats."""
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy.orm import Session
+
+from app.models.session_report import SessionReport
+from app.models.user import User
+from app.models.user_stats import UserStats
+from app.services.maintenance import backfill_max_scores, backfill_user_stats, backfill_usernames, verify_max_scores
+
+
+def _report(user: User, score: float) -> SessionReport:
+    now = datetime.now(timezone.utc)
+    return SessionReport(
+        user_id=user.id,
+        session_id=str(uuid.uuid4()),
+        started_at=now,
+        ended_at=now,
+        duration_sec=60,
+        focused_sec=60,
+        distracted_sec=0,
+        neutral_sec=0,
+        zone_in_score=score,
+    )
+
+
+def test_backfill_max_scores_chunked(db: Session, user_a: User, user_b: User):
+    db.add_all([_report(user_a, 40.0), _report(user_a, 90.0), _report(user_b, 10.0)])
+    db.commit()
+
+    assert verify_max_scores(db, progress=lambda _: None).changed == 2
+    result = backfill_max_scores(db, chunk_size=1, progress=lambda _: None)
+    assert result.scanned == 2
+    assert result.changed == 2
+
+    db.expire_all()
+    assert db.get(User, user_a.id).max_zone_in_score == 90.0
+    assert db.get(User, user_b.id).max_zone_in_score == 10.0
+    assert verify_max_scores(db, progress=lambda _: None).changed == 0
+
+
+def test_backfill_max_scores_keeps_lifetime_max(db: Session, user_a: User):
+    db.add(_report(user_a, 40.0))
+    user_a.max_zone_in_score = 95.0  # its best report was deleted
+    db.commit()
+
+    assert verify_max_scores(db, progress=lambda _: None).changed == 0
+    assert backfill_max_scores(db, progress=lambda _: None).changed == 0
+    db.expire_all()
+    assert db.get(User, user_a.id).max_zone_in_score == 95.0
+
+
+def test_backfill_max_scores_dry_run(db: Session, user_a: User):
+    db.add(_report(user_a, 70.0))
+    db.commit()
+
+    backfill_max_scores(db, chunk_size=0, dry_run=True, progress=lambda _: None)
+    db.expire_all()
+    assert db.get(User, user_a.id).max_zone_in_score is None
+
+
+def test_backfill_usernames(db: Session, user_a: User, user_b: User):
+    result = backfill_usernames(db, chunk_size=1, progress=lambda _: None)
+    assert result.changed == 2
+
+    db.expire_all()
+    a, b = db.get(User, user_a.id), db.get(User, user_b.id)
+    assert a.username.startswith("user-")
+    assert b.username.startswith("user-")
+    assert a.username != b.username
+
+
+def test_backfill_user_stats(db: Session, user_a: User, user_b: User):
+    db.add_all([_report(user_a, 40.0), _report(user_a, 80.0)])
+    db.commit()
+
+    result = backfill_user_stats(db, progress=lambda _: None)
+    assert result.changed == 1
+
+    stats = db.get(UserStats, user_a.id)
+    assert stats.report_count == 2
+    assert stats.zone_in_score_sum == 120.0
+    assert stats.current_streak_days == 1
+    assert db.get(UserStats, user_b.id) is None
@@ -0,0 +1,111 @@
+"""GET /me/stats: incrementally maintained totals, averages and streaks."""
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+
+def _post(client: TestClient, token: str, payload: dict, day_offset: int = 0, **overrides) -> dict:
+    started = datetime.now(timezone.utc).replace(hour=10, minute=0, second=0, microsecond=0) - timedelta(days=day_offset)
+    body = {**payload, "started_at": started.isoformat(), "ended_at": (started + timedelta(hours=1)).isoformat(), **overrides}
+    r = client.post("/reports", json=body, headers={"Authorization": f"Bearer {token}"})
+    assert r.status_code == 200
+    return r.json()
+
+
+def test_stats_empty(client: TestClient, token_a: str):
+    r = client.get("/me/stats", headers={"Authorization": f"Bearer {token_a}"})
+    assert r.status_code == 200
+    assert r.json()["report_count"] == 0
+    assert r.json()["average_zone_in_score"] is None
+
+
+def test_stats_totals_and_streaks(client: TestClient, token_a: str, report_payload: dict):
+    _post(client, token_a, report_payload, day_offset=2, session_id="s1", zone_in_score=60.0)
+    _post(client, token_a, report_payload, day_offset=1, session_id="s2", zone_in_score=80.0)
+    _post(client, token_a, report_payload, day_offset=0, session_id="s3", zone_in_score=70.0)
+
+    stats = client.get("/me/stats", headers={"Authorization": f"Bearer {token_a}"}).json()
+    assert stats["report_count"] == 3
+    assert stats["total_duration_sec"] == 3 * report_payload["duration_sec"]
+    assert stats["average_zone_in_score"] == 70.0
+    assert stats["current_streak_days"] == 3
+    assert stats["longest_streak_days"] == 3
+
+
+def test_stats_upsert_applies_delta(client: TestClient, token_a: str, report_payload: dict):
+    _post(client, token_a, report_payload, session_id="s1", zone_in_score=40.0, focused_sec=100.0)
+    _post(client, token_a, report_payload, session_id="s1", zone_in_score=90.0, focused_sec=300.0)
+
+    stats = client.get("/me/stats", headers={"Authorization": f"Bearer {token_a}"}).json()
+    assert stats["report_count"] == 1
+    assert stats["total_focused_sec"] == 300.0
+    assert stats["average_zone_in_score"] == 90.0
+
+
+def test_stats_upsert_moving_day_recomputes_streak(client: TestClient, token_a: str, report_payload: dict):
+    _post(client, token_a, report_payload, day_offset=1, session_id="s1")
+    _post(client, token_a, report_payload, day_offset=0, session_id="s2")
+    _post(client, token_a, report_payload, day_offset=5, session_id="s1")
+
+    stats = client.get("/me/stats", headers={"Authorization": f"Bearer {token_a}"}).json()
+    assert stats["current_streak_days"] == 1
+    assert stats["longest_streak_days"] == 1
+
+
+def test_stats_reset_after_delete(client: TestClient, token_a: str, report_payload: dict):
+    _post(client, token_a, report_payload, session_id=str(uuid.uuid4()))
+    client.delete("/reports", headers={"Authorization": f"Bearer {token_a}"})
+
+    stats = client.get("/me/stats", headers={"Authorization": f"Bearer {token_a}"}).json()
+    assert stats["report_count"] == 0
+
+
+def test_me_profile_cache_invalidated_on_commit(client: TestClient, db, user_a, token_a: str, report_payload: dict):
+    from app.services import user_profiles
+
+    headers = {"Authorization": f"Bearer {token_a}"}
+    assert client.get("/me", headers=headers).json()["name"] == user_a.name
+
+    # Changed behind the cache's back: still served from memory
+    user_a.name = "Renamed"
+    db.commit()
+    assert client.get("/me", headers=headers).json()["name"] != "Renamed"
+
+    # Invalidation takes effect on commit, not before (a rollback discards it)
+    user_profiles.invalidate_on_commit(db, [user_a.id])
+    db.rollback()
+    assert client.get("/me", headers=headers).json()["name"] != "Renamed"
+    user_profiles.invalidate_on_commit(db, [user_a.id])
+    db.commit()
+    assert client.get("/me", headers=headers).json()["name"] == "Renamed"
+
+    # A new max score (background task) refreshes the cached profile
+    _post(client, token_a, report_payload, zone_in_score=77.0)
+    assert user_profiles.get(db, user_a.id).max_zone_in_score == 77.0
+
+
+def test_stats_row_created_by_another_session(engine, db, user_a):
+    from sqlalchemy.orm import Session
+
+    from app.models.user_stats import UserStats
+    from app.services.user_stats import ReportSnapshot, apply_report_change
+
+    snap = ReportSnapshot(datetime.now(timezone.utc).date(), 3600.0, 3000.0, 300.0, 300.0, 0.0, 80.0)
+    # Another worker's session creates the row; this one then upserts into it
+    with Session(engine) as other:
+        apply_report_change(other, user_a.id, None, snap)
+        other.commit()
+    apply_report_change(db, user_a.id, None, snap)
+    db.commit()
+    stats = db.get(UserStats, user_a.id)
+    assert stats.report_count == 2 and stats.zone_in_score_sum == 160.0
+
+
+def test_profile_invalidation_state_is_bounded(db, user_a):
+    from app.services import user_profiles
+
+    user_profiles.invalidate(uuid.uuid4() for _ in range(100))
+    assert len(user_profiles._generations) == 0
+    assert user_profiles.get(db, user_a.id).name == user_a.name
+    assert len(user_profiles._generations) == 0
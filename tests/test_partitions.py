@@ -0,0 +1,87 @@
+"""Monthly partitioning helpers and the partitioned model layout (Postgres-only DDL)."""
+import os
+import subprocess
+import sys
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+from app.core import partitions
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Two uploads of one session with different started_at, with PARTITION_REPORTS=true
+_PARTITIONED_POSTS = """
+import uuid
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+from app.core.auth import create_access_token
+from app.core.database import Base, SessionLocal, engine
+from app.main import app
+from app.models import ReportSessionKey, SessionReport, User
+
+Base.metadata.create_all(engine)
+with SessionLocal() as db:
+    user = User(id=uuid.uuid4(), google_sub="p", email="p@example.com", name="P")
+    db.add(user)
+    db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token(user.id)}"}
+    body = {"session_id": "moved", "duration_sec": 60, "focused_sec": 60, "distracted_sec": 0, "neutral_sec": 0, "zone_in_score": 50}
+    with TestClient(app) as c:
+        ids = [
+            c.post("/reports", json={**body, "started_at": started, "ended_at": started}, headers=headers).json()["id"]
+            for started in ("2026-01-10T10:00:00Z", "2026-03-10T10:00:00Z")
+        ]
+        key = db.scalars(select(ReportSessionKey.report_id)).one()
+        assert c.delete("/reports", headers=headers).status_code < 300
+    print(ids[0] == ids[1] == str(key), db.scalar(select(func.count()).select_from(ReportSessionKey)))
+"""
+
+
+def test_month_helpers():
+    assert partitions.add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+    assert partitions.add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert partitions.partition_name(date(2026, 3, 1)) == "session_reports_y2026m03"
+
+
+def test_noop_on_sqlite(engine):
+    with engine.connect() as conn:
+        assert not partitions.is_partitioned(conn)
+    assert partitions.ensure_partitions(engine) == []
+    assert not partitions.wanted("sqlite")
+
+
+def test_range_conditions_bound_started_at_when_partitioned(monkeypatch):
+    start = datetime(2026, 5, 1, tzinfo=timezone.utc)
+    assert len(partitions.report_range_conditions(start, None)) == 1
+    monkeypatch.setattr(partitions.settings, "partition_reports", True)
+    conditions = partitions.report_range_conditions(start, start + timedelta(days=31))
+    assert len(conditions) == 3
+    assert conditions[1].right.value == start - partitions.MAX_SESSION_SPAN
+
+
+def test_partitioned_model_ddl():
+    code = (
+        "from sqlalchemy.schema import CreateTable; from sqlalchemy.dialects import postgresql; "
+        "from app.models import SessionReport; "
+        "print(CreateTable(SessionReport.__table__).compile(dialect=postgresql.dialect())); "
+        "print([c.name for c in SessionReport.__mapper__.primary_key])"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True,
+        env={**os.environ, "PARTITION_REPORTS": "true"},
+    ).stdout
+    assert "PARTITION BY RANGE (started_at)" in out
+    assert "PRIMARY KEY (id, started_at)" in out
+    assert "UNIQUE (user_id, session_id, started_at)" in out
+    assert "['id']" in out
+
+
+def test_partitioned_session_id_stays_unique_per_user(tmp_path):
+    out = subprocess.run(
+        [sys.executable, "-c", _PARTITIONED_POSTS], cwd=ROOT, capture_output=True, text=True, check=True,
+        env={
+            **os.environ, "PARTITION_REPORTS": "true", "TASK_WORKERS": "0",
+            "DATABASE_URL": f"sqlite:///{tmp_path}/p.db",
+        },
+    ).stdout
+    assert out.splitlines()[-1].split() == ["True", "0"]  # the second POST updated the first report; deleting released the key
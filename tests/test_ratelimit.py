@@ -0,0 +1,35 @@
+"""Per-client rate limits and threadpool load shedding."""
+from fastapi.testclient import TestClient
+
+from app.core import ratelimit
+from app.core.config import settings
+
+
+def test_post_reports_rate_limited_per_user(client: TestClient, token_a: str, token_b: str, report_payload: dict, monkeypatch):
+    monkeypatch.setattr(settings, "rate_limits", {"reports:create": "2/minute"})
+    headers_a = {"Authorization": f"Bearer {token_a}"}
+    assert client.post("/reports", json=report_payload, headers=headers_a).status_code == 200
+    assert client.post("/reports", json=report_payload, headers=headers_a).status_code == 200
+
+    r = client.post("/reports", json=report_payload, headers=headers_a)
+    assert r.status_code == 429
+    assert int(r.headers["retry-after"]) >= 1
+
+    # Another user has their own bucket
+    r = client.post("/reports", json=report_payload, headers={"Authorization": f"Bearer {token_b}"})
+    assert r.status_code == 200
+
+
+def test_leaderboard_rate_limited_by_ip(client: TestClient, monkeypatch):
+    monkeypatch.setattr(settings, "rate_limits", {"leaderboard:read": "1/hour"})
+    assert client.get("/leaderboard").status_code == 200
+    assert client.get("/leaderboard").status_code == 429
+
+
+def test_shed_load_when_threadpool_backlogged(client: TestClient, monkeypatch):
+    monkeypatch.setattr(ratelimit, "_threadpool_backlog", lambda: settings.max_threadpool_queue + 1)
+    r = client.get("/leaderboard")
+    assert r.status_code == 503
+    assert r.headers["retry-after"] == "1"
+    assert client.get("/health").status_code == 200
+    assert client.get("/health/tasks").status_code == 503
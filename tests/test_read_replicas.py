@@ -0,0 +1,49 @@
+"""Read-replica routing: GETs go to a replica unless the user just wrote."""
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core import database
+from app.core.database import Base
+from app.models.user import User
+
+
+@pytest.fixture
+def replica(tmp_path: Path, monkeypatch):
+    """A second SQLite file standing in for a lagging replica."""
+    e = create_engine(f"sqlite:///{tmp_path / 'replica.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=e)
+    Replica = sessionmaker(autocommit=False, autoflush=False, bind=e)
+    monkeypatch.setattr(database, "replica_sessions", [Replica])
+    database._recent_writes.clear()
+    yield Replica
+    database._recent_writes.clear()
+    e.dispose()
+
+
+def test_reads_go_to_replica(client, user_a, token_a, replica):
+    with replica() as r:
+        r.add(User(id=user_a.id, google_sub=user_a.google_sub, email=user_a.email, name="Replica A"))
+        r.commit()
+    resp = client.get("/me", headers={"Authorization": f"Bearer {token_a}"})
+    assert resp.status_code == 200
+    assert resp.json()["name"] == "Replica A"
+
+
+def test_read_your_writes_uses_primary(client, user_a, token_a, token_b, report_payload, replica):
+    resp = client.post("/reports", json=report_payload, headers={"Authorization": f"Bearer {token_a}"})
+    assert resp.status_code == 200
+    report_id = resp.json()["id"]
+    # The writer sees their report right away even though the replica hasn't got it
+    assert client.get(f"/reports/{report_id}", headers={"Authorization": f"Bearer {token_a}"}).status_code == 200
+    assert len(client.get("/reports", headers={"Authorization": f"Bearer {token_a}"}).json()) == 1
+    # Other users read the (lagging) replica
+    assert client.get("/reports", headers={"Authorization": f"Bearer {token_b}"}).json() == []
+
+
+def test_read_your_writes_window_expires(client, user_a, token_a, report_payload, replica, monkeypatch):
+    client.post("/reports", json=report_payload, headers={"Authorization": f"Bearer {token_a}"})
+    monkeypatch.setattr(database.settings, "read_your_writes_sec", 0.0)
+    assert client.get("/reports", headers={"Authorization": f"Bearer {token_a}"}).json() == []
@@ -108,17 +108,48 @@ def test_delete_all_reports(
     token_a: str,
     report_payload: dict,
 ):
-    """DELETE /reports removes all reports for the current user."""
+    """DELETE /reports schedules a background job that removes all reports for the current user."""
     client.post("/reports", json=report_payload, headers={"Authorization": f"Bearer {token_a}"})
     r = client.delete("/reports", headers={"Authorization": f"Bearer {token_a}"})
-    assert r.status_code == 200
-    data = r.json()
-    assert data["deleted"] >= 1
+    assert r.status_code == 202
+    job_id = r.json()["job_id"]
+    status_r = client.get(f"/reports/deletions/{job_id}", headers={"Authorization": f"Bearer {token_a}"})
+    assert status_r.status_code == 200
+    assert status_r.json()["status"] == "done"
+    assert status_r.json()["deleted"] >= 1
     list_r = client.get("/reports", headers={"Authorization": f"Bearer {token_a}"})
     assert list_r.status_code == 200
     assert len(list_r.json()) == 0
 
 
+def test_deletion_job_not_visible_to_other_user(
+    client: TestClient,
+    token_a: str,
+    token_b: str,
+):
+    job_id = client.delete("/reports", headers={"Authorization": f"Bearer {token_a}"}).json()["job_id"]
+    r = client.get(f"/reports/deletions/{job_id}", headers={"Authorization": f"Bearer {token_b}"})
+    assert r.status_code == 404
+
+
 def test_delete_all_reports_unauthorized(client: TestClient):
     r = client.delete("/reports")
     assert r.status_code == 401
+
+
+
+def test_stats_task_for_deleted_report_is_not_applied(client: TestClient, db: Session, user_a: User, token_a: str, report_payload: dict):
+    """An apply_user_stats task that runs after the deletion's rebuild doesn't bring the report back."""
+    from app.services import report_tasks
+    from app.services.report_deletion import delete_reports_chunked
+    from app.services.user_stats import ReportSnapshot
+
+    headers = {"Authorization": f"Bearer {token_a}"}
+    rid = client.post("/reports", json=report_payload, headers=headers).json()["id"]
+    snapshot = ReportSnapshot(datetime.now(timezone.utc).date(), 3600.0, 3000.0, 300.0, 300.0, 0.0, 80.0)
+    stale = {"user_id": str(user_a.id), "report_id": rid, "old": None, "new": report_tasks.snapshot_payload(snapshot)}
+
+    assert delete_reports_chunked(db, user_a.id, 100) == 1
+    report_tasks.apply_user_stats(db, stale)
+    db.commit()
+    assert client.get("/me/stats", headers=headers).json()["report_count"] == 0
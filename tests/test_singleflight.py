@@ -0,0 +1,46 @@
+"""Single-flight coalescing of concurrent identical calls."""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.core.singleflight import coalesce
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    calls = []
+    started = threading.Event()
+
+    @coalesce()
+    def load(db, key: str) -> list:
+        calls.append(key)
+        started.set()
+        time.sleep(0.2)
+        return [key]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        first = pool.submit(load, object(), "a")
+        started.wait()
+        rest = [pool.submit(load, object(), "a") for _ in range(6)]
+        other = pool.submit(load, object(), "b")
+        results = [f.result() for f in [first, *rest]]
+
+    assert other.result() == ["b"]
+    assert calls.count("a") == 1
+    assert all(r is results[0] for r in results)
+
+
+def test_errors_propagate_and_nothing_is_cached():
+    calls = []
+
+    @coalesce()
+    def load(db) -> None:
+        calls.append(1)
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        load(None)
+    with pytest.raises(ValueError):
+        load(None)
+    assert len(calls) == 2
@@ -0,0 +1,21 @@
+"""Cold start: OAuth/JWT stack stays lazy, optional pre-warm works."""
+import subprocess
+import sys
+from pathlib import Path
+
+from app.core.lifespan import prewarm
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_app_import_keeps_oauth_stack_lazy():
+    code = (
+        "import sys, app.main; "
+        "print(','.join(m for m in ('google.oauth2', 'httpx', 'jose', 'requests', 'numpy') if m in sys.modules))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == ""
+
+
+def test_prewarm(engine):
+    prewarm(engine)
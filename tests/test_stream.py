@@ -0,0 +1,125 @@
+"""Live leaderboard stream: broadcaster fan-out, slow-consumer dropping, endpoint deltas."""
+import asyncio
+import json
+import threading
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.broadcast import Broadcaster, broadcaster
+from app.core.config import settings
+
+
+def _parse(message: bytes) -> tuple[str, dict]:
+    fields = dict(line.split(": ", 1) for line in message.decode().strip().split("\n"))
+    return fields["event"], json.loads(fields["data"])
+
+
+async def _never_disconnected() -> bool:
+    return False
+
+
+def test_publish_from_thread_reaches_subscriber():
+    async def run():
+        b = Broadcaster()
+        stream = b.stream(_never_disconnected, maxsize=10)
+        assert (await stream.__anext__()).startswith(b"retry: ")
+        t = threading.Thread(target=b.publish, args=("removed", {"report_id": "r1"}))
+        t.start()
+        t.join()
+        message = await asyncio.wait_for(stream.__anext__(), 1)
+        await stream.aclose()
+        return message, b.subscribers
+
+    message, remaining = asyncio.run(run())
+    assert _parse(message) == ("removed", {"report_id": "r1"})
+    assert remaining == 0
+
+
+def test_slow_consumer_is_dropped():
+    async def run():
+        b = Broadcaster()
+        stream = b.stream(_never_disconnected, maxsize=2)
+        await stream.__anext__()
+        for i in range(5):
+            b.publish("rank", {"report_id": str(i)})
+        await asyncio.sleep(0)
+        return [m async for m in stream], b
+
+    messages, b = asyncio.run(run())
+    assert messages == [b"event: dropped\ndata: {}\n\n"]
+    assert b.dropped == 1 and b.subscribers == 0
+
+
+def test_subscriber_limit(monkeypatch):
+    monkeypatch.setattr(settings, "stream_max_subscribers", 1)
+
+    async def run():
+        b = Broadcaster()
+        return b.subscribe(), b.subscribe()
+
+    first, second = asyncio.run(run())
+    assert first is not None and second is None
+
+
+def test_stream_holds_no_slot_until_started():
+    async def run():
+        b = Broadcaster()
+        stream = b.stream(_never_disconnected)
+        before = b.subscribers  # e.g. the client disconnected before the body started
+        await stream.__anext__()
+        during = b.subscribers
+        await stream.aclose()
+        return before, during, b.subscribers
+
+    assert asyncio.run(run()) == (0, 1, 0)
+
+
+@pytest.fixture
+def events(monkeypatch) -> list[tuple[str, dict]]:
+    published: list[tuple[str, dict]] = []
+    monkeypatch.setattr(Broadcaster, "subscribers", property(lambda self: 1))
+    monkeypatch.setattr(broadcaster, "publish", lambda event, data: published.append((event, data)))
+    return published
+
+
+def test_leaderboard_changes_are_published(client: TestClient, token_a: str, token_b: str, report_payload: dict, events):
+    a, b = {"Authorization": f"Bearer {token_a}"}, {"Authorization": f"Bearer {token_b}"}
+    now = datetime.now(timezone.utc).isoformat()
+    body = {**report_payload, "started_at": now, "ended_at": now}
+    top = client.post("/reports", json={**body, "session_id": "top", "zone_in_score": 90.0}, headers=a).json()["id"]
+    rid = client.post("/reports", json={**body, "session_id": "s1", "zone_in_score": 50.0}, headers=a).json()["id"]
+    client.post(f"/leaderboard/reports/{top}/publish", headers=a)
+    events.clear()
+
+    client.post(f"/leaderboard/reports/{rid}/publish", headers=a)
+    client.post(f"/leaderboard/reports/{rid}/publish", headers=a)  # already published: no event
+    client.post("/reports", json={**body, "session_id": "s1", "zone_in_score": 95.0}, headers=a)
+    client.post(f"/leaderboard/reports/{rid}/react", json={"emoji": "🔥"}, headers=b)
+    client.delete(f"/leaderboard/reports/{rid}/react", headers=b)
+    client.post(f"/leaderboard/reports/{rid}/unpublish", headers=a)
+
+    assert [e for e, _ in events] == ["added", "rank", "reactions", "reactions", "removed"]
+    added, rank, reacted, cleared, removed = (d for _, d in events)
+    assert added["report_id"] == rid and added["rank"] == 2 and "username" in added
+    assert rank == {"report_id": rid, "zone_in_score": 95.0, "rank": 1}
+    assert reacted["reactions"] == {"🔥": 1} and cleared["reactions"] == {}
+    assert removed == {"report_id": rid}
+
+
+def test_stream_rejects_when_full(client: TestClient, monkeypatch):
+    monkeypatch.setattr(settings, "stream_max_subscribers", 0)
+    r = client.get("/leaderboard/stream")
+    assert r.status_code == 503
+
+
+def test_deleted_published_reports_are_removed(client: TestClient, token_a: str, report_payload: dict, events):
+    a = {"Authorization": f"Bearer {token_a}"}
+    rid = client.post("/reports", json=report_payload, headers=a).json()["id"]
+    client.post("/reports", json={**report_payload, "session_id": "private"}, headers=a)
+    client.post(f"/leaderboard/reports/{rid}/publish", headers=a)
+    events.clear()
+
+    assert client.delete("/reports", headers=a).status_code == 202
+    assert events == [("removed", {"report_id": rid})]
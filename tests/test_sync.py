@@ -0,0 +1,80 @@
+"""GET /reports/changes: change tokens, tombstones, paging and pruning."""
+import json
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.models.report_tombstone import ReportTombstone
+from app.services import report_sync
+
+
+def _changes(client: TestClient, headers: dict, since: str | None = None, **params) -> dict:
+    if since is not None:
+        params["since"] = since
+    r = client.get("/reports/changes", params=params, headers=headers)
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def test_changes_follow_writes_and_deletes(client: TestClient, token_a: str, token_b: str, report_payload: dict):
+    a = {"Authorization": f"Bearer {token_a}"}
+    s1 = client.post("/reports", json={**report_payload, "session_id": "s1"}, headers=a).json()["id"]
+    client.post("/reports", json={**report_payload, "session_id": "s2"}, headers=a)
+    client.post("/reports", json={**report_payload, "session_id": "other"}, headers={"Authorization": f"Bearer {token_b}"})
+
+    full = _changes(client, a)
+    assert [c["session_id"] for c in full["changes"]] == ["s1", "s2"]
+    assert full["deleted"] == [] and not full["has_more"] and not full["reset"]
+
+    # Nothing changed: same token back, nothing listed
+    assert _changes(client, a, full["token"]) == {**full, "changes": []}
+
+    client.post("/reports", json={**report_payload, "session_id": "s1", "zone_in_score": 12.0}, headers=a)
+    client.post(f"/leaderboard/reports/{s1}/publish", headers=a)
+    delta = _changes(client, a, full["token"])
+    assert [(c["session_id"], c["zone_in_score"], c["published"]) for c in delta["changes"]] == [("s1", 12.0, True)]
+
+    assert client.delete("/reports", headers=a).status_code == 202
+    gone = _changes(client, a, delta["token"])
+    assert gone["changes"] == []
+    assert sorted(d["session_id"] for d in gone["deleted"]) == ["s1", "s2"]
+
+
+def test_changes_paging_and_bad_tokens(client: TestClient, token_a: str, report_payload: dict):
+    a = {"Authorization": f"Bearer {token_a}"}
+    for i in range(5):
+        client.post("/reports", json={**report_payload, "session_id": f"s{i}"}, headers=a)
+
+    seen, token = [], None
+    while True:
+        page = _changes(client, a, token, limit=2)
+        seen += [c["session_id"] for c in page["changes"]]
+        token = page["token"]
+        if not page["has_more"]:
+            break
+    assert seen == [f"s{i}" for i in range(5)]
+
+    assert client.get("/reports/changes?since=abc", headers=a).status_code == 400
+    assert _changes(client, a, "999")["reset"] is True
+
+
+def test_import_assigns_distinct_sequences(client: TestClient, token_a: str, report_payload: dict):
+    a = {"Authorization": f"Bearer {token_a}"}
+    start = _changes(client, a)["token"]
+    body = "\n".join(json.dumps({**report_payload, "session_id": f"i{i}"}) for i in range(3))
+    assert client.post("/reports/import", content=body, headers=a).json()["imported"] == 3
+    page = _changes(client, a, start, limit=1)
+    assert [c["session_id"] for c in page["changes"]] == ["i0"] and page["has_more"]
+
+
+def test_pruned_tombstones_force_reset(client: TestClient, db: Session, user_a, token_a: str, report_payload: dict):
+    a = {"Authorization": f"Bearer {token_a}"}
+    client.post("/reports", json=report_payload, headers=a)
+    token = _changes(client, a)["token"]
+    client.delete("/reports", headers=a)
+
+    assert report_sync.prune_tombstones(db, [user_a.id], datetime.utcnow() + timedelta(seconds=1)) == 1
+    db.commit()
+    assert db.query(ReportTombstone).count() == 0
+    assert _changes(client, a, token)["reset"] is True
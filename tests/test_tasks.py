@@ -0,0 +1,130 @@
+"""Background task pipeline: outbox dispatch, worker pool, replay, retries."""
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core import tasks
+from app.models.outbox_task import OutboxTask
+from app.models.user import User
+
+
+def test_post_report_runs_derived_tasks(client: TestClient, db: Session, token_a: str, user_a: User, report_payload: dict):
+    r = client.post("/reports", json=report_payload, headers={"Authorization": f"Bearer {token_a}"})
+    assert r.status_code == 200
+
+    db.expire_all()
+    assert db.get(User, user_a.id).max_zone_in_score == report_payload["zone_in_score"]
+    assert db.query(OutboxTask).count() == 0
+
+
+def test_health_tasks_needs_admin_token(client: TestClient, monkeypatch):
+    assert client.get("/health/tasks").status_code == 404  # no ADMIN_TOKEN configured
+    monkeypatch.setattr(tasks.settings, "admin_token", "t")
+    assert client.get("/health/tasks").status_code == 403
+    assert client.get("/health/tasks", headers={"X-Admin-Token": "t"}).json()["outbox_dead"] == 0
+
+
+def test_worker_pool_and_replay(engine, db: Session, user_a: User):
+    seen = []
+
+    @tasks.task("test_record")
+    def _record(task_db: Session, payload: dict) -> None:
+        seen.append(payload["n"])
+
+    # A task left behind (e.g. by a crash) is picked up by replay once workers start.
+    db.add(OutboxTask(name="test_record", payload_json='{"n": 1}', attempts=0))
+    db.commit()
+
+    queue = tasks.TaskQueue(maxsize=10)
+    original, tasks.task_queue = tasks.task_queue, queue
+    try:
+        queue.start(2)
+        assert tasks.replay_outbox(engine) == 1
+        tasks.enqueue(db, "test_record", {"n": 2})
+        db.commit()
+        queue.join()
+    finally:
+        queue.stop()
+        tasks.task_queue = original
+
+    assert sorted(seen) == [1, 2]
+    assert queue.stats.processed == 2
+    assert db.query(OutboxTask).count() == 0
+
+
+def test_failed_task_stays_in_outbox(db: Session):
+    @tasks.task("test_fail")
+    def _fail(task_db: Session, payload: dict) -> None:
+        raise RuntimeError("boom")
+
+    tasks.enqueue(db, "test_fail", {})
+    db.commit()
+
+    row = db.query(OutboxTask).one()
+    assert row.attempts == 1
+    assert "boom" in row.last_error
+
+
+def test_failed_task_backs_off_then_dead_letters(engine, db: Session, monkeypatch):
+    calls = []
+
+    @tasks.task("test_flaky")
+    def _flaky(task_db: Session, payload: dict) -> None:
+        calls.append(1)
+        raise RuntimeError("still broken")
+
+    monkeypatch.setattr(tasks.settings, "task_retry_backoff_sec", 0)
+    tasks.enqueue(db, "test_flaky", {})
+    db.commit()
+    row = db.query(OutboxTask).one()
+    assert row.next_attempt_at is not None and row.dead_at is None
+
+    # Each retry pass re-runs the due task until it runs out of attempts
+    for _ in range(tasks.MAX_ATTEMPTS):
+        tasks.replay_outbox(engine)
+    db.expire_all()
+    row = db.query(OutboxTask).one()
+    assert len(calls) == tasks.MAX_ATTEMPTS and row.dead_at is not None
+    assert tasks.replay_outbox(engine) == 0
+    assert tasks.queue_metrics(db)["outbox_dead"] == 1
+
+    assert tasks.revive_dead(db) == 1
+    db.commit()
+    assert tasks.replay_outbox(engine) == 1
+
+
+def test_retry_waits_for_backoff(engine, db: Session, monkeypatch):
+    @tasks.task("test_fail_once")
+    def _fail(task_db: Session, payload: dict) -> None:
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(tasks.settings, "task_retry_backoff_sec", 3600)
+    tasks.enqueue(db, "test_fail_once", {})
+    db.commit()
+    assert tasks.replay_outbox(engine) == 0  # not due yet
+
+
+def test_periodic_retry_picks_up_dropped_tasks(engine, db: Session):
+    seen = []
+
+    @tasks.task("test_dropped")
+    def _record(task_db: Session, payload: dict) -> None:
+        seen.append(payload["n"])
+
+    queue = tasks.TaskQueue(maxsize=10)
+    original, tasks.task_queue = tasks.task_queue, queue
+    try:
+        queue.start(1)
+        # Written but never dispatched, like a task dropped by a full queue
+        db.add(OutboxTask(name="test_dropped", payload_json='{"n": 1}', attempts=0))
+        db.commit()
+        queue.every(0.05, tasks.replay_outbox, engine)
+        for _ in range(100):
+            if seen:
+                break
+            time.sleep(0.02)
+    finally:
+        queue.stop()
+        tasks.task_queue = original
+    assert seen == [1]
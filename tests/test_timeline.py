@@ -0,0 +1,58 @@
+"""Timeline resampling (GET /reports/{id}/timeline) and its NumPy core."""
+import json
+
+import pytest
+
+from app.services import timeline
+
+
+def _buckets(*spec: tuple[float, int, str]) -> str:
+    return json.dumps([{"bucket_start_ts": t, "bucket_duration_sec": d, "state": s} for t, d, s in spec])
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    timeline.clear_cache()
+    yield
+    timeline.clear_cache()
+
+
+def test_resample_fractions_and_majority():
+    b = timeline.decode_buckets(_buckets((0, 300, "focused"), (300, 100, "distracted"), (400, 200, "focused")))
+    out = timeline.resample(b, 2)
+    assert out["start_ts"] == 0.0
+    assert out["segment_duration_sec"] == 300.0
+    first, second = out["segments"]
+    assert first["state"] == "focused" and first["focused"] == 1.0
+    assert second["state"] == "focused"
+    assert second["distracted"] == pytest.approx(1 / 3, abs=1e-4)
+    assert second["focused"] == pytest.approx(2 / 3, abs=1e-4)
+
+
+def test_resample_gaps_and_bad_input():
+    out = timeline.resample(timeline.decode_buckets(_buckets((0, 100, "neutral"), (300, 100, "snoozed"))), 4)
+    assert [s["state"] for s in out["segments"]] == ["neutral", None, None, "snoozed"]
+    assert timeline.resample(timeline.decode_buckets("not json"), 10)["segments"] == []
+    assert timeline.resample(timeline.decode_buckets(None), 10)["segments"] == []
+
+
+def test_timeline_endpoint(client, token_a, token_b, report_payload):
+    report_payload["timeline_buckets_json"] = _buckets(*((i * 60, 60, "focused" if i % 4 else "distracted") for i in range(240)))
+    report_id = client.post("/reports", json=report_payload, headers={"Authorization": f"Bearer {token_a}"}).json()["id"]
+    resp = client.get(f"/reports/{report_id}/timeline?points=12", headers={"Authorization": f"Bearer {token_a}"})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["points"] == 12 and len(data["segments"]) == 12
+    assert all(s["state"] == "focused" and s["distracted"] == pytest.approx(0.25) for s in data["segments"])
+    assert client.get(f"/reports/{report_id}/timeline", headers={"Authorization": f"Bearer {token_b}"}).status_code == 404
+    assert client.get(f"/reports/{report_id}/timeline?points=0", headers={"Authorization": f"Bearer {token_a}"}).status_code == 422
+
+
+def test_timeline_cache_follows_reupload(client, token_a, report_payload):
+    headers = {"Authorization": f"Bearer {token_a}"}
+    report_payload["timeline_buckets_json"] = _buckets((0, 60, "focused"))
+    report_id = client.post("/reports", json=report_payload, headers=headers).json()["id"]
+    assert client.get(f"/reports/{report_id}/timeline?points=1", headers=headers).json()["segments"][0]["state"] == "focused"
+    report_payload["timeline_buckets_json"] = _buckets((0, 60, "snoozed"))
+    client.post("/reports", json=report_payload, headers=headers)
+    assert client.get(f"/reports/{report_id}/timeline?points=1", headers=headers).json()["segments"][0]["state"] == "snoozed"
@@ -0,0 +1,79 @@
+"""Cold-storage archival of old timelines and transparent rehydration."""
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from app.core.config import settings
+from app.models.session_report import SessionReport
+from app.models.timeline_archive import TimelineArchive
+from app.services.maintenance import archive_timelines, restore_timelines
+
+
+def _auth(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _post(client, token, payload, days_ago: int) -> dict:
+    started = datetime.now(timezone.utc) - timedelta(days=days_ago)
+    timeline = [{"bucket_start_ts": started.timestamp() + i * 300, "bucket_duration_sec": 300, "state": "focused"} for i in range(48)]
+    body = {
+        **payload,
+        "session_id": str(uuid.uuid4()),
+        "started_at": started.isoformat(),
+        "ended_at": (started + timedelta(hours=4)).isoformat(),
+        "timeline_buckets_json": json.dumps(timeline),
+    }
+    return client.post("/reports", json=body, headers=_auth(token)).json()
+
+
+def test_archive_and_rehydrate(client, db, token_a, report_payload, monkeypatch):
+    old = _post(client, token_a, report_payload, days_ago=60)
+    new = _post(client, token_a, report_payload, days_ago=1)
+
+    result = archive_timelines(db, progress=lambda _: None)
+    assert result.changed == 1
+    row = db.get(SessionReport, uuid.UUID(old["id"]))
+    db.refresh(row)
+    assert row.timeline_archived and row.timeline_buckets_json is None
+    assert not db.get(SessionReport, uuid.UUID(new["id"])).timeline_archived
+
+    # Reads put the timeline back transparently
+    got = client.get(f"/reports/{old['id']}", headers=_auth(token_a)).json()
+    assert got["timeline_buckets_json"] == old["timeline_buckets_json"]
+    listed = {r["id"]: r for r in client.get("/reports", headers=_auth(token_a)).json()}
+    assert listed[old["id"]]["timeline_buckets_json"] == old["timeline_buckets_json"]
+    segments = client.get(f"/reports/{old['id']}/timeline?points=4", headers=_auth(token_a)).json()["segments"]
+    assert [s["state"] for s in segments] == ["focused"] * 4
+    heat = client.get("/reports/heatmap", headers=_auth(token_a)).json()
+    assert sum(map(sum, heat["focused"])) == 2 * 48 * 300
+
+    assert client.get("/health/archive").status_code == 404  # admin only
+    monkeypatch.setattr(settings, "admin_token", "t")
+    stats = client.get("/health/archive", headers={"X-Admin-Token": "t"}).json()
+    assert stats["archived_reports"] == 1
+    assert stats["bytes_reclaimed"] > 0
+
+    # A second run finds nothing left to archive
+    assert archive_timelines(db, progress=lambda _: None).changed == 0
+
+
+def test_upsert_replaces_archived_timeline(client, db, token_a, report_payload):
+    old = _post(client, token_a, report_payload, days_ago=60)
+    archive_timelines(db, progress=lambda _: None)
+    body = {**report_payload, **{k: old[k] for k in ("session_id", "started_at", "ended_at")}}
+    body["timeline_buckets_json"] = '[{"bucket_start_ts":0,"bucket_duration_sec":60,"state":"neutral"}]'
+    client.post("/reports", json=body, headers=_auth(token_a))
+    got = client.get(f"/reports/{old['id']}", headers=_auth(token_a)).json()
+    assert got["timeline_buckets_json"] == body["timeline_buckets_json"]
+    assert db.query(TimelineArchive).count() == 0
+
+
+def test_restore_timelines(client, db, token_a, report_payload):
+    old = _post(client, token_a, report_payload, days_ago=60)
+    archive_timelines(db, progress=lambda _: None)
+    assert restore_timelines(db, progress=lambda _: None).changed == 1
+    row = db.get(SessionReport, uuid.UUID(old["id"]))
+    db.refresh(row)
+    assert not row.timeline_archived
+    assert row.timeline_buckets_json == old["timeline_buckets_json"]
+    assert db.query(TimelineArchive).count() == 0